@@ -0,0 +1,284 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import argparse
+import datetime
+import inspect
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import chess
+
+import properties
+from board_analysis.context import PositionContext
+from metaboard import PROPS, analyze
+from move_analysis.motifs import all_motifs
+from search.alphabeta import Search
+from registry import spec
+from scheduler import binding
+
+
+"""
+micro-benchmarks for `properties` over the fixed corpus in `positions.tsv`. run from the repository root:
+
+    python -m benchmarks.bench_properties -o bench.json
+    python -m benchmarks.bench_properties -o new.json --baseline bench.json
+
+every exported property that can be called from a position (or a position plus one of its legal moves) is timed on
+its own, then full `analyze` passes, then tagging every legal move with its tactical motifs, then `forced_mate_in_n`
+and the alpha-beta search at a few depths. each entry reports positions/sec and p50/p99 latency in microseconds
+(and nodes, for the searches). with `--baseline`, entries that got slower than `--tolerance` are listed and the exit
+status is 1.
+
+import time is measured too, in fresh interpreters: how long `import properties` and `import metaboard` take on
+top of `import chess`, and whether either pulled in one of the `HEAVY_MODULES` that should only load on use. going
+over `--import-budget-ms` or loading a heavy module also makes the exit status 1.
+"""
+
+
+DEFAULT_POSITIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'positions.tsv')
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_MODULES = ('properties', 'metaboard')
+# only needed once a property that uses them is looked up
+HEAVY_MODULES = ('numpy', 'search.mate', 'search.alphabeta', 'search.parallel', 'board_analysis.features',
+                 'properties.pawns', 'properties.tactics', 'properties.mates', 'properties.endgames',
+                 'properties.style')
+
+_IMPORT_SCRIPT = '''
+import sys, time
+import chess
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed, ','.join(name for name in {heavy!r} if name in sys.modules))
+'''
+
+
+def load_positions(path: str = DEFAULT_POSITIONS, phases: Optional[Sequence[str]] = None,
+                   limit: Optional[int] = None) -> List[Tuple[str, chess.Board]]:
+    positions = []
+    with open(path) as f:
+        for line in f:
+            if line.startswith('#') or not line.strip():
+                continue
+            phase, fen = line.rstrip('\n').split('\t')
+            if phases and phase not in phases:
+                continue
+            positions.append((phase, chess.Board(fen)))
+    if limit:
+        # keep the phase mix when trimming
+        step = max(1, len(positions) // limit)
+        positions = positions[::step][:limit]
+    return positions
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    """
+    latencies in seconds -> positions/sec and p50/p99 in microseconds
+    """
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    n = len(ordered)
+    return {
+        'n': n,
+        'positions_per_sec': n / total if total else float('inf'),
+        'p50_us': ordered[int(0.50 * (n - 1))] * 1e6,
+        'p99_us': ordered[int(0.99 * (n - 1))] * 1e6,
+        'total_s': total,
+    }
+
+
+def _time_calls(calls: List[Callable[[], Any]]) -> Dict[str, float]:
+    latencies = []
+    clock = time.perf_counter
+    for call in calls:
+        start = clock()
+        call()
+        latencies.append(clock() - start)
+    return summarize(latencies)
+
+
+def _move_property(name: str) -> bool:
+    parameters = list(inspect.signature(getattr(properties, name)).parameters.values())[2:]
+    return spec(name).kind == 'move' and all(p.default is not inspect.Parameter.empty for p in parameters)
+
+
+def bench_properties(boards: List[chess.Board], names: Sequence[str]) -> Dict[str, Any]:
+    results = {}
+    for name in names:
+        fn = getattr(properties, name)
+        if binding(name) is not None:
+            # a fresh context per call, so each property pays its own setup as a standalone caller would
+            calls = [lambda b=b: analyze(b, [name], PositionContext(b)) for b in boards]
+        elif _move_property(name):
+            calls = [lambda b=b, m=next(iter(b.legal_moves)): fn(b, m) for b in boards if any(b.legal_moves)]
+        else:
+            results[name] = {'skipped': 'needs a square, piece or move sequence'}
+            continue
+        results[name] = _time_calls(calls)
+    return results
+
+
+def bench_analyze(boards: List[chess.Board]) -> Dict[str, Any]:
+    return _time_calls([lambda b=b: analyze(b) for b in boards])
+
+
+def bench_motifs(boards: List[chess.Board]) -> Dict[str, Any]:
+    return _time_calls([lambda b=b: all_motifs(b) for b in boards])
+
+
+def bench_mate(boards: List[chess.Board], depths: Sequence[int], per_depth: int) -> Dict[str, Any]:
+    results = {}
+    for depth in depths:
+        sample = boards[:max(1, per_depth // depth)]
+        nodes = []
+
+        def call(b):
+            nodes.append(properties.forced_mate_in_n(b, not b.turn, depth).nodes)
+
+        summary = _time_calls([lambda b=b: call(b) for b in sample])
+        summary['nodes'] = sum(nodes)
+        results[str(depth)] = summary
+    return results
+
+
+def bench_search(boards: List[chess.Board], depths: Sequence[int], per_depth: int) -> Dict[str, Any]:
+    results = {}
+    for depth in depths:
+        sample = boards[:max(1, per_depth // depth)]
+        search = Search()
+
+        summary = _time_calls([lambda b=b: search.run(b, depth) for b in sample])
+        summary['nodes'] = search.total_nodes
+        summary['nps'] = search.nps
+        results[str(depth)] = summary
+    return results
+
+
+def bench_import(modules: Sequence[str] = IMPORT_MODULES, runs: int = 7) -> Dict[str, Any]:
+    """
+    median and worst import time of each module over `runs` fresh interpreters, with any heavy modules it loaded
+    """
+    results = {}
+    for module in modules:
+        script = _IMPORT_SCRIPT.format(module=module, heavy=HEAVY_MODULES)
+        timings = []
+        loaded = set()
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, '-c', script], cwd=REPO_ROOT, check=True,
+                                    stdout=subprocess.PIPE, universal_newlines=True).stdout.split()
+            timings.append(float(output[0]))
+            loaded.update(output[1].split(',') if len(output) > 1 else ())
+        timings.sort()
+        results[module] = {
+            'runs': runs,
+            'median_ms': timings[len(timings) // 2] * 1e3,
+            'max_ms': timings[-1] * 1e3,
+            'heavy_modules': sorted(loaded),
+        }
+    return results
+
+
+def check_import(report: Dict[str, Any], budget_ms: float) -> List[str]:
+    """
+    imports whose median time is over `budget_ms` or that loaded a heavy module
+    """
+    problems = []
+    for module, entry in report.items():
+        if entry['median_ms'] > budget_ms:
+            problems.append('{}: {:.1f}ms > {:.1f}ms'.format(module, entry['median_ms'], budget_ms))
+        if entry['heavy_modules']:
+            problems.append('{}: loads {}'.format(module, ', '.join(entry['heavy_modules'])))
+    return problems
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    entries whose throughput dropped by more than `tolerance` (a fraction) against `baseline`
+    """
+    regressions = []
+
+    def walk(cur, base, path):
+        if not isinstance(cur, dict) or not isinstance(base, dict):
+            return
+        if 'positions_per_sec' in cur and 'positions_per_sec' in base:
+            # sub-millisecond totals are timer noise
+            if base['total_s'] >= 1e-3 and cur['positions_per_sec'] < base['positions_per_sec'] * (1 - tolerance):
+                regressions.append('{}: {:.0f}/s -> {:.0f}/s'.format(
+                    path, base['positions_per_sec'], cur['positions_per_sec']))
+            return
+        for key in cur:
+            walk(cur[key], base.get(key), path + '/' + key if path else key)
+
+    walk(current, baseline, '')
+    return regressions
+
+
+def run(positions: List[Tuple[str, chess.Board]], names: Sequence[str], mate_depths: Sequence[int],
+        mate_positions: int) -> Dict[str, Any]:
+    boards = [board for _, board in positions]
+    middlegames = [board for phase, board in positions if phase == 'middlegame'] or boards
+    report = {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'chess': chess.__version__,
+            'machine': platform.machine(),
+            'positions': len(boards),
+        },
+    }
+    report['import'] = bench_import()
+    report['properties'] = bench_properties(boards, names)
+    report['analyze'] = bench_analyze(boards)
+    report['motifs'] = bench_motifs(boards)
+    report['forced_mate_in_n'] = bench_mate(middlegames, mate_depths, mate_positions)
+    report['search'] = bench_search(middlegames, mate_depths, mate_positions)
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='benchmark the properties library over a fixed position corpus')
+    parser.add_argument('-o', '--output', help='write the json report here')
+    parser.add_argument('--positions', default=DEFAULT_POSITIONS, help='tsv corpus of phase<TAB>fen lines')
+    parser.add_argument('--phases', help='comma separated phases to keep (opening, middlegame, endgame)')
+    parser.add_argument('-n', '--limit', type=int, help='benchmark at most this many positions')
+    parser.add_argument('-p', '--properties', help='comma separated property names (default: all exported)')
+    parser.add_argument('--mate-depths', default='1,2,3', help='comma separated forced_mate_in_n depths')
+    parser.add_argument('--mate-positions', type=int, default=60, help='positions searched at depth 1 (fewer deeper)')
+    parser.add_argument('--baseline', help='earlier json report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed throughput drop vs the baseline')
+    parser.add_argument('--import-budget-ms', type=float, default=50.0,
+                        help='allowed median time to import properties or metaboard, on top of chess')
+    args = parser.parse_args(argv)
+
+    positions = load_positions(args.positions, args.phases.split(',') if args.phases else None, args.limit)
+    names = args.properties.split(',') if args.properties else PROPS
+    depths = [int(d) for d in args.mate_depths.split(',') if d]
+    report = run(positions, names, depths, args.mate_positions)
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as out:
+            out.write(text + '\n')
+    else:
+        print(text)
+
+    status = 0
+    for problem in check_import(report['import'], args.import_budget_ms):
+        print('import: ' + problem, file=sys.stderr)
+        status = 1
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('slower: ' + regression, file=sys.stderr)
+        if regressions:
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import argparse
+import random
+
+import chess
+
+
+"""
+regenerates `positions.tsv`, the fixed benchmark corpus. games are played with a seeded, capture- and check-happy
+random policy so material comes off the board and later plies give realistic endgames; positions are sampled by
+phase. the output is deterministic for a given seed and python-chess version, and is checked in so runs stay
+comparable even if this script changes.
+"""
+
+
+# positions the repo's scripts have been poking at by hand
+HAND_PICKED = [
+    ('opening', 'r1bqkbnr/pppppppp/2n5/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 1 2'),
+    ('middlegame', '4r1k1/2rq1npp/2p1p3/3p4/pP1P4/P1R1PPP1/2R2KBP/2Q5 w - - 0 1'),
+    ('middlegame', 'r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4'),
+    ('middlegame', 'r2qkb1r/pp2nppp/3p4/2pNN1B1/2BnP3/3P4/PPP2PPP/R2bK2R w KQkq - 1 10'),
+    ('endgame', '6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1'),
+    ('endgame', '8/8/8/8/8/5k2/8/4K2R w K - 0 1'),
+]
+
+
+def _pick(board: chess.Board, rng: random.Random) -> chess.Move:
+    moves = list(board.legal_moves)
+    forcing = [m for m in moves if board.is_capture(m) or board.gives_check(m)]
+    if forcing and rng.random() < 0.6:
+        return rng.choice(forcing)
+    return rng.choice(moves)
+
+
+def _phase(board: chess.Board) -> str:
+    pieces = chess.popcount(board.occupied & ~board.pawns & ~board.kings)
+    if board.ply() <= 16:
+        return 'opening'
+    if pieces <= 6:
+        return 'endgame'
+    return 'middlegame'
+
+
+def generate(per_phase: int, seed: int):
+    rng = random.Random(seed)
+    counts = {'opening': 0, 'middlegame': 0, 'endgame': 0}
+    seen = set()
+    for phase, fen in HAND_PICKED:
+        seen.add(fen)
+        counts[phase] += 1
+        yield phase, fen
+
+    while min(counts.values()) < per_phase:
+        board = chess.Board()
+        while not board.is_game_over() and board.ply() < 200:
+            board.push(_pick(board, rng))
+            phase = _phase(board)
+            if counts[phase] >= per_phase or rng.random() > 0.15:
+                continue
+            fen = board.fen()
+            if fen not in seen:
+                seen.add(fen)
+                counts[phase] += 1
+                yield phase, fen
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='regenerate the benchmark position corpus')
+    parser.add_argument('-o', '--output', default='positions.tsv')
+    parser.add_argument('-n', '--per-phase', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=2020)
+    args = parser.parse_args(argv)
+
+    with open(args.output, 'w') as out:
+        out.write('# phase\tfen\n')
+        for phase, fen in generate(args.per_phase, args.seed):
+            out.write('{}\t{}\n'.format(phase, fen))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
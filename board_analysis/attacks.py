@@ -0,0 +1,97 @@
+from typing import Dict, Optional
+
+import chess
+
+
+"""
+who attacks what, for every square of one position. the table is built in one sweep over the occupied squares and
+answers attack, defense and x-ray questions with a bitboard lookup.
+"""
+
+
+def slider_attacks(piece_type: chess.PieceType, square: chess.Square, occupied: chess.Bitboard) -> chess.Bitboard:
+    """
+    attacks of a bishop/rook/queen on `square` for an arbitrary occupancy
+    """
+    attacks = 0
+    if piece_type in (chess.BISHOP, chess.QUEEN):
+        attacks |= chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied]
+    if piece_type in (chess.ROOK, chess.QUEEN):
+        attacks |= chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied] | \
+            chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied]
+    return attacks
+
+
+class AttackTable(object):
+    """
+    * `attacks_from[square]` – squares attacked by the piece on `square` (0 for empty squares)
+    * `attackers[color][square]` – pieces of `color` attacking `square`
+    * `xray_attackers[color][square]` – sliders of `color` that would attack `square` if the single piece in between
+      were removed
+    * `attacked_by[color]` – every square attacked by `color`
+
+    attacks are pseudo-legal: a pinned piece still attacks, as in `chess.Board.attackers`
+    """
+    def __init__(self, board: chess.BaseBoard, attacks_from: Optional[Dict[chess.Square, chess.Bitboard]] = None):
+        self.board = board
+        self.occupied = board.occupied
+        self.occupied_co = list(board.occupied_co)
+        self.attacks_from = [0] * 64
+        self.attackers = [[0] * 64, [0] * 64]
+        self.xray_attackers = [[0] * 64, [0] * 64]
+        self.attacked_by = [0, 0]
+
+        occupied = self.occupied
+        sliders = board.bishops | board.rooks | board.queens
+        for square in chess.scan_forward(occupied):
+            bb_square = chess.BB_SQUARES[square]
+            color = bool(board.occupied_co[chess.WHITE] & bb_square)
+            mask = attacks_from[square] if attacks_from is not None else board.attacks_mask(square)
+            self.attacks_from[square] = mask
+            self.attacked_by[color] |= mask
+
+            attackers = self.attackers[color]
+            for target in chess.scan_forward(mask):
+                attackers[target] |= bb_square
+
+            if sliders & bb_square:
+                through = slider_attacks(board.piece_type_at(square), square, occupied & ~(mask & occupied)) & ~mask
+                xray_attackers = self.xray_attackers[color]
+                for target in chess.scan_forward(through):
+                    xray_attackers[target] |= bb_square
+
+    def color_at(self, square: chess.Square) -> Optional[chess.Color]:
+        bb_square = chess.BB_SQUARES[square]
+        if not self.occupied & bb_square:
+            return None
+        return bool(self.occupied_co[chess.WHITE] & bb_square)
+
+    def attacks(self, square: chess.Square, target: chess.Square) -> bool:
+        return bool(self.attacks_from[square] & chess.BB_SQUARES[target])
+
+    def is_attacked(self, color: chess.Color, square: chess.Square) -> bool:
+        return bool(self.attackers[color][square])
+
+    def defenders(self, square: chess.Square) -> chess.Bitboard:
+        """
+        pieces of the same color as the piece on `square` that protect it
+        """
+        color = self.color_at(square)
+        if color is None:
+            return 0
+        return self.attackers[color][square]
+
+    def assailants(self, square: chess.Square) -> chess.Bitboard:
+        """
+        enemy pieces attacking the piece on `square`
+        """
+        color = self.color_at(square)
+        if color is None:
+            return 0
+        return self.attackers[not color][square]
+
+    def xrays(self, square: chess.Square, target: chess.Square) -> bool:
+        color = self.color_at(square)
+        if color is None:
+            return False
+        return bool(self.xray_attackers[color][target] & chess.BB_SQUARES[square])
@@ -0,0 +1,102 @@
+from typing import Dict, List, Optional
+import functools
+
+import chess
+
+from board_analysis.attacks import AttackTable
+from board_analysis.king_zone import mate_pattern
+from board_analysis.pawns import PawnStructure, pawn_structure
+from move_analysis.motifs import MotifDetector
+from search.transposition import zobrist_hash
+
+
+"""
+everything the position-level properties keep asking the board for, computed at most once per position.
+properties take an optional `ctx` and build their own context when called on their own, so a caller evaluating
+many properties on the same position (see `metaboard.analyze`) only pays for the setup once.
+"""
+
+
+class PositionContext(object):
+    def __init__(self, board: chess.Board):
+        self.board = board
+        self.occupied_co = list(board.occupied_co)
+        self.occupied = board.occupied
+        # property values already computed for this position, see `scheduler.evaluate`
+        self.results = {}
+
+    @functools.cached_property
+    def zobrist(self) -> int:
+        return zobrist_hash(self.board)
+
+    @functools.cached_property
+    def piece_map(self) -> Dict[chess.Square, chess.Piece]:
+        return self.board.piece_map()
+
+    @functools.cached_property
+    def color_piece_maps(self) -> List[Dict[chess.Square, chess.Piece]]:
+        """
+        piece map split by color, indexed by `chess.Color`
+        """
+        maps = [{}, {}]
+        for square, piece in self.piece_map.items():
+            maps[piece.color][square] = piece
+        return maps
+
+    def pieces(self, color: chess.Color) -> Dict[chess.Square, chess.Piece]:
+        return self.color_piece_maps[color]
+
+    @functools.cached_property
+    def king_squares(self) -> List[Optional[chess.Square]]:
+        return [self.board.king(chess.BLACK), self.board.king(chess.WHITE)]
+
+    def king(self, color: chess.Color) -> Optional[chess.Square]:
+        return self.king_squares[color]
+
+    @functools.cached_property
+    def legal_moves(self) -> List[chess.Move]:
+        return list(self.board.generate_legal_moves())
+
+    @functools.cached_property
+    def attacks_from(self) -> Dict[chess.Square, chess.Bitboard]:
+        """
+        attack mask of the piece on every occupied square
+        """
+        board = self.board
+        return {square: board.attacks_mask(square) for square in chess.scan_forward(self.occupied)}
+
+    @functools.cached_property
+    def attack_table(self) -> AttackTable:
+        return AttackTable(self.board, self.attacks_from)
+
+    @property
+    def attacked_by(self) -> List[chess.Bitboard]:
+        """
+        union of all squares attacked by each color, indexed by `chess.Color`
+        """
+        return self.attack_table.attacked_by
+
+    @functools.cached_property
+    def motifs(self) -> Dict[chess.Move, int]:
+        """
+        tactical motif bitset of every legal move, see `move_analysis.motifs`
+        """
+        return MotifDetector(self.board, self.attacks_from).detect_all(self.legal_moves)
+
+    @functools.cached_property
+    def mate_pattern(self) -> int:
+        """
+        mating patterns bitset, see `board_analysis.king_zone`
+        """
+        return mate_pattern(self.board)
+
+    @functools.cached_property
+    def pawns(self) -> PawnStructure:
+        return pawn_structure(self.board)
+
+
+def context(board: chess.Board, ctx: Optional[PositionContext] = None) -> PositionContext:
+    """
+    `ctx` if the caller already has one for `board`, otherwise a fresh one
+    """
+    return ctx if ctx is not None else PositionContext(board)
@@ -0,0 +1,122 @@
+from typing import List, Optional
+
+import chess
+
+from board_analysis.attacks import slider_attacks
+from cache import LRUCache
+from move_analysis.moves import PIECE_VALUES
+from search.transposition import zobrist_hash
+
+
+"""
+static exchange evaluation: what a run of captures on one square wins or loses, without searching. both sides
+capture with their least valuable attacker first; attackers are recomputed against the shrinking occupancy after
+every capture, so a line piece standing behind another one (an x-ray) joins the exchange once the piece in front of
+it has gone. either side may stop capturing when going on would lose material. values are `PIECE_VALUES` integers.
+
+results are cached by (zobrist key, square, color), so asking about every piece of a position many times costs one
+exchange per square.
+"""
+
+
+_CACHE = LRUCache(maxsize=1 << 16)
+
+
+class Exchange(object):
+    """
+    * `square` – where the captures happen
+    * `color` – the side that starts capturing
+    * `gain` – material `color` wins if it makes the first capture and both sides then stop at the right time
+      (negative if the first capture already loses)
+    * `sequence` – squares of the capturing pieces, in order, as far as the exchange is worth playing out
+    """
+    __slots__ = ['square', 'color', 'gain', 'sequence']
+
+    def __init__(self, square: chess.Square, color: chess.Color, gain: int, sequence: List[chess.Square]):
+        self.square = square
+        self.color = color
+        self.gain = gain
+        self.sequence = sequence
+
+    def __repr__(self) -> str:
+        return 'Exchange({}, {}, gain={}, sequence={})'.format(
+            chess.square_name(self.square), chess.COLOR_NAMES[self.color], self.gain,
+            [chess.square_name(square) for square in self.sequence])
+
+
+def attackers(board: chess.BaseBoard, color: chess.Color, square: chess.Square,
+              occupied: chess.Bitboard) -> chess.Bitboard:
+    """
+    pieces of `color` attacking `square` when only the squares in `occupied` are occupied
+    """
+    bishops = board.bishops | board.queens
+    rooks = board.rooks | board.queens
+    attackers = (chess.BB_KNIGHT_ATTACKS[square] & board.knights) | \
+        (chess.BB_KING_ATTACKS[square] & board.kings) | \
+        (chess.BB_PAWN_ATTACKS[not color][square] & board.pawns) | \
+        (slider_attacks(chess.BISHOP, square, occupied) & bishops) | \
+        (slider_attacks(chess.ROOK, square, occupied) & rooks)
+    return attackers & board.occupied_co[color] & occupied
+
+
+def _least_valuable(board: chess.BaseBoard, bb: chess.Bitboard) -> Optional[chess.Square]:
+    for piece_type in chess.PIECE_TYPES:
+        pieces = bb & board.pieces_mask(piece_type, chess.WHITE) | bb & board.pieces_mask(piece_type, chess.BLACK)
+        if pieces:
+            return chess.lsb(pieces)
+    return None
+
+
+def _resolve(board: chess.BaseBoard, square: chess.Square, color: chess.Color) -> Exchange:
+    occupied = board.occupied
+    target = board.piece_type_at(square)
+    # value of the piece taken by each capture in turn
+    taken = []
+    sequence = []
+    value = PIECE_VALUES[target] if target else 0
+    side = color
+    while True:
+        capturer = _least_valuable(board, attackers(board, side, square, occupied))
+        if capturer is None:
+            break
+        occupied &= ~chess.BB_SQUARES[capturer]
+        capturer_type = board.piece_type_at(capturer)
+        # a king can't capture onto a square that is still defended
+        if capturer_type == chess.KING and attackers(board, not side, square, occupied):
+            break
+        taken.append(value)
+        sequence.append(capturer)
+        value = PIECE_VALUES[capturer_type]
+        side = not side
+
+    if not sequence:
+        return Exchange(square, color, 0, [])
+
+    # back up from the last capture: each side only recaptures if that doesn't lose material
+    score = 0
+    played = len(sequence)
+    for i in range(len(sequence) - 1, 0, -1):
+        score = taken[i] - score
+        if score < 0:
+            score = 0
+            played = i
+    return Exchange(square, color, taken[0] - score, sequence[:played])
+
+
+def exchange(board: chess.Board, square: chess.Square, color: chess.Color, key: Optional[int] = None) -> Exchange:
+    """
+    the exchange `color` can start on `square`. `key` is the zobrist key of `board` if the caller has it
+    """
+    cache_key = (zobrist_hash(board) if key is None else key, square, color)
+    result = _CACHE.get(cache_key)
+    if result is None:
+        result = _resolve(board, square, color)
+        _CACHE.put(cache_key, result)
+    return result
+
+
+def see(board: chess.Board, square: chess.Square, color: chess.Color, key: Optional[int] = None) -> int:
+    """
+    material `color` wins by capturing first on `square`
+    """
+    return exchange(board, square, color, key).gain
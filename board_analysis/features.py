@@ -0,0 +1,163 @@
+from typing import Dict, List, Sequence
+import collections
+
+import chess
+import numpy as np
+
+
+"""
+feature vectors for a whole batch of positions at once. each board contributes its eight python-chess bitboards to
+one (N, 8) uint64 array, and every feature is then a handful of vectorized shifts, masks and popcounts over the
+batch. the result is a single float32 matrix with one named column per feature.
+"""
+
+
+FEATURE_GROUPS = collections.OrderedDict([
+    ('open_position', ['central_pawns', 'supported_central_pawns', 'open_files', 'half_open_files_white',
+                       'half_open_files_black']),
+    ('closed', ['locked_pawns', 'pawn_chain_links', 'pawn_tension']),
+    ('centralization', ['center_pieces_white', 'center_pieces_black', 'expanded_center_pieces_white',
+                        'expanded_center_pieces_black']),
+    ('control_of_center', ['center_pawn_control_white', 'center_pawn_control_black', 'center_occupation_white',
+                           'center_occupation_black']),
+    ('cramped', ['space_white', 'space_black', 'blocked_pawns_white', 'blocked_pawns_black']),
+    ('imbalance', ['pawn_balance', 'knight_balance', 'bishop_balance', 'rook_balance', 'queen_balance',
+                   'bishop_pair_white', 'bishop_pair_black', 'material_balance']),
+    ('material_style', ['material_white', 'material_black', 'total_material', 'pieces_white', 'pieces_black']),
+])
+
+FEATURE_COLUMNS = [column for columns in FEATURE_GROUPS.values() for column in columns]
+
+_WHITE, _BLACK, _PAWNS, _KNIGHTS, _BISHOPS, _ROOKS, _QUEENS, _KINGS = range(8)
+
+_FILES = [np.uint64(bb) for bb in chess.BB_FILES]
+_NOT_FILE_A = np.uint64(~chess.BB_FILE_A & chess.BB_ALL)
+_NOT_FILE_H = np.uint64(~chess.BB_FILE_H & chess.BB_ALL)
+_CENTER_FILES = np.uint64(chess.BB_FILE_D | chess.BB_FILE_E)
+_CENTER = np.uint64(chess.BB_CENTER)
+_EXPANDED_CENTER = np.uint64((chess.BB_FILE_C | chess.BB_FILE_D | chess.BB_FILE_E | chess.BB_FILE_F) &
+                             (chess.BB_RANK_3 | chess.BB_RANK_4 | chess.BB_RANK_5 | chess.BB_RANK_6))
+_SPACE = [np.uint64((chess.BB_FILE_C | chess.BB_FILE_D | chess.BB_FILE_E | chess.BB_FILE_F) &
+                    (chess.BB_RANK_5 | chess.BB_RANK_6 | chess.BB_RANK_7)),
+          np.uint64((chess.BB_FILE_C | chess.BB_FILE_D | chess.BB_FILE_E | chess.BB_FILE_F) &
+                    (chess.BB_RANK_2 | chess.BB_RANK_3 | chess.BB_RANK_4))]
+_LIGHT = np.uint64(chess.BB_LIGHT_SQUARES)
+_DARK = np.uint64(chess.BB_DARK_SQUARES)
+_7, _8, _9 = np.uint64(7), np.uint64(8), np.uint64(9)
+
+_BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+class FeatureMatrix(object):
+    """
+    float32 matrix of shape (positions, features) together with its column names
+    """
+    def __init__(self, values: np.ndarray, columns: List[str]):
+        self.values = values
+        self.columns = columns
+        self._index = {column: i for i, column in enumerate(columns)}
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.values[:, self._index[column]]
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    def group(self, name: str) -> np.ndarray:
+        return self.values[:, [self._index[column] for column in FEATURE_GROUPS[name]]]
+
+
+def popcount(bb: np.ndarray) -> np.ndarray:
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(bb)
+    bb = np.ascontiguousarray(bb)
+    return _BYTE_POPCOUNT[bb.view(np.uint8)].reshape(bb.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+def bitboard_array(boards: Sequence[chess.BaseBoard]) -> np.ndarray:
+    """
+    (N, 8) uint64 array: white, black, pawns, knights, bishops, rooks, queens, kings
+    """
+    return np.array([(b.occupied_co[chess.WHITE], b.occupied_co[chess.BLACK], b.pawns, b.knights, b.bishops,
+                      b.rooks, b.queens, b.kings) for b in boards], dtype=np.uint64).reshape(-1, 8)
+
+
+def _pawn_attacks(pawns: np.ndarray, color: chess.Color) -> np.ndarray:
+    if color == chess.WHITE:
+        return ((pawns << _7) & _NOT_FILE_H) | ((pawns << _9) & _NOT_FILE_A)
+    return ((pawns >> _9) & _NOT_FILE_H) | ((pawns >> _7) & _NOT_FILE_A)
+
+
+def _columns(bbs: np.ndarray) -> Dict[str, np.ndarray]:
+    occupied = bbs[:, _WHITE] | bbs[:, _BLACK]
+    own = [bbs[:, _BLACK], bbs[:, _WHITE]]
+    pawns = [bbs[:, _PAWNS] & own[chess.BLACK], bbs[:, _PAWNS] & own[chess.WHITE]]
+    pawn_attacks = [_pawn_attacks(pawns[chess.BLACK], chess.BLACK), _pawn_attacks(pawns[chess.WHITE], chess.WHITE)]
+    minor_major = bbs[:, _KNIGHTS] | bbs[:, _BISHOPS] | bbs[:, _ROOKS] | bbs[:, _QUEENS]
+    counts = [[popcount(bbs[:, piece] & own[color]).astype(np.float32)
+               for piece in (_PAWNS, _KNIGHTS, _BISHOPS, _ROOKS, _QUEENS)] for color in chess.COLORS]
+    material = [counts[color][0] + 3 * counts[color][1] + 3 * counts[color][2] + 5 * counts[color][3] +
+                9 * counts[color][4] for color in chess.COLORS]
+
+    open_files = np.zeros(len(bbs), dtype=np.float32)
+    half_open = [np.zeros(len(bbs), dtype=np.float32), np.zeros(len(bbs), dtype=np.float32)]
+    for file_mask in _FILES:
+        has_white = (pawns[chess.WHITE] & file_mask) != 0
+        has_black = (pawns[chess.BLACK] & file_mask) != 0
+        open_files += ~has_white & ~has_black
+        half_open[chess.WHITE] += ~has_white & has_black
+        half_open[chess.BLACK] += has_white & ~has_black
+
+    columns = {
+        'central_pawns': popcount(bbs[:, _PAWNS] & _CENTER_FILES),
+        'supported_central_pawns': popcount(pawns[chess.WHITE] & _CENTER_FILES & pawn_attacks[chess.WHITE]) +
+                                   popcount(pawns[chess.BLACK] & _CENTER_FILES & pawn_attacks[chess.BLACK]),
+        'open_files': open_files,
+        'locked_pawns': popcount(pawns[chess.WHITE] & (pawns[chess.BLACK] >> _8)),
+        'pawn_chain_links': popcount(pawns[chess.WHITE] & pawn_attacks[chess.WHITE]) +
+                            popcount(pawns[chess.BLACK] & pawn_attacks[chess.BLACK]),
+        'pawn_tension': popcount(pawns[chess.BLACK] & pawn_attacks[chess.WHITE]) +
+                        popcount(pawns[chess.WHITE] & pawn_attacks[chess.BLACK]),
+        'pawn_balance': counts[chess.WHITE][0] - counts[chess.BLACK][0],
+        'knight_balance': counts[chess.WHITE][1] - counts[chess.BLACK][1],
+        'bishop_balance': counts[chess.WHITE][2] - counts[chess.BLACK][2],
+        'rook_balance': counts[chess.WHITE][3] - counts[chess.BLACK][3],
+        'queen_balance': counts[chess.WHITE][4] - counts[chess.BLACK][4],
+        'material_balance': material[chess.WHITE] - material[chess.BLACK],
+        'total_material': material[chess.WHITE] + material[chess.BLACK],
+    }
+    blocked = [pawns[chess.BLACK] & (occupied << _8), pawns[chess.WHITE] & (occupied >> _8)]
+    for color in chess.COLORS:
+        name = chess.COLOR_NAMES[color]
+        bishops = bbs[:, _BISHOPS] & own[color]
+        columns['half_open_files_' + name] = half_open[color]
+        columns['center_pieces_' + name] = popcount(minor_major & own[color] & _CENTER)
+        columns['expanded_center_pieces_' + name] = popcount(minor_major & own[color] & _EXPANDED_CENTER)
+        columns['center_pawn_control_' + name] = popcount(pawn_attacks[color] & _CENTER)
+        columns['center_occupation_' + name] = popcount(own[color] & _CENTER)
+        columns['space_' + name] = popcount(_SPACE[color] & ~pawns[color] & ~pawn_attacks[not color])
+        columns['blocked_pawns_' + name] = popcount(blocked[color])
+        columns['bishop_pair_' + name] = ((bishops & _LIGHT) != 0) & ((bishops & _DARK) != 0)
+        columns['material_' + name] = material[color]
+        columns['pieces_' + name] = popcount(minor_major & own[color])
+    return columns
+
+
+def feature_matrix(boards: Sequence[chess.BaseBoard], groups: Sequence[str] = None) -> FeatureMatrix:
+    """
+    features of every board in `boards` as one float32 matrix, restricted to the feature `groups` if given
+    """
+    names = list(groups) if groups is not None else list(FEATURE_GROUPS)
+    columns = [column for name in names for column in FEATURE_GROUPS[name]]
+    computed = _columns(bitboard_array(boards))
+    values = np.empty((len(boards), len(columns)), dtype=np.float32)
+    for i, column in enumerate(columns):
+        values[:, i] = computed[column]
+    return FeatureMatrix(values, columns)
+
+
+def feature_vector(board: chess.BaseBoard, group: str) -> List[float]:
+    """
+    one group of features for a single board, as a plain list
+    """
+    return feature_matrix([board], [group]).values[0].tolist()
@@ -0,0 +1,84 @@
+from typing import List
+
+import chess
+
+
+"""
+king neighbourhood and back-rank masks, computed once at import, and a mate-pattern classifier built on them. the
+classifier bails out on the first bitboard test when the side to move isn't in check, and only asks python-chess
+for checkmate when it is, so it can be run on every position of a game for next to nothing.
+"""
+
+
+MATE_PATTERNS = ('back_rank_mate', 'smothered_mate', 'arabian_mate')
+
+BACK_RANK_MATE = 1 << 0
+SMOTHERED_MATE = 1 << 1
+ARABIAN_MATE = 1 << 2
+
+# indexed by chess.Color
+BB_BACK_RANK = [chess.BB_RANK_8, chess.BB_RANK_1]
+BB_CORNERS = chess.BB_A1 | chess.BB_H1 | chess.BB_A8 | chess.BB_H8
+
+# squares next to the king
+BB_KING_ZONE = chess.BB_KING_ATTACKS
+
+# squares next to the king one rank further up the board from `color`'s point of view, `[color][square]`
+BB_FORWARD_ZONE = [[chess.BB_KING_ATTACKS[square] & chess.BB_RANKS[rank] if 0 <= rank < 8 else 0
+                    for square in chess.SQUARES
+                    for rank in [chess.square_rank(square) + (1 if color else -1)]]
+                   for color in [chess.BLACK, chess.WHITE]]
+
+
+def pattern_names(bits: int) -> List[str]:
+    return [name for i, name in enumerate(MATE_PATTERNS) if bits >> i & 1]
+
+
+def on_back_rank(board: chess.BaseBoard, color: chess.Color) -> bool:
+    king = board.king(color)
+    return king is not None and bool(BB_BACK_RANK[color] & chess.BB_SQUARES[king])
+
+
+def flight_squares(board: chess.Board, color: chess.Color) -> chess.Bitboard:
+    """
+    squares next to `color`'s king it could step to: not occupied by its own pieces and not attacked
+    """
+    king = board.king(color)
+    if king is None:
+        return 0
+    flights = 0
+    for square in chess.scan_forward(BB_KING_ZONE[king] & ~board.occupied_co[color]):
+        if not board.is_attacked_by(not color, square):
+            flights |= chess.BB_SQUARES[square]
+    return flights
+
+
+def mate_pattern(board: chess.Board) -> int:
+    """
+    bitset of the mating patterns in `board`, 0 unless the side to move is checkmated
+    """
+    checkers = board.checkers_mask()
+    if not checkers or not board.is_checkmate():
+        return 0
+    color = board.turn
+    king = board.king(color)
+    own = board.occupied_co[color]
+    zone = BB_KING_ZONE[king]
+    bits = 0
+    if checkers & (checkers - 1):
+        return bits
+
+    checker = chess.lsb(checkers)
+    checker_type = board.piece_type_at(checker)
+
+    if checker_type == chess.KNIGHT and not zone & ~own:
+        bits |= SMOTHERED_MATE
+    if checker_type in (chess.ROOK, chess.QUEEN) and BB_BACK_RANK[color] & chess.BB_SQUARES[king] & \
+            chess.BB_RANKS[chess.square_rank(checker)]:
+        forward = BB_FORWARD_ZONE[color][king]
+        if forward & own == forward:
+            bits |= BACK_RANK_MATE
+    if checker_type == chess.ROOK and BB_CORNERS & chess.BB_SQUARES[king] and zone & chess.BB_SQUARES[checker] and \
+            chess.BB_KNIGHT_ATTACKS[checker] & board.knights & board.occupied_co[not color]:
+        bits |= ARABIAN_MATE
+    return bits
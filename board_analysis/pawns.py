@@ -0,0 +1,141 @@
+from typing import List
+
+import chess
+import chess.polyglot
+
+from cache import LRUCache
+
+
+"""
+pawn structure for both colors in one pass over the integer pawn bitboards. every pawn property in `properties`
+reads from a `PawnStructure`, and structures are cached by a zobrist key of the pawns alone, since the pawn
+skeleton changes far less often than the rest of the position.
+"""
+
+
+_PAWN_KEYS = [[chess.polyglot.POLYGLOT_RANDOM_ARRAY[64 * int(color) + square] for square in chess.SQUARES]
+              for color in chess.COLORS]
+
+_CACHE = LRUCache(maxsize=1 << 14)
+
+BB_ADVANCED = [chess.BB_RANK_1 | chess.BB_RANK_2 | chess.BB_RANK_3 | chess.BB_RANK_4,
+               chess.BB_RANK_5 | chess.BB_RANK_6 | chess.BB_RANK_7 | chess.BB_RANK_8]
+
+
+def fill_north(bb: chess.Bitboard) -> chess.Bitboard:
+    bb |= bb << 8
+    bb |= bb << 16
+    bb |= bb << 32
+    return bb & chess.BB_ALL
+
+
+def fill_south(bb: chess.Bitboard) -> chess.Bitboard:
+    bb |= bb >> 8
+    bb |= bb >> 16
+    bb |= bb >> 32
+    return bb
+
+
+def file_fill(bb: chess.Bitboard) -> chess.Bitboard:
+    return fill_north(bb) | fill_south(bb)
+
+
+def adjacent_files(bb: chess.Bitboard) -> chess.Bitboard:
+    """
+    full files to the left and right of every file occupied in `bb`
+    """
+    filled = file_fill(bb)
+    return chess.shift_left(filled) | chess.shift_right(filled)
+
+
+def front_span(bb: chess.Bitboard, color: chess.Color) -> chess.Bitboard:
+    """
+    squares strictly in front of each set square, from `color`'s point of view
+    """
+    if color == chess.WHITE:
+        return fill_north(chess.shift_up(bb))
+    return fill_south(chess.shift_down(bb))
+
+
+def pawn_attacks(pawns: chess.Bitboard, color: chess.Color) -> chess.Bitboard:
+    forward = chess.shift_up(pawns) if color == chess.WHITE else chess.shift_down(pawns)
+    return chess.shift_left(forward) | chess.shift_right(forward)
+
+
+def pawn_hash(board: chess.BaseBoard) -> int:
+    key = 0
+    for color in chess.COLORS:
+        keys = _PAWN_KEYS[color]
+        for square in chess.scan_forward(board.pawns & board.occupied_co[color]):
+            key ^= keys[square]
+    return key
+
+
+class PawnStructure(object):
+    """
+    every attribute apart from `key` is indexed by color and holds a bitboard of that color's pawns with the property
+    """
+    __slots__ = ['key', 'pawns', 'doubled', 'tripled', 'isolated', 'isolani', 'backward', 'connected', 'passed',
+                 'connected_passed', 'hanging', 'advanced']
+
+    def __init__(self, white_pawns: chess.Bitboard, black_pawns: chess.Bitboard, key: int = 0):
+        self.key = key
+        self.pawns = [black_pawns, white_pawns]
+        self.doubled = [0, 0]
+        self.tripled = [0, 0]
+        self.isolated = [0, 0]
+        self.isolani = [0, 0]
+        self.backward = [0, 0]
+        self.connected = [0, 0]
+        self.passed = [0, 0]
+        self.connected_passed = [0, 0]
+        self.hanging = [0, 0]
+        self.advanced = [0, 0]
+
+        for color in chess.COLORS:
+            own, enemy = self.pawns[color], self.pawns[not color]
+
+            self.doubled[color] = own & (fill_north(own << 8) | fill_south(own >> 8))
+            for file_mask in chess.BB_FILES:
+                if chess.popcount(own & file_mask) >= 3:
+                    self.tripled[color] |= own & file_mask
+
+            neighbours = adjacent_files(own)
+            self.isolated[color] = own & ~neighbours
+            self.isolani[color] = self.isolated[color] & chess.BB_FILE_D
+            self.connected[color] = own & neighbours
+
+            enemy_span = front_span(enemy, not color)
+            self.passed[color] = own & ~(enemy_span | chess.shift_left(enemy_span) | chess.shift_right(enemy_span))
+            self.connected_passed[color] = self.passed[color] & adjacent_files(self.passed[color])
+
+            # stop square covered by an enemy pawn and out of reach of every friendly pawn's attack span
+            stops = chess.shift_up(own) if color == chess.WHITE else chess.shift_down(own)
+            attack_span = front_span(pawn_attacks(own, color), color) | pawn_attacks(own, color)
+            backward_stops = stops & pawn_attacks(enemy, not color) & ~attack_span
+            self.backward[color] = chess.shift_down(backward_stops) if color == chess.WHITE \
+                else chess.shift_up(backward_stops)
+
+            # pawn islands exactly two files wide
+            files = [bool(own & file_mask) for file_mask in chess.BB_FILES]
+            for f in range(7):
+                if files[f] and files[f + 1] and (f == 0 or not files[f - 1]) and (f == 6 or not files[f + 2]):
+                    self.hanging[color] |= own & (chess.BB_FILES[f] | chess.BB_FILES[f + 1])
+
+            self.advanced[color] = own & BB_ADVANCED[color]
+
+    def squares(self, attribute: str, color: chess.Color) -> List[chess.Square]:
+        return list(chess.scan_forward(getattr(self, attribute)[color]))
+
+
+def pawn_structure(board: chess.BaseBoard) -> PawnStructure:
+    """
+    pawn structure of `board`, served from the cache when the same pawn skeleton has been seen before
+    """
+    key = pawn_hash(board)
+    structure = _CACHE.get(key)
+    if structure is None:
+        structure = PawnStructure(board.pawns & board.occupied_co[chess.WHITE],
+                                  board.pawns & board.occupied_co[chess.BLACK], key)
+        _CACHE.put(key, structure)
+    return structure
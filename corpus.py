@@ -0,0 +1,196 @@
+from typing import Any, Callable, IO, Iterable, Iterator, List, Optional, Sequence, Tuple
+import collections
+import concurrent.futures
+import io
+import json
+import os
+
+import chess
+import chess.pgn
+import numpy as np
+
+from board_analysis.exchange import Exchange
+from dataset import DEFAULT_SHARD_SIZE, ShardWriter
+from metaboard import MetaBoard
+from store import PositionStore, StoreSchema, pack, position_values
+
+
+"""
+streaming analysis of large pgn files. the parent process only splits the file into raw game texts (no parsing),
+groups them into chunks and keeps a bounded number of chunks in flight on a process pool. workers parse and replay
+their games through `MetaBoard` and send back finished jsonl lines (or packed records for a `PositionStore`),
+which are written out in input order.
+"""
+
+
+def iter_game_texts(stream: IO[str]) -> Iterator[str]:
+    """
+    split a pgn stream into the raw text of each game, one game in memory at a time
+    """
+    lines = []
+    in_movetext = False
+    for line in stream:
+        if line.startswith('[') and in_movetext:
+            yield ''.join(lines)
+            lines = []
+            in_movetext = False
+        if line.strip() and not line.startswith('['):
+            in_movetext = True
+        lines.append(line)
+    if any(line.strip() for line in lines):
+        yield ''.join(lines)
+
+
+def iter_chunks(game_texts: Iterable[str], chunk_size: int) -> Iterator[List[Tuple[int, str]]]:
+    chunk = []
+    for game_index, text in enumerate(game_texts):
+        chunk.append((game_index, text))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def jsonable(value: Any) -> Any:
+    """
+    property values as plain json: colors become 'white'/'black', squares their names, pieces their symbols
+    """
+    if isinstance(value, dict):
+        return {_json_key(k): jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [jsonable(v) for v in value]
+    if isinstance(value, chess.Piece):
+        return value.symbol()
+    if isinstance(value, chess.Move):
+        return value.uci()
+    if isinstance(value, Exchange):
+        return {'square': chess.SQUARE_NAMES[value.square], 'color': chess.COLOR_NAMES[value.color],
+                'gain': value.gain, 'sequence': [chess.SQUARE_NAMES[square] for square in value.sequence]}
+    return value
+
+
+def _json_key(key: Any) -> str:
+    if isinstance(key, bool):
+        return chess.COLOR_NAMES[key]
+    if isinstance(key, int):
+        return chess.SQUARE_NAMES[key]
+    return str(key)
+
+
+def analyze_game(game_index: int, text: str, properties: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    replay one game and return a jsonl line per ply with the properties of the position after the move
+    """
+    game = chess.pgn.read_game(io.StringIO(text))
+    if game is None:
+        return []
+
+    lines = []
+    board = game.board()
+    for ply, move in enumerate(game.mainline_moves(), start=1):
+        san = board.san(move)
+        board.push(move)
+        meta_board = MetaBoard('game', board.copy(stack=False))
+        if properties is None:
+            values = dict(meta_board.props)
+        else:
+            values = {name: meta_board.props[name] for name in properties}
+        lines.append(json.dumps({'game': game_index, 'ply': ply, 'move': move.uci(), 'san': san,
+                                 'fen': board.fen(), 'properties': jsonable(values)}))
+    return lines
+
+
+def analyze_chunk(chunk: List[Tuple[int, str]], properties: Optional[Sequence[str]] = None) -> List[str]:
+    lines = []
+    for game_index, text in chunk:
+        lines.extend(analyze_game(game_index, text, properties))
+    return lines
+
+
+def store_game(game_index: int, text: str, schema: StoreSchema) -> np.ndarray:
+    """
+    replay one game and return a store record per ply for the position after the move
+    """
+    game = chess.pgn.read_game(io.StringIO(text))
+    if game is None:
+        return pack(schema, [], [], [], [], [])
+
+    boards, values, keys, plies = [], [], [], []
+    board = game.board()
+    for ply, move in enumerate(game.mainline_moves(), start=1):
+        board.push(move)
+        meta_board = MetaBoard('game', board.copy(stack=False))
+        boards.append(meta_board.object_board)
+        values.append(position_values(meta_board.object_board, schema.properties, meta_board.props,
+                                      meta_board.props.ctx))
+        keys.append(meta_board.props.key)
+        plies.append(ply)
+    return pack(schema, boards, values, keys, [game_index] * len(boards), plies)
+
+
+def store_chunk(chunk: List[Tuple[int, str]], schema: StoreSchema) -> np.ndarray:
+    return np.concatenate([store_game(game_index, text, schema) for game_index, text in chunk])
+
+
+def _in_order(stream: IO[str], task: Callable, args: Tuple, workers: Optional[int], chunk_size: int,
+              max_pending: Optional[int]) -> Iterator[Any]:
+    """
+    results of `task(chunk, *args)` for every chunk of games in `stream`, in input order. at most `max_pending`
+    chunks (default: twice the number of workers) are submitted but not yet consumed, which bounds memory
+    regardless of file size.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque()
+        for chunk in iter_chunks(iter_game_texts(stream), chunk_size):
+            pending.append(pool.submit(task, chunk, *args))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def analyze_corpus(stream: IO[str], out: IO[str], properties: Optional[Sequence[str]] = None,
+                   workers: Optional[int] = None, chunk_size: int = 16, max_pending: Optional[int] = None) -> int:
+    """
+    analyze every game in `stream`, writing jsonl to `out` in input order. returns the number of lines written.
+    """
+    written = 0
+    for lines in _in_order(stream, analyze_chunk, (properties,), workers, chunk_size, max_pending):
+        written += _write(out, lines)
+    return written
+
+
+def store_corpus(stream: IO[str], store: PositionStore, workers: Optional[int] = None, chunk_size: int = 16,
+                 max_pending: Optional[int] = None) -> int:
+    """
+    analyze every game in `stream`, appending a record per position to `store` in input order. returns the number
+    of records appended.
+    """
+    written = 0
+    for records in _in_order(stream, store_chunk, (store.schema,), workers, chunk_size, max_pending):
+        store.append(records)
+        written += len(records)
+    return written
+
+
+def export_corpus(stream: IO[str], directory: str, schema: StoreSchema, workers: Optional[int] = None,
+                  chunk_size: int = 16, max_pending: Optional[int] = None,
+                  shard_size: int = DEFAULT_SHARD_SIZE) -> int:
+    """
+    analyze every game in `stream` into a training dataset in `directory` (see `dataset.py`), in input order.
+    returns the number of positions written.
+    """
+    with ShardWriter(directory, schema, shard_size) as writer:
+        for records in _in_order(stream, store_chunk, (schema,), workers, chunk_size, max_pending):
+            writer.add(records)
+        return len(writer)
+
+
+def _write(out: IO[str], lines: List[str]) -> int:
+    for line in lines:
+        out.write(line)
+        out.write('\n')
+    return len(lines)
@@ -0,0 +1,178 @@
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import json
+import os
+
+import numpy as np
+
+from store import PositionStore, StoreSchema
+
+
+"""
+training data for models over positions and their properties (e.g. reconstructing a board from its description),
+written once and then read without running any chess analysis. a dataset is a directory of fixed-size shards plus
+`dataset.json` (the schema and the size of every shard). every shard is a handful of .npy files, one per array, so
+`np.load(..., mmap_mode='r')` maps them instead of reading them (an .npz would be read whole):
+
+* `planes` – (N, 8, 8, 12) uint8 board planes, [rank, file, piece] with white pawn..king then black pawn..king
+* `props` – (N, words) uint64 property bitset, bit i is `bits[i]` of the schema (same layout as a `PositionStore`)
+* `features` – (N, columns) float32 feature vectors
+* `state` – side to move, castling and en passant as packed by `store`, `origin` – (game, ply) of every position
+
+the records come from a `PositionStore` or straight from a pgn through `corpus.export_corpus`.
+"""
+
+
+DEFAULT_SHARD_SIZE = 1 << 16
+
+ARRAYS = ('planes', 'props', 'features', 'state', 'origin')
+
+
+def board_planes(bitboards: np.ndarray) -> np.ndarray:
+    """
+    (N, 8) bitboards (see `board_analysis.features.bitboard_array`) -> (N, 8, 8, 12) uint8 one-hot planes
+    """
+    bitboards = np.ascontiguousarray(bitboards, dtype='<u8')
+    bits = np.unpackbits(bitboards.view(np.uint8), bitorder='little').reshape(-1, 8, 64)
+    pieces = bits[:, 2:]
+    planes = np.concatenate([pieces & bits[:, 0:1], pieces & bits[:, 1:2]], axis=1)
+    return np.ascontiguousarray(planes.transpose(0, 2, 1)).reshape(-1, 8, 8, 12)
+
+
+def _shard_arrays(records: np.ndarray) -> Dict[str, np.ndarray]:
+    return {
+        'planes': board_planes(records['board']),
+        'props': np.ascontiguousarray(records['props']),
+        'features': records['features'].astype(np.float32),
+        'state': np.ascontiguousarray(records['state']),
+        'origin': np.stack([records['game'], records['ply'].astype(np.uint32)], axis=1),
+    }
+
+
+def _path(directory: str, shard: int, array: str) -> str:
+    return os.path.join(directory, '{:05d}.{}.npy'.format(shard, array))
+
+
+class ShardWriter(object):
+    """
+    takes store records in any number of pieces and writes them out `shard_size` at a time. `close()` writes the
+    last, shorter shard and the manifest
+    """
+    def __init__(self, directory: str, schema: StoreSchema, shard_size: int = DEFAULT_SHARD_SIZE):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.schema = schema
+        self.shard_size = shard_size
+        self.shards: List[int] = []
+        self._pending: List[np.ndarray] = []
+        self._buffered = 0
+
+    def __enter__(self) -> 'ShardWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return sum(self.shards) + self._buffered
+
+    def add(self, records: np.ndarray) -> None:
+        self._pending.append(records)
+        self._buffered += len(records)
+        if self._buffered >= self.shard_size:
+            pending = np.concatenate(self._pending)
+            full = len(pending) - len(pending) % self.shard_size
+            for start in range(0, full, self.shard_size):
+                self._write(pending[start:start + self.shard_size])
+            self._pending = [pending[full:]]
+            self._buffered = len(pending) - full
+
+    def close(self) -> None:
+        if self._buffered:
+            self._write(np.concatenate(self._pending))
+        self._pending = []
+        self._buffered = 0
+        with open(os.path.join(self.directory, 'dataset.json'), 'w') as f:
+            json.dump({'schema': self.schema.to_json(), 'shard_size': self.shard_size, 'shards': self.shards}, f)
+
+    def _write(self, records: np.ndarray) -> None:
+        shard = len(self.shards)
+        for array, values in _shard_arrays(records).items():
+            np.save(_path(self.directory, shard, array), values)
+        self.shards.append(len(records))
+
+
+def export_store(store: PositionStore, directory: str, shard_size: int = DEFAULT_SHARD_SIZE) -> 'Dataset':
+    """
+    write every record of `store` to a dataset in `directory`, a shard at a time
+    """
+    records = store.records
+    with ShardWriter(directory, store.schema, shard_size) as writer:
+        for start in range(0, len(records), shard_size):
+            writer.add(np.array(records[start:start + shard_size]))
+    return Dataset(directory)
+
+
+class Dataset(object):
+    """
+    a dataset directory, every shard memory-mapped on first use. rows are numbered across shards in order
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, 'dataset.json')) as f:
+            meta = json.load(f)
+        self.schema = StoreSchema.from_json(meta['schema'])
+        self.shard_size: int = meta['shard_size']
+        self.shards: List[int] = meta['shards']
+        self._maps: Dict[Tuple[int, str], np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return sum(self.shards)
+
+    def array(self, shard: int, array: str) -> np.ndarray:
+        if (shard, array) not in self._maps:
+            self._maps[shard, array] = np.load(_path(self.directory, shard, array), mmap_mode='r')
+        return self._maps[shard, array]
+
+    def take(self, indices: Sequence[int], arrays: Sequence[str] = ('planes', 'props', 'features')
+             ) -> Dict[str, np.ndarray]:
+        """
+        rows `indices` (in that order) of each of `arrays`, copied out of the shards they live in
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        order = np.argsort(indices, kind='stable')
+        shards = indices[order] // self.shard_size
+        bounds = np.flatnonzero(np.diff(shards)) + 1
+        taken = {}
+        for array in arrays:
+            pieces = []
+            for rows in np.split(order, bounds):
+                if not len(rows):
+                    continue
+                shard = int(indices[rows[0]] // self.shard_size)
+                pieces.append(self.array(shard, array)[indices[rows] - shard * self.shard_size])
+            values = np.concatenate(pieces) if pieces else self.array(0, array)[:0]
+            out = np.empty_like(values)
+            out[order] = values
+            taken[array] = out
+        return taken
+
+    def labels(self, props: np.ndarray) -> np.ndarray:
+        """
+        packed `props` words -> (N, bits) uint8 0/1 per property bit
+        """
+        props = np.ascontiguousarray(props, dtype='<u8')
+        bits = np.unpackbits(props.view(np.uint8), axis=1, bitorder='little')
+        return bits[:, :len(self.schema.bits)]
+
+    def batches(self, batch_size: int, shuffle: bool = True, seed: Optional[int] = None,
+                arrays: Sequence[str] = ('planes', 'props', 'features')) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        the whole dataset in batches of `batch_size` rows, in a random order (by index, nothing is loaded to
+        shuffle) unless `shuffle` is False
+        """
+        if shuffle:
+            indices = np.random.default_rng(seed).permutation(len(self))
+        else:
+            indices = np.arange(len(self))
+        for start in range(0, len(indices), batch_size):
+            yield self.take(indices[start:start + batch_size], arrays)
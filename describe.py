@@ -0,0 +1,289 @@
+from typing import Dict, IO, Iterator, List, Optional, Sequence, Tuple, Union
+import argparse
+import string
+import sys
+
+import numpy as np
+
+from cache import LRUCache
+from store import PositionStore, StoreSchema
+
+
+"""
+the frontend of `properties`: turns property results into prose. it only reads precomputed results – the property
+bits and feature columns of `PositionStore` records or `dataset` shards – and never calls into `properties`, so
+describing a whole corpus costs little more than reading it.
+
+a template is a plain format string per property. its fields are
+
+* `{side}` / `{other}` – 'White' / 'Black' for the bit of a colored property ('isolani.white' -> side is White)
+* any feature column (`{material_balance}`, `{open_files}`), and `{<column>_side}` / `{<column>_other}` for the
+  white/black pair of a feature column (`{space_side}` is `space_white` in the sentence about White)
+
+templates are compiled once per schema into a `Template` per bit: literal text and field lookups are resolved up
+front, and a template without feature fields is a finished string. the templates of a pattern of set bits are joined
+into a plan once (cached), so rendering a position is a lookup of its set bits and at most one join. properties
+mapped to None (feature vectors, undecided values) are not described; properties without a template get a plain one
+made from their name.
+"""
+
+
+TEMPLATES: Dict[str, Optional[str]] = {
+    'advanced_pawns': 'There are pawns on the far side of the board.',
+    'advantage': '{side} has the advantage.',
+    'alekhine_gun': "{side} has lined up Alekhine's gun.",
+    'arabian_mate': 'Arabian mate.',
+    'back_rank_mate': 'Back-rank mate.',
+    'back_rank_weakness': '{side} has a weak back rank.',
+    'backward_pawns': '{side} has a backward pawn.',
+    'bare_king': '{side} is down to a bare king.',
+    'battery': '{side} has a battery.',
+    'battery_king': "{side} has a battery aimed at {other}'s king.",
+    'bind': '{side} has a bind.',
+    'bishop_pair': '{side} has the bishop pair.',
+    'blockade': '{side} blockades a pawn.',
+    'bridge': '{side} can build a bridge for the king.',
+    'closed': 'The position is closed, with {locked_pawns} locked pawns.',
+    'closed_feature_vector': None,
+    'connected_passed_pawns': '{side} has connected passed pawns.',
+    'connected_pawns': '{side} has connected pawns.',
+    'control_of_center': '{side} controls the center ({center_pawn_control_side} pawn attacks on it).',
+    'control_of_center_feature_vector': None,
+    'cramped': 'The position is cramped.',
+    'cramped_feature_vector': None,
+    'doubled_pawns': '{side} has doubled pawns.',
+    'edge': None,
+    'en_prise': '{side} has a piece en prise.',
+    'exposed_king': "{side}'s king is exposed.",
+    'family_fork': 'A family fork is on the board.',
+    'fianchetto_squares': 'A bishop is fianchettoed.',
+    'fortress': 'The weaker side has a fortress.',
+    'greek_gift_sacrifice': 'The Greek gift sacrifice is on.',
+    'hypermodern_position': 'The center is controlled from the flanks.',
+    'imbalance_feature_vector': None,
+    'initiative': '{side} has the initiative.',
+    'isolani': '{side} has an isolani.',
+    'isolated_pawn': '{side} has an isolated pawn.',
+    'lucena_position': 'This is a Lucena position.',
+    'majority': '{side} has a pawn majority.',
+    'maroczy_bind': 'A Maroczy bind is on the board.',
+    'open_position': 'The position is open, with {open_files} open files.',
+    'open_position_feature_vector': None,
+    'passed_pawns': '{side} has a passed pawn.',
+    'poisoned_pawn': '{side} has a poisoned pawn.',
+    'tension': 'There is tension: pieces can be exchanged.',
+    'tripled_pawns': '{side} has tripled pawns.',
+    'vanished_center': 'The center pawns have vanished.',
+    'wrong_rook_pawn': '{side} has the wrong rook pawn.',
+    'zugzwang': '{side} is in zugzwang.',
+}
+
+_SIDES = {'white': ('White', 'Black'), 'black': ('Black', 'White')}
+
+_FORMATTER = string.Formatter()
+
+
+def _default_template(name: str, colored: bool) -> str:
+    words = name.replace('_', ' ')
+    return '{side}: ' + words + '.' if colored else words[0].upper() + words[1:] + '.'
+
+
+class Template(object):
+    """
+    a template compiled for one bit: `parts` are literal strings and (feature column, format spec) pairs. `text` is
+    the finished sentence when there are no feature fields
+    """
+    def __init__(self, parts: List, text: Optional[str]):
+        self.parts = parts
+        self.text = text
+
+    def render(self, features: Sequence[float]) -> str:
+        if self.text is not None:
+            return self.text
+        return ''.join(part if isinstance(part, str) else _format(features[part[0]], part[1]) for part in self.parts)
+
+
+def _format(value: float, spec: str) -> str:
+    if spec:
+        return format(value, spec)
+    value = float(value)
+    return str(int(value)) if value.is_integer() else '{:g}'.format(value)
+
+
+def compile_template(text: str, schema: StoreSchema, color: Optional[str] = None) -> Template:
+    """
+    `text` for the bit of `schema` with `color` ('white', 'black' or None). raises ValueError for an unknown field
+    """
+    fields = {}
+    if color is not None:
+        fields['side'], fields['other'] = _SIDES[color]
+    other = {'white': 'black', 'black': 'white'}.get(color)
+    parts: List = []
+    for literal, field, spec, conversion in _FORMATTER.parse(text):
+        if literal:
+            parts.append(literal)
+        if field is None:
+            continue
+        if field in fields:
+            parts.append(format(fields[field], spec or ''))
+            continue
+        column = field
+        if color is not None and field.endswith('_side'):
+            column = field[:-len('side')] + color
+        elif color is not None and field.endswith('_other'):
+            column = field[:-len('other')] + other
+        if column not in schema.features:
+            raise ValueError('unknown field {{{}}} in template {!r}'.format(field, text))
+        parts.append((schema.feature(column), spec or ''))
+    if all(isinstance(part, str) for part in parts):
+        return Template(parts, ''.join(parts))
+    return Template(parts, None)
+
+
+class Describer(object):
+    """
+    renders positions of one schema. `templates` override `TEMPLATES` by property name. with `changes_only`, a
+    position of a game only mentions the bits that were not set one ply earlier
+    """
+    def __init__(self, schema: StoreSchema, templates: Optional[Dict[str, Optional[str]]] = None,
+                 changes_only: bool = False, plan_cache_size: int = 1 << 16):
+        self.schema = schema
+        self.changes_only = changes_only
+        merged = dict(TEMPLATES, **(templates or {}))
+        self.templates: List[Optional[Template]] = []
+        for bit in schema.bits:
+            name, _, color = bit.partition('.')
+            text = merged[name] if name in merged else _default_template(name, bool(color))
+            self.templates.append(None if text is None else compile_template(text, schema, color or None))
+        self._plans = LRUCache(plan_cache_size)
+
+    def plan(self, columns: Sequence[int]) -> Union[str, Tuple]:
+        """
+        the description for a set of bit columns: a finished string, or literal strings and `Template`s to render
+        with the position's features. plans are cached per pattern, since most positions share their set bits with
+        many others
+        """
+        key = tuple(columns)
+        plan = self._plans.get(key)
+        if plan is None:
+            pieces: List = []
+            for column in key:
+                template = self.templates[column]
+                if template is None:
+                    continue
+                if pieces:
+                    pieces.append(' ')
+                pieces.append(template.text if template.text is not None else template)
+            merged: List = []
+            for piece in pieces:
+                if isinstance(piece, str) and merged and isinstance(merged[-1], str):
+                    merged[-1] += piece
+                else:
+                    merged.append(piece)
+            if not merged:
+                plan = ''
+            elif len(merged) == 1 and isinstance(merged[0], str):
+                plan = merged[0]
+            else:
+                plan = tuple(merged)
+            self._plans.put(key, plan)
+        return plan
+
+    def sentences(self, props: np.ndarray, features: np.ndarray, games: Optional[np.ndarray] = None,
+                  previous: Optional[np.ndarray] = None) -> Iterator[str]:
+        """
+        a description per row of `props` (packed words) and `features`. with `changes_only`, `games` (the game of
+        every row, in play order) and the packed words of the row before the first, `previous`, say what to compare
+        against
+        """
+        props = np.ascontiguousarray(props, dtype='<u8')
+        bits = np.unpackbits(props.view(np.uint8), axis=1, bitorder='little')[:, :len(self.schema.bits)]
+        if self.changes_only:
+            before = np.zeros_like(bits)
+            before[1:] = bits[:-1]
+            if previous is not None:
+                previous = np.ascontiguousarray(previous, dtype='<u8')
+                before[0] = np.unpackbits(previous.view(np.uint8), bitorder='little')[:len(self.schema.bits)]
+            if games is not None:
+                before[1:][games[1:] != games[:-1]] = 0
+            bits = bits & ~before
+        rows, columns = np.nonzero(bits)
+        bounds = np.searchsorted(rows, np.arange(len(bits) + 1)).tolist()
+        columns = columns.tolist()
+        for row in range(len(bits)):
+            plan = self.plan(columns[bounds[row]:bounds[row + 1]])
+            if isinstance(plan, str):
+                yield plan
+            else:
+                row_features = features[row]
+                yield ''.join(part if isinstance(part, str) else part.render(row_features) for part in plan)
+
+    def lines(self, records: np.ndarray, chunk_size: int = 1 << 16) -> Iterator[Tuple[int, int, str]]:
+        """
+        (game, ply, description) for every store record, a chunk at a time
+        """
+        for start in range(0, len(records), chunk_size):
+            chunk = records[start:start + chunk_size]
+            games = np.asarray(chunk['game'])
+            previous = None
+            if start and self.changes_only and records[start - 1]['game'] == games[0]:
+                previous = records[start - 1]['props']
+            texts = self.sentences(chunk['props'], np.asarray(chunk['features'], dtype=np.float32), games,
+                                   previous)
+            for game, ply, text in zip(games.tolist(), chunk['ply'].tolist(), texts):
+                yield game, ply, text
+
+
+def describe_game(store: PositionStore, game: int, describer: Optional[Describer] = None) -> List[Tuple[int, str]]:
+    """
+    (ply, description) of every position of `game` in `store`
+    """
+    describer = describer or Describer(store.schema)
+    records = store.records
+    ids = np.flatnonzero(records['game'] == game)
+    return [(ply, text) for _, ply, text in describer.lines(records[ids])]
+
+
+def describe_store(store: PositionStore, out: IO[str], describer: Optional[Describer] = None,
+                   chunk_size: int = 1 << 16) -> int:
+    """
+    write 'game<TAB>ply<TAB>description' for every position of `store` to `out`. returns the number of lines
+    """
+    describer = describer or Describer(store.schema)
+    written = 0
+    buffer = []
+    for game, ply, text in describer.lines(store.records, chunk_size):
+        buffer.append('{}\t{}\t{}\n'.format(game, ply, text))
+        if len(buffer) == chunk_size:
+            out.write(''.join(buffer))
+            written += len(buffer)
+            buffer = []
+    out.write(''.join(buffer))
+    return written + len(buffer)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='describe the positions of a position store in words')
+    parser.add_argument('store', help='position store written by main.py --store')
+    parser.add_argument('-g', '--game', type=int, help='only this game')
+    parser.add_argument('-c', '--changes', action='store_true', help='only mention what changed since the last ply')
+    parser.add_argument('-o', '--output', default='-', help="output file, '-' for stdout")
+    args = parser.parse_args(argv)
+
+    store = PositionStore(args.store)
+    describer = Describer(store.schema, changes_only=args.changes)
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        if args.game is not None:
+            for ply, text in describe_game(store, args.game, describer):
+                out.write('{}\t{}\n'.format(ply, text))
+        else:
+            describe_store(store, out, describer)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
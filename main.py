@@ -1,23 +1,45 @@
-import chess
-import chess.pgn
-from io import StringIO
+import argparse
+import sys
 
-from properties import alekhine_gun, forced_mate_in_n
+from corpus import analyze_corpus, export_corpus, store_corpus
+from dataset import DEFAULT_SHARD_SIZE
+from store import PositionStore, default_schema
 
 
-board_ = chess.Board()
-board_.push_san('e4')
-board_.push_san('Nc6')
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='analyze every position of a pgn file, writing jsonl')
+    parser.add_argument('pgn', help='pgn file to analyze')
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument('-o', '--output', help="jsonl output file, '-' for stdout")
+    output.add_argument('--store', help='append packed records to this position store instead (see store.py)')
+    output.add_argument('--dataset', help='write a sharded training dataset to this directory instead (see dataset.py)')
+    parser.add_argument('-p', '--properties', help='comma separated property names (default: all position properties)')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='worker processes (default: cpu count)')
+    parser.add_argument('--chunk-size', type=int, default=16, help='games per task sent to a worker')
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE, help='positions per dataset shard')
+    args = parser.parse_args(argv)
 
-print(board_)
-#print(back_rank_weakness(board_, chess.WHITE))
-pm = board_.piece_map()
-pm = {k: v.symbol() for k, v in pm.items()}
+    properties = args.properties.split(',') if args.properties else None
+    if args.store:
+        store = PositionStore(args.store, default_schema(properties))
+        with open(args.pgn, 'r', errors='replace') as stream:
+            store_corpus(stream, store, workers=args.workers, chunk_size=args.chunk_size)
+        return 0
+    if args.dataset:
+        with open(args.pgn, 'r', errors='replace') as stream:
+            export_corpus(stream, args.dataset, default_schema(properties), workers=args.workers,
+                          chunk_size=args.chunk_size, shard_size=args.shard_size)
+        return 0
 
-print(alekhine_gun(board_, chess.WHITE))
-board1 = chess.Board()
-board1.set_board_fen('4r1k1/2rq1npp/2p1p3/3p4/pP1P4/P1R1PPP1/2R2KBP/2Q5')
-print('\n\n')
-print(board1)
-print(alekhine_gun(board1, chess.WHITE))
-#print(forced_mate_in_n(board1, chess.BLACK, 5))
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        with open(args.pgn, 'r', errors='replace') as stream:
+            analyze_corpus(stream, out, properties, workers=args.workers, chunk_size=args.chunk_size)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,26 +1,122 @@
+from typing import Any, Dict, Iterable, Iterator, Optional
+import collections.abc
+
 import chess
 import properties
+from board_analysis.attacks import AttackTable
+from board_analysis.context import PositionContext
+from cache import LRUCache
+from scheduler import binding, evaluate
+from search.transposition import zobrist_hash
 
 
 ANALYSIS_TYPES = ['snapshot', 'move', 'game', 'session']
 PROPS = properties.__all__
 
+_MISSING = object()
+
+def analyze(board: chess.Board, properties: Iterable[str] = None,
+            ctx: Optional[PositionContext] = None) -> Dict[str, Any]:
+    """
+    evaluate position-level properties of `board`, all sharing one `PositionContext` and computed in dependency order
+    (see `scheduler`).
+
+    properties taking a `color` are evaluated for both players and reported as `{chess.WHITE: ..., chess.BLACK: ...}`.
+    with `properties=None` every property in `PROPS` that only needs the position is evaluated; asking explicitly for
+    one that needs a move, square or piece raises ValueError.
+    """
+    if properties is None:
+        return evaluate(board, PROPS, ctx, skip_unbound=True)
+    return evaluate(board, properties, ctx)
+
+
+PROPERTY_CACHE = LRUCache(maxsize=1 << 16)
+
+
+def set_property_cache_size(maxsize: int) -> None:
+    """
+    resize the process-wide property cache shared by every `MetaBoard`
+    """
+    PROPERTY_CACHE.resize(maxsize)
+
 
 class Metadata:
     def __init__(self):
         self.property_list = []
 
 
+class PropertyMap(collections.abc.Mapping):
+    """
+    read-only view of a position's properties. each property is computed on first access and memoized, both on this
+    map and in the process-wide `PROPERTY_CACHE` keyed by (zobrist hash, property name), so a transposition reached
+    in another game is answered without recomputing.
+
+    values are shared between boards through the cache and must not be mutated.
+    """
+    def __init__(self, board: chess.Board):
+        self.board = board
+        self.values = {}
+        self._ctx = None
+        self._key = None
+
+    @property
+    def ctx(self) -> PositionContext:
+        if self._ctx is None:
+            self._ctx = PositionContext(self.board)
+        return self._ctx
+
+    @property
+    def key(self) -> int:
+        if self._key is None:
+            self._key = zobrist_hash(self.board)
+        return self._key
+
+    def __getitem__(self, name: str) -> Any:
+        try:
+            return self.values[name]
+        except KeyError:
+            pass
+        if name not in PROPS:
+            raise KeyError(name)
+
+        cache_key = (self.key, name)
+        value = PROPERTY_CACHE.get(cache_key, _MISSING)
+        if value is _MISSING:
+            value = analyze(self.board, [name], self.ctx)[name]
+            PROPERTY_CACHE.put(cache_key, value)
+        self.values[name] = value
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name in PROPS if binding(name) is not None)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
 class MetaBoard(chess.Board):
+    """
+    `props` describes `object_board` as it was when a property was first read, so the board shouldn't be moved on
+    after construction
+    """
     def __init__(self, analysis_type, board=None):
         assert analysis_type in ANALYSIS_TYPES
 
         if board:
+            chess.Board.__init__(self, board.fen())
             self.object_board = board
         else:
-            self.object_board = chess.Board.__init__(self)
+            chess.Board.__init__(self)
+            self.object_board = self
 
         self.analysis_type = analysis_type
         self.metadata = Metadata()
-        self.pm = self.object_board.piece_map()
-        self.props = {p: None for p in PROPS}
+        self.props = PropertyMap(self.object_board)
+
+    @property
+    def pm(self) -> Dict[chess.Square, chess.Piece]:
+        return self.props.ctx.piece_map
+
+    @property
+    def attack_table(self) -> AttackTable:
+        return self.props.ctx.attack_table
@@ -0,0 +1,43 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import chess
+
+from board_analysis.context import PositionContext
+from metaboard import analyze
+from move_analysis.moves import MoveAnalysis
+from move_analysis.window import SequenceTrack, Window
+from registry import spec
+
+
+"""
+per-ply analysis of a whole game on one board. after the first position only the properties whose declared inputs
+(see `registry.register`) the move touched are evaluated again; everything else is carried over from the previous
+ply. sequence properties are evaluated over sliding windows of plies by `move_analysis.window`.
+"""
+
+
+def analyze_moves(board: chess.Board, moves: Iterable[Union[chess.Move, str]],
+                  properties: Optional[Sequence[str]] = None) -> Iterator[Tuple[MoveAnalysis, Dict[str, Any]]]:
+    """
+    play `moves` on `board` one at a time, yielding the `MoveAnalysis` of each move and the position properties
+    after it. `board` is left at the final position.
+    """
+    values = analyze(board, properties)
+    names = list(values)
+
+    for move in moves:
+        move_analysis = MoveAnalysis(board, move)
+        board.push(move_analysis.move)
+        dirty = [name for name in names if move_analysis.delta.touches(spec(name).inputs)]
+        if dirty:
+            values.update(analyze(board, dirty, PositionContext(board)))
+        yield move_analysis, dict(values)
+
+
+def analyze_sequences(board: chess.Board, moves: Iterable[Union[chess.Move, str]], width: int,
+                      properties: Optional[Sequence[str]] = None) -> List[Tuple[Window, Dict[str, bool]]]:
+    """
+    the sequence properties (all of them by default) of every window of `width` plies of `moves` played from `board`,
+    which is left as it was
+    """
+    return list(SequenceTrack(board, moves).slide(width, properties))
@@ -0,0 +1,178 @@
+from typing import Dict, List, Optional, Union
+
+import chess
+
+from board_analysis.attacks import slider_attacks
+from move_analysis.moves import PIECE_VALUES
+
+
+"""
+tactical motifs of every legal move of a position in one pass. each move is pushed and popped once and its motifs
+come back as a bitset (`FORK | PIN | ...`); everything that doesn't depend on the move (the attacks of our line
+pieces, whether we are in check) is worked out once per position, and pins and skewers are read off a precomputed
+table of the squares lying beyond a target on the same line.
+"""
+
+
+MOTIFS = ('fork', 'family_fork', 'skewer', 'pin', 'absolute_pin', 'discovered_attack', 'discovered_check',
+          'double_attack', 'double_check', 'cross_check', 'windmill')
+
+FORK = 1 << 0
+FAMILY_FORK = 1 << 1
+SKEWER = 1 << 2
+PIN = 1 << 3
+ABSOLUTE_PIN = 1 << 4
+DISCOVERED_ATTACK = 1 << 5
+DISCOVERED_CHECK = 1 << 6
+DOUBLE_ATTACK = 1 << 7
+DOUBLE_CHECK = 1 << 8
+CROSS_CHECK = 1 << 9
+# one step of a windmill: a capture that uncovers check
+WINDMILL = 1 << 10
+
+MOTIF_BITS = {name: 1 << i for i, name in enumerate(MOTIFS)}
+
+_DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+
+def _beyond_table() -> List[List[chess.Bitboard]]:
+    """
+    `table[a][b]`: squares on the line from `a` through `b` that lie past `b`, 0 if `a` and `b` aren't aligned
+    """
+    table = [[0] * 64 for _ in range(64)]
+    for a in chess.SQUARES:
+        for df, dr in _DIRECTIONS:
+            line = []
+            f, r = chess.square_file(a) + df, chess.square_rank(a) + dr
+            while 0 <= f < 8 and 0 <= r < 8:
+                line.append(chess.square(f, r))
+                f, r = f + df, r + dr
+            for i, b in enumerate(line):
+                for c in line[i + 1:]:
+                    table[a][b] |= chess.BB_SQUARES[c]
+    return table
+
+
+BB_BEYOND = _beyond_table()
+
+
+def motif_names(bits: int) -> List[str]:
+    return [name for i, name in enumerate(MOTIFS) if bits >> i & 1]
+
+
+class MotifDetector(object):
+    """
+    motifs of moves in one position. `attacks_from` can be handed over from a `PositionContext` to skip
+    recomputing attack masks
+    """
+    def __init__(self, board: chess.Board, attacks_from: Optional[Dict[chess.Square, chess.Bitboard]] = None):
+        self.board = board
+        self.color = board.turn
+        self.was_check = board.is_check()
+        own = board.occupied_co[self.color]
+        self.sliders = (board.bishops | board.rooks | board.queens) & own
+        if attacks_from is None:
+            attacks_from = {square: board.attacks_mask(square) for square in chess.scan_forward(own)}
+        self.attacks_before = attacks_from
+
+    def detect(self, move: Union[chess.Move, str]) -> int:
+        if isinstance(move, str):
+            move = chess.Move.from_uci(move)
+        board = self.board
+        color = self.color
+        from_square, to_square = move.from_square, move.to_square
+        capture = board.is_capture(move)
+        moved = chess.BB_SQUARES[to_square]
+        if board.is_castling(move):
+            # the rook gives a castling check, not a discovered one
+            rank = chess.square_rank(from_square)
+            moved |= chess.BB_SQUARES[chess.square(5 if board.is_kingside_castling(move) else 3, rank)]
+        # line pieces the move may uncover
+        uncovered = [square for square in chess.scan_forward(self.sliders & ~chess.BB_SQUARES[from_square])
+                     if chess.BB_RAYS[square][from_square]]
+
+        board.push(move)
+        try:
+            return self._motifs(board, color, from_square, to_square, moved, capture, uncovered)
+        finally:
+            board.pop()
+
+    def detect_all(self, moves=None) -> Dict[chess.Move, int]:
+        """
+        motif bitset of every move in `moves` (all legal moves by default)
+        """
+        moves = self.board.generate_legal_moves() if moves is None else moves
+        return {move: self.detect(move) for move in moves}
+
+    def _motifs(self, board: chess.Board, color: chess.Color, from_square: chess.Square, to_square: chess.Square,
+                moved: chess.Bitboard, capture: bool, uncovered: List[chess.Square]) -> int:
+        bits = 0
+        enemy = board.occupied_co[not color]
+        enemy_king = board.king(not color)
+        king_bb = chess.BB_SQUARES[enemy_king] if enemy_king is not None else 0
+        piece_type = board.piece_type_at(to_square)
+        value = PIECE_VALUES[piece_type]
+
+        checkers = board.checkers_mask()
+        if checkers:
+            if checkers & ~moved:
+                bits |= DISCOVERED_CHECK
+                if capture:
+                    bits |= WINDMILL
+            if checkers & (checkers - 1):
+                bits |= DOUBLE_CHECK
+            if self.was_check:
+                bits |= CROSS_CHECK
+
+        attacks = board.attacks_mask(to_square)
+        targets = attacks & enemy
+        new_targets = targets & ~self.attacks_before.get(from_square, 0)
+
+        # fork: two or more targets worth more than the moved piece or undefended, a check counting as one
+        forked = 0
+        for square in chess.scan_forward(targets & ~king_bb):
+            if PIECE_VALUES[board.piece_type_at(square)] > value or not board.is_attacked_by(not color, square):
+                forked += 1
+        if targets & king_bb:
+            forked += 1
+            if piece_type == chess.KNIGHT and targets & board.queens:
+                bits |= FAMILY_FORK
+        if forked >= 2:
+            bits |= FORK
+
+        if piece_type in (chess.BISHOP, chess.ROOK, chess.QUEEN):
+            occupied = board.occupied
+            for square in chess.scan_forward(targets):
+                behind = slider_attacks(piece_type, to_square, occupied & ~chess.BB_SQUARES[square]) & \
+                    BB_BEYOND[to_square][square] & enemy
+                if not behind:
+                    continue
+                behind_square = chess.lsb(behind)
+                front = PIECE_VALUES[board.piece_type_at(square)]
+                back = PIECE_VALUES[board.piece_type_at(behind_square)]
+                if behind & king_bb:
+                    bits |= PIN | ABSOLUTE_PIN
+                elif back > front:
+                    bits |= PIN
+                elif front > back and (back > value or not board.is_attacked_by(not color, behind_square)):
+                    bits |= SKEWER
+
+        discovered = 0
+        for square in uncovered:
+            discovered |= board.attacks_mask(square) & ~self.attacks_before[square] & enemy
+        if discovered & ~king_bb:
+            bits |= DISCOVERED_ATTACK
+        if chess.popcount(new_targets | discovered) >= 2:
+            bits |= DOUBLE_ATTACK
+        return bits
+
+
+def motifs(board: chess.Board, move: Union[chess.Move, str]) -> int:
+    return MotifDetector(board).detect(move)
+
+
+def all_motifs(board: chess.Board) -> Dict[chess.Move, int]:
+    """
+    motif bitset of every legal move of `board`
+    """
+    return MotifDetector(board).detect_all()
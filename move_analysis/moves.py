@@ -1,26 +1,131 @@
+from typing import FrozenSet, Optional, Union
+
 import chess
 
 
+PIECE_VALUES = {chess.PAWN: 1, chess.KNIGHT: 3, chess.BISHOP: 3, chess.ROOK: 5, chess.QUEEN: 9, chess.KING: 100}
+
+
+class MoveDelta(object):
+    """
+    what a move changes on the board: the piece types that appeared on or disappeared from the squares it touched,
+    and whether material changed. `touches` decides from these which properties need re-evaluating
+    """
+    def __init__(self, board: chess.Board, move: chess.Move):
+        moved = board.piece_type_at(move.from_square)
+        captured = board.piece_type_at(move.to_square) if not board.is_en_passant(move) else chess.PAWN
+        if board.is_castling(move):
+            captured = None
+        piece_types = {moved}
+        if captured:
+            piece_types.add(captured)
+        if move.promotion:
+            piece_types.add(move.promotion)
+        if board.is_castling(move):
+            piece_types.add(chess.ROOK)
+
+        self.piece_types: FrozenSet[chess.PieceType] = frozenset(piece_types)
+        self.captured: Optional[chess.PieceType] = captured
+        self.promotion: Optional[chess.PieceType] = move.promotion
+        self.material_changed = bool(captured or move.promotion)
+
+    def touches(self, inputs) -> bool:
+        """
+        does the move change anything in `inputs`? piece types, plus 'material' for captures/promotions.
+        `None` means the inputs are unknown, so the answer is always yes
+        """
+        if inputs is None:
+            return True
+        if 'material' in inputs and self.material_changed:
+            return True
+        return bool(self.piece_types.intersection(inputs))
+
+
 class MoveAnalysis(object):
-    def __init__(self, board: chess.Board, move):
+    """
+    everything about one move, taken from the position before and after it. the board is pushed and popped once in
+    the constructor and comes back unchanged; only bitboards and squares are kept, not board copies. tactical motifs
+    (forks, discovered and double checks, ...) are in `move_analysis.motifs`.
+    """
+    def __init__(self, board: chess.Board, move: Union[chess.Move, str]):
+        if isinstance(move, str):
+            move = chess.Move.from_uci(move)
         self.move = move
-        self.board = board.push_uci(move)
+        self.board = board
+        self.color = board.turn
+        self.piece = board.piece_at(move.from_square)
+        self.piece_type = self.piece.piece_type
+        self.delta = MoveDelta(board, move)
+        self.was_check = board.is_check()
+        self.own_king = board.king(self.color)
+        self.attacks_before = board.attacks_mask(move.from_square)
+        self.castling = board.is_castling(move)
+
+        board.push(move)
+        try:
+            self.piece_after = board.piece_type_at(move.to_square)
+            self.enemy_king = board.king(not self.color)
+            self.attacks_after = board.attacks_mask(move.to_square)
+            self.checkers = board.checkers_mask()
+            self.occupied = board.occupied
+            self.enemy = board.occupied_co[not self.color]
+            self.is_checkmate = board.is_checkmate() if self.checkers else False
+        finally:
+            board.pop()
+
+    @property
+    def develops_piece(self) -> bool:
         """
-        if isinstance(move, chess.Move.from_uci()):
-            self.piece = board.piece_at(move[0:2])
-            self.piece_type = board.piece_type_at(chess.E8, move[0:2])
-        if isinstance(move, chess.Move):
-            self.piece = move
-            """
+        knight or bishop leaving its home rank
+        """
+        home_rank = 0 if self.color == chess.WHITE else 7
+        return self.piece_type in (chess.KNIGHT, chess.BISHOP) \
+            and chess.square_rank(self.move.from_square) == home_rank \
+            and chess.square_rank(self.move.to_square) != home_rank
+
+    @property
+    def gives_check(self) -> bool:
+        return bool(self.checkers)
+
+    def _piece_type_after(self, square: chess.Square) -> chess.PieceType:
+        # only the moved piece and the captured piece differ from the board before the move
+        return self.board.piece_type_at(square)
+
+    def kick(self, square: chess.Square) -> bool:
+        """
+        the move attacks the enemy piece on `square` with a cheaper piece, so it has to move
+        """
+        if not (self.attacks_after & self.enemy & chess.BB_SQUARES[square]):
+            return False
+        return PIECE_VALUES[self.piece_after] < PIECE_VALUES[self._piece_type_after(square)]
 
     @property
-    def develops_piece(self, move) -> bool:
-        pass
-
-    def pins_piece(self):
-        b = self.board
-        print(b)
-        moves = b.generate_legal_moves()
-        attackers_ = chess.Board.attackers(color=WHITE, square=chess.Move.from_uci(self.move).to_square)
-        relevant_moves = [x for x in moves if x == chess.Move.from_uci(self.move).to_square]
-        return relevant_moves
+    def luft(self) -> bool:
+        """
+        pawn move on one of the three files around a back-rank king, opening a flight square for it
+        """
+        if self.piece_type != chess.PAWN or self.own_king is None:
+            return False
+        home_rank = 0 if self.color == chess.WHITE else 7
+        shelter_rank = 1 if self.color == chess.WHITE else 6
+        return chess.square_rank(self.own_king) == home_rank \
+            and chess.square_rank(self.move.from_square) == shelter_rank \
+            and abs(chess.square_file(self.move.from_square) - chess.square_file(self.own_king)) <= 1
+
+    def pins_piece(self) -> Optional[chess.Square]:
+        """
+        square of the enemy piece the moved piece pins against its king, if any
+        """
+        to_square = self.move.to_square
+        if self.piece_after not in (chess.BISHOP, chess.ROOK, chess.QUEEN) or self.enemy_king is None:
+            return None
+        if not chess.BB_RAYS[to_square][self.enemy_king]:
+            return None
+        diagonal = chess.square_rank(to_square) != chess.square_rank(self.enemy_king) and \
+            chess.square_file(to_square) != chess.square_file(self.enemy_king)
+        if (diagonal and self.piece_after == chess.ROOK) or (not diagonal and self.piece_after == chess.BISHOP):
+            return None
+        between = chess.between(to_square, self.enemy_king) & self.occupied
+        if chess.popcount(between) != 1 or not between & self.enemy:
+            return None
+        return chess.lsb(between)
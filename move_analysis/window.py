@@ -0,0 +1,345 @@
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import chess
+
+from board_analysis.king_zone import BB_KING_ZONE
+from move_analysis import motifs
+from move_analysis.moves import PIECE_VALUES
+
+
+"""
+sequence properties over windows of a game ('game' and 'session' analysis). `SequenceTrack` replays the moves once,
+recording a few numbers per ply (checks, captures, king moves, windmill steps, ...) and per position (king squares,
+material balance, king danger, piece activity), and keeps prefix sums of the per-ply counts and a sparse table of the
+balance. any window `[start, stop)` of plies is then answered in O(1): counts are differences of prefix sums, king
+displacement compares two stored squares, and the lowest balance is two table lookups. sliding a window of fixed
+width over a game is linear in its length, whatever the properties asked for.
+
+every property is judged from the side to move at the start of the window.
+"""
+
+
+_VALUES = dict(PIECE_VALUES)
+_VALUES[chess.KING] = 0
+
+# per-ply counts kept as prefix sums, separately for each color
+COUNTS = ('moves', 'checks', 'captures', 'captured', 'forcing', 'king_moves', 'windmills', 'triangles')
+
+
+def _balance(board: chess.BaseBoard) -> int:
+    """
+    white's material minus black's
+    """
+    balance = 0
+    for piece_type in chess.PIECE_TYPES[:-1]:
+        bb = board.pieces_mask(piece_type, chess.WHITE), board.pieces_mask(piece_type, chess.BLACK)
+        balance += _VALUES[piece_type] * (chess.popcount(bb[0]) - chess.popcount(bb[1]))
+    return balance
+
+
+def _total(board: chess.BaseBoard) -> int:
+    return sum(_VALUES[piece_type] * chess.popcount(board.pieces_mask(piece_type, color))
+               for piece_type in chess.PIECE_TYPES[:-1] for color in chess.COLORS)
+
+
+def _danger(board: chess.Board, color: chess.Color) -> int:
+    """
+    squares around (and including) `color`'s king that the other side attacks
+    """
+    king = board.king(color)
+    if king is None:
+        return 0
+    zone = BB_KING_ZONE[king] | chess.BB_SQUARES[king]
+    return sum(1 for square in chess.scan_forward(zone) if board.is_attacked_by(not color, square))
+
+
+def _activity(board: chess.Board, color: chess.Color) -> int:
+    """
+    squares `color`'s pieces other than the king attack
+    """
+    attacked = 0
+    for square in chess.scan_forward(board.occupied_co[color] & ~board.kings):
+        attacked |= board.attacks_mask(square)
+    return chess.popcount(attacked)
+
+
+class _SparseMin(object):
+    """
+    O(1) minimum of any range of a fixed list, after O(n log n) setup
+    """
+    def __init__(self, values: Sequence[int]):
+        self.levels = [list(values)]
+        width = 1
+        while 2 * width <= len(values):
+            previous = self.levels[-1]
+            self.levels.append([min(previous[i], previous[i + width]) for i in range(len(previous) - width)])
+            width *= 2
+
+    def min(self, start: int, stop: int) -> int:
+        """
+        smallest of `values[start:stop]`, which must not be empty
+        """
+        level = (stop - start).bit_length() - 1
+        row = self.levels[level]
+        return min(row[start], row[stop - (1 << level)])
+
+
+class SequenceTrack(object):
+    """
+    one pass over `moves` played from `board` (which is left as it was). ply `i` is the move from position `i` to
+    position `i + 1`
+    """
+    def __init__(self, board: chess.Board, moves: Iterable[Union[chess.Move, str]]):
+        self.turn: List[chess.Color] = []
+        self.kings: List[Tuple[Optional[chess.Square], Optional[chess.Square]]] = []
+        self.balance: List[int] = []
+        self.total: List[int] = []
+        self.danger: List[Tuple[int, int]] = []
+        self.activity: List[Tuple[int, int]] = []
+        self.mate: List[bool] = []
+        self.sums: Dict[str, Tuple[List[int], List[int]]] = {name: ([0], [0]) for name in COUNTS}
+
+        king_steps: Tuple[List, List] = ([], [])
+        pushed = 0
+        try:
+            self._record(board)
+            for move in moves:
+                if isinstance(move, str):
+                    move = chess.Move.from_uci(move)
+                color = board.turn
+                counts = self._ply(board, move, king_steps[color])
+                for name in COUNTS:
+                    sums = self.sums[name]
+                    sums[color].append(sums[color][-1] + counts.get(name, 0))
+                    sums[not color].append(sums[not color][-1])
+                board.push(move)
+                pushed += 1
+                self._record(board)
+        finally:
+            for _ in range(pushed):
+                board.pop()
+        self.plies = pushed
+        # range minimum of the balance from each side's point of view, indexed by color
+        self._lowest = (_SparseMin([-balance for balance in self.balance]), _SparseMin(self.balance))
+
+    def _record(self, board: chess.Board) -> None:
+        self.turn.append(board.turn)
+        self.kings.append((board.king(chess.BLACK), board.king(chess.WHITE)))
+        self.balance.append(_balance(board))
+        self.total.append(_total(board))
+        self.danger.append((_danger(board, chess.BLACK), _danger(board, chess.WHITE)))
+        self.activity.append((_activity(board, chess.BLACK), _activity(board, chess.WHITE)))
+        self.mate.append(board.is_check() and board.is_checkmate())
+
+    @staticmethod
+    def _ply(board: chess.Board, move: chess.Move, king_steps: List) -> Dict[str, int]:
+        counts = {'moves': 1}
+        check = board.gives_check(move)
+        capture = board.is_capture(move)
+        if check:
+            counts['checks'] = 1
+        if capture:
+            counts['captures'] = 1
+            captured = chess.PAWN if board.is_en_passant(move) else board.piece_type_at(move.to_square)
+            counts['captured'] = _VALUES[captured]
+            if check and motifs.motifs(board, move) & motifs.WINDMILL:
+                counts['windmills'] = 1
+        if check or capture or move.promotion:
+            counts['forcing'] = 1
+
+        if board.king(board.turn) == move.from_square:
+            counts['king_moves'] = 1
+            king_steps.append((move.from_square, move.to_square))
+            if len(king_steps) >= 3 and None not in king_steps[-3:]:
+                (a, b), (b2, c), (c2, a2) = king_steps[-3:]
+                if b == b2 and c == c2 and a == a2 and len({a, b, c}) == 3 and chess.square_distance(a, c) == 1:
+                    counts['triangles'] = 1
+        else:
+            king_steps.append(None)
+        return counts
+
+    def __len__(self) -> int:
+        return self.plies
+
+    def window(self, start: int = 0, stop: Optional[int] = None) -> 'Window':
+        return Window(self, start, self.plies if stop is None else stop)
+
+    def slide(self, width: int, names: Optional[Sequence[str]] = None) -> Iterator[Tuple['Window', Dict[str, bool]]]:
+        """
+        every window of `width` plies in order, with the sequence properties `names` (all of them by default)
+        """
+        names = list(SEQUENCE_PROPERTIES) if names is None else names
+        predicates = [(name, SEQUENCE_PROPERTIES[name]) for name in names]
+        for start in range(self.plies - width + 1):
+            window = Window(self, start, start + width)
+            yield window, {name: predicate(window) for name, predicate in predicates}
+
+    def find(self, name: str, width: int) -> List[int]:
+        """
+        starts of the windows of `width` plies in which `name` holds
+        """
+        predicate = SEQUENCE_PROPERTIES[name]
+        return [start for start in range(self.plies - width + 1) if predicate(Window(self, start, start + width))]
+
+
+class Window(object):
+    """
+    plies `start` to `stop - 1` of a `SequenceTrack`, i.e. positions `start` to `stop`
+    """
+    __slots__ = ('track', 'start', 'stop', 'color')
+
+    def __init__(self, track: SequenceTrack, start: int, stop: int):
+        assert 0 <= start <= stop <= track.plies
+        self.track = track
+        self.start = start
+        self.stop = stop
+        self.color = track.turn[start]
+
+    def __repr__(self) -> str:
+        return 'Window({}, {})'.format(self.start, self.stop)
+
+    def count(self, name: str, color: chess.Color) -> int:
+        """
+        sum of the per-ply count `name` (see `COUNTS`) over `color`'s moves in the window
+        """
+        sums = self.track.sums[name][color]
+        return sums[self.stop] - sums[self.start]
+
+    def triangles(self, color: chess.Color) -> int:
+        """
+        king triangles completed in the window whose first move is in it too
+        """
+        sums = self.track.sums['triangles'][color]
+        first = min(self.start + 4, self.stop)
+        return sums[self.stop] - sums[first]
+
+    def king_displacement(self, color: chess.Color) -> int:
+        before, after = self.track.kings[self.start][color], self.track.kings[self.stop][color]
+        return 0 if before is None or after is None else chess.square_distance(before, after)
+
+    def material_delta(self, color: chess.Color) -> int:
+        delta = self.track.balance[self.stop] - self.track.balance[self.start]
+        return delta if color == chess.WHITE else -delta
+
+    def lowest_material(self, color: chess.Color) -> int:
+        """
+        the worst `color`'s material balance got during the window, relative to its start
+        """
+        lowest = self.track._lowest[color].min(self.start, self.stop + 1)
+        start = self.track.balance[self.start]
+        return lowest - start if color == chess.WHITE else lowest + start
+
+    def exchanged(self) -> int:
+        """
+        material taken off the board by both sides
+        """
+        return self.track.total[self.start] - self.track.total[self.stop]
+
+    def danger_delta(self, color: chess.Color) -> int:
+        return self.track.danger[self.stop][color] - self.track.danger[self.start][color]
+
+    def activity_delta(self, color: chess.Color) -> int:
+        return self.track.activity[self.stop][color] - self.track.activity[self.start][color]
+
+    def ends_in_mate(self) -> bool:
+        return self.track.mate[self.stop]
+
+
+def king_hunt(window: Window) -> bool:
+    """
+    checks drive the other king around: three or more checks and king moves, and it ends up three squares away
+    """
+    color, other = window.color, not window.color
+    return window.count('checks', color) >= 3 and window.count('king_moves', other) >= 3 and \
+        window.king_displacement(other) >= 3
+
+
+def king_walk(window: Window) -> bool:
+    """
+    two or more king moves in a row, at least two squares away from where it started, with fewer squares around it
+    attacked at the end
+    """
+    color = window.color
+    moves = window.count('moves', color)
+    return moves >= 2 and window.count('king_moves', color) == moves and window.king_displacement(color) >= 2 and \
+        window.danger_delta(color) < 0
+
+
+def liquidation(window: Window) -> bool:
+    """
+    both sides capture, at least two minor pieces' worth comes off the board and the side to move loses nothing
+    """
+    color = window.color
+    return window.count('captures', color) >= 1 and window.count('captures', not color) >= 1 and \
+        window.exchanged() >= 6 and window.material_delta(color) >= 0
+
+
+def combination(window: Window) -> bool:
+    """
+    only forcing moves (checks, captures, promotions), material given up on the way, and either more material at the
+    end or mate
+    """
+    color = window.color
+    moves = window.count('moves', color)
+    return moves >= 2 and window.count('forcing', color) == moves and window.lowest_material(color) < 0 and \
+        (window.material_delta(color) >= 2 or window.ends_in_mate())
+
+
+def consolidation(window: Window) -> bool:
+    """
+    quiet moves (no checks or captures by either side) after which the pieces attack more and the king is no less safe
+    """
+    color = window.color
+    return window.count('moves', color) >= 2 and window.count('checks', color) == 0 and window.exchanged() == 0 and \
+        window.activity_delta(color) > 0 and window.danger_delta(color) <= 0
+
+
+def windmill(window: Window) -> bool:
+    """
+    two or more captures that each uncover check
+    """
+    return window.count('windmills', window.color) >= 2
+
+
+def triangulation(window: Window) -> bool:
+    """
+    three king moves in a row around a triangle of adjacent squares, ending where they started
+    """
+    return window.triangles(window.color) >= 1
+
+
+def material_style(window: Window) -> bool:
+    """
+    grabbing material: two or more captures, two or more points up at the end and never behind on the way
+    """
+    color = window.color
+    return window.count('captures', color) >= 2 and window.material_delta(color) >= 2 and \
+        window.lowest_material(color) >= 0
+
+
+def romantic_style(window: Window) -> bool:
+    """
+    giving up material for the attack: two or more points down at some point, and two or more checks
+    """
+    color = window.color
+    return window.lowest_material(color) <= -2 and window.count('checks', color) >= 2
+
+
+SEQUENCE_PROPERTIES: Dict[str, Callable[[Window], bool]] = {
+    'king_hunt': king_hunt,
+    'king_walk': king_walk,
+    'liquidation': liquidation,
+    'combination': combination,
+    'consolidation': consolidation,
+    'windmill': windmill,
+    'triangulation': triangulation,
+    'material_style': material_style,
+    'romantic_style': romantic_style,
+}
+
+
+def evaluate(name: str, board: chess.Board, move_sequence: Iterable[Union[chess.Move, str]]) -> bool:
+    """
+    sequence property `name` over the whole of `move_sequence` played from `board`
+    """
+    return SEQUENCE_PROPERTIES[name](SequenceTrack(board, move_sequence).window())
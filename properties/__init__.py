@@ -0,0 +1,118 @@
+from typing import Callable, Dict, List, Tuple
+import importlib
+
+import chess
+
+import registry
+
+
+__all__ = ['absolute_pin', 'active', 'advanced_pawns', 'advantage', 'alekhine_gun', 'arabian_mate', 'attacking',
+           'attacks', 'back_rank_mate', 'back_rank_weakness', 'backward_pawns', 'bad_bishop', 'bare_king', 'battery',
+           'battery_king', 'bind', 'bishop_pair', 'blockade', 'break_move', 'breakthrough', 'bridge', 'can_opener',
+           'centralization', 'centralization_feature_vector', 'cheapo', 'closed', 'closed_feature_vector', 'combination',
+           'connected_pawns', 'connected_passed_pawns', 'connected_rooks', 'consolidation', 'control_of_center',
+           'control_of_center_feature_vector', 'control_pawn', 'corresponding_squares', 'counterplay', 'cover',
+           'cramped', 'cramped_feature_vector', 'critical_square', 'critical_position', 'cross_check', 'decoy',
+           'defensive_move', 'deflect', 'desperado', 'discovered_attack', 'discovered_check', 'double_attack',
+           'double_check',
+           'doubled_pawns', 'edge', 'en_prise', 'en_passant', 'escape_square', 'exposed_king', 'family_fork',
+           'fianchetto', 'fianchetto_squares', 'forced_mate_in_n', 'forced_move', 'fork', 'fortress', 'gambit_move',
+           'good_bishop', 'greek_gift_sacrifice', 'half_open_file', 'hanging_pawns', 'hole', 'horwitz_bishops',
+           'hypermodern_position', 'imbalance_feature_vector', 'inactive', 'initiative', 'interference', 'intermezzo',
+           'isolani', 'isolated_pawn', 'italian_bishop', 'kick', 'king_hunt', 'king_walk', 'liquidation', 'loose_piece',
+           'lucena_position', 'luft', 'majority', 'maroczy_bind', 'material_style', 'material_style_feature_vector',
+           'open_position', 'open_position_feature_vector', 'passed_pawns', 'pin', 'poisoned_pawn', 'positional_sacrifice',
+           'promotion',
+           'promoted_to', 'pseudo_sacrifice', 'quiet_move', 'romantic_style', 'rook_lift', 'sacrifice', 'sham_sacrifice',
+           'skewer', 'smothered_mate', 'spanish_bishop', 'squeeze', 'support_point', 'tension', 'threatening',
+           'triangulation', 'tripled_pawns', 'undermining', 'unpinning', 'vacating_sacrifice', 'valve',
+           'vanished_center', 'waiting_move', 'weak_square', 'windmill', 'wrong_rook_pawn', 'x_ray', 'zugzwang']
+
+
+white_pieces = ['P', 'R', 'N', 'B', 'Q', 'K']
+black_pieces = ['p', 'r', 'n', 'b', 'q', 'k']
+
+
+"""
+The goal of this `properties` library is to provide functions which compute information, which is
+then to be handed off to functions in the `describe` library. Think of this library as a "backend".
+
+This library mostly computes boolean values, since the `describe` library will mostly communicate
+whether a position or move has a particular feature, such as whether or not there are doubled rooks.
+However, sometimes we want to give a more in-depth look at the position; for instance, we may want to
+tell how "open" a position is using a vector of features related to openness of a position.
+"""
+
+
+"""
+the functions live in category submodules (pawns, tactics, mates, endgames, style) that are only imported the first
+time one of their properties is looked up, so `import properties` stays cheap and the dependencies of a category
+(the mate search, numpy for the feature vectors, ...) are only loaded when something in it is used.
+"""
+
+
+_SUBMODULES = {
+    'pawns': ['advanced_pawns', 'backward_pawns', 'blockade', 'break_move', 'breakthrough', 'can_opener',
+              'connected_pawns', 'connected_passed_pawns', 'control_pawn', 'doubled_pawns', 'en_passant',
+              'half_open_file', 'hanging_pawns', 'hole', 'isolani', 'isolated_pawn', 'majority', 'maroczy_bind',
+              'passed_pawns', 'promoted_to', 'promotion', 'squeeze', 'support_point', 'tripled_pawns', 'undermining',
+              'valve', 'vanished_center', 'weak_square'],
+    'tactics': ['absolute_pin', 'alekhine_gun', 'attacking', 'attacks', 'battery', 'battery_king', 'cheapo',
+                'combination', 'counterplay', 'cover', 'cross_check', 'decoy', 'defensive_move', 'deflect', 'desperado',
+                'discovered_attack', 'discovered_check', 'double_attack', 'double_check', 'en_prise', 'family_fork',
+                'forced_move', 'fork', 'gambit_move', 'greek_gift_sacrifice', 'interference', 'intermezzo', 'kick',
+                'loose_piece', 'pin', 'poisoned_pawn', 'positional_sacrifice', 'pseudo_sacrifice', 'sacrifice',
+                'sham_sacrifice', 'skewer', 'tension', 'threatening', 'unpinning', 'vacating_sacrifice', 'windmill',
+                'x_ray'],
+    'mates': ['arabian_mate', 'back_rank_mate', 'back_rank_weakness', 'escape_square', 'exposed_king',
+              'forced_mate_in_n', 'king_hunt', 'luft', 'smothered_mate'],
+    'endgames': ['bare_king', 'bridge', 'corresponding_squares', 'fortress', 'king_walk', 'lucena_position',
+                 'triangulation', 'wrong_rook_pawn', 'zugzwang'],
+    'style': ['active', 'advantage', 'bad_bishop', 'bind', 'bishop_pair', 'centralization',
+              'centralization_feature_vector', 'closed', 'closed_feature_vector', 'connected_rooks', 'consolidation',
+              'control_of_center', 'control_of_center_feature_vector', 'cramped', 'cramped_feature_vector',
+              'critical_position', 'critical_square', 'edge', 'fianchetto', 'fianchetto_squares', 'good_bishop',
+              'horwitz_bishops', 'hypermodern_position', 'imbalance_feature_vector', 'inactive', 'initiative',
+              'italian_bishop', 'liquidation', 'material_style', 'material_style_feature_vector', 'open_position',
+              'open_position_feature_vector', 'quiet_move', 'romantic_style', 'rook_lift', 'spanish_bishop',
+              'waiting_move'],
+}
+
+_MODULE_OF = {name: 'properties.' + module for module, names in _SUBMODULES.items() for name in names}
+
+registry.declare(_MODULE_OF)
+
+
+def __getattr__(name: str):
+    try:
+        module = _MODULE_OF[name]
+    except KeyError:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name)) from None
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_MODULE_OF))
+
+
+EXPANDED_CENTER = (file + rank for file in ['c', 'd', 'e', 'f'] for rank in ['3', '4', '5', '6'])
+
+
+def _relevant_pieces_cases(color) -> Tuple[List, Callable]:
+    if color == chess.WHITE:
+        relevant_pieces = white_pieces
+        relevant_case = lambda x: x.upper()
+    else:
+        relevant_pieces = black_pieces
+        relevant_case = lambda x: x.lower()
+    return relevant_pieces, relevant_case
+
+
+def _filter_piece_map_by_color(pm, color) -> Dict[chess.Square, chess.Piece]:
+    if color == chess.BLACK:
+        pm = {k: v for k, v in pm.items() if v.symbol() == v.symbol().lower()}
+    else:
+        pm = {k: v for k, v in pm.items() if v.symbol() == v.symbol().upper()}
+    return pm
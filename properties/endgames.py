@@ -0,0 +1,180 @@
+from typing import Collection, Optional
+
+import chess
+
+from move_analysis import window
+from registry import register
+from tablebase import bitbase
+
+
+"""
+endgame concepts: king activity, theoretical positions and zugzwang.
+
+won/drawn questions are answered from the bitbases in `tablebase` (generate them with `python -m tablebase.generate`);
+properties that need one return None when the position isn't covered or the bitbase hasn't been generated.
+"""
+
+
+def _relative_rank(square: chess.Square, color: chess.Color) -> int:
+    return chess.square_rank(square) if color == chess.WHITE else 7 - chess.square_rank(square)
+
+
+def _with_turn(board: chess.Board, color: chess.Color) -> Optional[chess.Board]:
+    """
+    `board` with `color` to move, None if that isn't a legal position
+    """
+    flipped = board.copy(stack=False)
+    flipped.turn = color
+    flipped.ep_square = None
+    return flipped if flipped.is_valid() else None
+
+
+@register()
+def bare_king(board, piece_map, color) -> bool:
+    """
+    only king remains for `color`
+    """
+    pass
+
+
+@register(cost='constant', requires=['lucena_position'])
+def bridge(board, color) -> bool:
+    """
+    path for king in endgame by providing cover against checks from line pieces
+
+    in a lucena position: `color` is the side with the pawn and its rook already stands on its fourth rank, ready to
+    block the checks once the king steps out
+    """
+    if not lucena_position(board) or not board.pawns & board.occupied_co[color]:
+        return False
+    rook = chess.lsb(board.rooks & board.occupied_co[color])
+    return _relative_rank(rook, color) == 3
+
+
+@register(cost='constant')
+def corresponding_squares(board, squares: Collection) -> Optional[bool]:
+    """
+    squares such that when king moves to one square, opponent's king must go to other (corresponding) square to
+    hold position
+
+    `squares` is (square of the king of the side with the pawn, square of the other king). they correspond if,
+    with the kings put there, the side with the pawn wins when the opponent is to move but not when it is itself to
+    move (mutual zugzwang). None if no bitbase covers the position
+    """
+    found = bitbase.material(board)
+    if found is None:
+        return None
+    strong = found[1]
+    strong_square, weak_square = squares
+    placed = board.copy(stack=False)
+    for color, square in ((strong, strong_square), (not strong, weak_square)):
+        if placed.piece_at(square) is not None and placed.piece_type_at(square) != chess.KING:
+            return False
+        placed.remove_piece_at(placed.king(color))
+        placed.set_piece_at(square, chess.Piece(chess.KING, color))
+    placed.ep_square = None
+    results = []
+    for turn in (strong, not strong):
+        position = _with_turn(placed, turn)
+        if position is None:
+            return False
+        results.append(bitbase.probe(position))
+    if None in results:
+        return None
+    return not results[0] and results[1]
+
+
+@register(cost='constant')
+def fortress(board) -> Optional[bool]:
+    """
+    the side that is material down holds a draw the bitbases say it can't be forced from. None outside them
+    """
+    result = bitbase.probe(board)
+    return None if result is None else not result
+
+
+@register('sequence', cost='linear')
+def king_walk(board, move_sequence) -> bool:
+    """
+    sequence of king moves such that king gets to safer square
+
+    see `move_analysis.window.king_walk`
+    """
+    return window.evaluate('king_walk', board, move_sequence)
+
+
+@register(cost='constant')
+def lucena_position(board) -> bool:
+    """
+    look it up
+
+    rook and pawn against rook: the pawn (not a rook pawn) is on its seventh rank with its king on the queening square
+    in front of it, and the defending king is cut off from the pawn by the attacking rook, at least two files away
+    """
+    if board.knights or board.bishops or board.queens or chess.popcount(board.pawns) != 1 or \
+            chess.popcount(board.rooks & board.occupied_co[chess.WHITE]) != 1 or \
+            chess.popcount(board.rooks & board.occupied_co[chess.BLACK]) != 1:
+        return False
+    pawn = chess.lsb(board.pawns)
+    color = board.color_at(pawn)
+    pawn_file = chess.square_file(pawn)
+    if _relative_rank(pawn, color) != 6 or pawn_file in (0, 7):
+        return False
+    if board.king(color) != pawn + (8 if color == chess.WHITE else -8):
+        return False
+    king_file = chess.square_file(board.king(not color))
+    rook_file = chess.square_file(chess.lsb(board.rooks & board.occupied_co[color]))
+    return abs(king_file - pawn_file) >= 2 and min(king_file, pawn_file) < rook_file < max(king_file, pawn_file)
+
+
+@register('sequence', cost='linear')
+def triangulation(board, move_sequence) -> bool:
+    """
+    A technique used in king and pawn endgames (less commonly seen with other pieces) to lose a tempo and gain the opposition
+
+    the side to move makes three king moves in a row around a triangle of adjacent squares, ending where it started
+    """
+    return window.evaluate('triangulation', board, move_sequence)
+
+
+@register(cost='constant')
+def wrong_rook_pawn(board, pawn) -> Optional[bool]:
+    """
+    the rook pawn on `pawn`, with a bishop that doesn't control its queening square, can't win against the bare king.
+    None if the bitbase for it hasn't been generated
+    """
+    found = bitbase.material(board)
+    if found is None or found[0] != 'kbpk' or board.piece_type_at(pawn) != chess.PAWN:
+        return False
+    if chess.square_file(pawn) not in (0, 7):
+        return False
+    color = found[1]
+    queening = chess.square(chess.square_file(pawn), 7 if color == chess.WHITE else 0)
+    bishop = chess.lsb(board.bishops)
+    dark = chess.BB_DARK_SQUARES
+    if bool(chess.BB_SQUARES[bishop] & dark) == bool(chess.BB_SQUARES[queening] & dark):
+        return False
+    result = bitbase.probe(board)
+    return None if result is None else not result
+
+
+@register(cost='constant')
+def zugzwang(board, color) -> Optional[bool]:
+    """
+    `color` is to move and would rather pass: its result with the move is worse than it would be with the opponent
+    to move. None if no bitbase covers the position
+    """
+    if board.turn != color:
+        return False
+    result = bitbase.probe(board)
+    if result is None:
+        return None
+    passed = _with_turn(board, not color)
+    if passed is None:
+        return False
+    other = bitbase.probe(passed)
+    if other is None:
+        return None
+    if board.pawns & board.occupied_co[color]:
+        return not result and other
+    return result and not other
@@ -0,0 +1,154 @@
+import chess
+
+from board_analysis import king_zone
+from board_analysis.context import PositionContext, context
+from move_analysis import window
+from move_analysis.moves import MoveAnalysis
+from registry import register
+from search import alphabeta
+from search.mate import MateResult, solve_mate
+
+
+"""
+mating patterns, king safety and the forced-mate search.
+"""
+
+
+def _horizontal_defends(board, defending_square, defended_square, ctx: PositionContext = None) -> bool:
+    """
+    does piece at `defending_square` defend the `defended_square` along its rank or file?
+    """
+    assert board.piece_type_at(defending_square) in [chess.ROOK, chess.QUEEN]
+    lines = chess.BB_RANK_MASKS[defending_square] | chess.BB_FILE_MASKS[defending_square]
+    return bool(lines & chess.BB_SQUARES[defended_square]) \
+        and context(board, ctx).attack_table.attacks(defending_square, defended_square)
+
+
+@register(cost='constant')
+def arabian_mate(board: chess.Board, ctx: PositionContext = None) -> bool:
+    """
+    checkmate when knight and rook trap opponent's king in corner
+    """
+    return bool(context(board, ctx).mate_pattern & king_zone.ARABIAN_MATE)
+
+
+@register(cost='constant')
+def back_rank_mate(board, ctx: PositionContext = None) -> bool:
+    """
+    checkmate from opponent's rook or queen along back rank, where king is unable to move to the second
+    rank because all adjacent squares on the second rank are occupied by player's pieces, and there are
+    no legal moves to block the rook/queen delivering mate
+    """
+    return bool(context(board, ctx).mate_pattern & king_zone.BACK_RANK_MATE)
+
+
+@register(cost='linear')
+def back_rank_weakness(board: chess.Board, color: chess.Color, ctx: PositionContext = None, depth: int = 0) -> bool:
+    """
+    under threat of a back-rank mate at some point. computed by current state (no rook or queen on back-rank,
+    weak squares not defended by player's pieces) and look-ahead in move-tree
+    TODO: should there be certain scores for how weak the back rank is? a function of immediacy of threats,
+            how many squares are covered, etc.
+
+    with `depth`, the opponent (given the move) also has to find a mate within `depth` plies
+    """
+    ctx = context(board, ctx)
+    king_square = ctx.king(color)
+    if king_square is None or not king_zone.on_back_rank(board, color):
+        return False
+
+    # a free square in front of the king is luft
+    if king_zone.flight_squares(board, color) & king_zone.BB_FORWARD_ZONE[color][king_square]:
+        return False
+
+    back_rank = king_zone.BB_BACK_RANK[color]
+    for square in chess.scan_forward((board.rooks | board.queens) & ctx.occupied_co[color] & back_rank):
+        if _horizontal_defends(board, square, king_square, ctx):
+            return False
+
+    if depth:
+        attacker = board.copy(stack=False)
+        attacker.turn = not color
+        attacker.ep_square = None
+        if not attacker.is_valid():
+            return False
+        score = alphabeta.search(attacker, depth).score
+        return alphabeta.is_mate_score(score) and score > 0
+    return True
+
+
+@register(cost='constant')
+def escape_square(board, square: chess.Square) -> bool:
+    """
+    square on second rank for king to run to in case of back-rank check
+    """
+    for color in chess.COLORS:
+        king = board.king(color)
+        if king is not None and king_zone.on_back_rank(board, color) and \
+                king_zone.BB_FORWARD_ZONE[color][king] & chess.BB_SQUARES[square]:
+            return bool(king_zone.flight_squares(board, color) & chess.BB_SQUARES[square])
+    return False
+
+
+@register()
+def exposed_king(board, color) -> bool:
+    """
+    king lacks adjacent pawns to shield it from attack
+    """
+    pass
+
+
+@register(cost='search')
+def forced_mate_in_n(board: chess.Board, color_getting_checkmated, num_moves, workers: int = 1) -> MateResult:
+    """
+    for each legal move that `color_getting_checkmated` has, there exists a legal move for the opposing player
+    such that after the following move is played, then `forced_mate_in_n(color_getting_checkmated, num_moves - 1)`
+    is true.
+
+    that is to say: given alternating color moves at each level in the move tree, every move taken by
+    `color_getting_checkmated` has at least one child move (i.e. a move by the opponent) that results in
+    `forced_mate_in_n(color_getting_checkmated, num_moves - 1)`, recurse down the tree culminating in a checkmate
+    at the end of each path
+
+    the search itself lives in `search.mate`. the result is truthy iff there is a forced mate, and also carries the
+    length of the shortest mate, one mating line and the number of nodes searched. with `workers` > 1 (None for
+    one per cpu) the root moves are searched in that many processes, see `search.parallel`.
+    """
+    if workers != 1:
+        from search import parallel
+        return parallel.solve_mate(board, color_getting_checkmated, num_moves, workers)
+    return solve_mate(board, color_getting_checkmated, num_moves)
+
+
+@register('sequence', cost='linear')
+def king_hunt(board, move_sequence) -> bool:
+    """
+    sequence of attacks on king such that it has to move far from original position
+
+    see `move_analysis.window.king_hunt`
+    """
+    return window.evaluate('king_hunt', board, move_sequence)
+
+
+@register('move', cost='linear')
+def luft(board, move) -> bool:
+    """
+    is move a luft?
+    """
+    return MoveAnalysis(board, move).luft
+
+
+@register('move', cost='linear')
+def smothered_mate(board, move) -> bool:
+    """
+    does `move` deliver a knight mate to a king hemmed in by its own pieces?
+    """
+    if isinstance(move, str):
+        move = chess.Move.from_uci(move)
+    if board.piece_type_at(move.from_square) != chess.KNIGHT or not board.gives_check(move):
+        return False
+    board.push(move)
+    try:
+        return bool(king_zone.mate_pattern(board) & king_zone.SMOTHERED_MATE)
+    finally:
+        board.pop()
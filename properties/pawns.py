@@ -0,0 +1,250 @@
+from typing import List, Collection, Tuple, Dict
+
+import chess
+
+from board_analysis.context import PositionContext, context
+from registry import register
+
+
+"""
+pawn structure and pawn moves. most answers come from the cached `board_analysis.pawns.PawnStructure`.
+"""
+
+
+def _all_pawns_in(bb: chess.Bitboard, pawns: Collection = None) -> bool:
+    """
+    any pawn in `bb` if `pawns` is not given, else every square in `pawns` is in `bb`
+    """
+    if not pawns:
+        return bool(bb)
+    return all(bb & chess.BB_SQUARES[square] for square in pawns)
+
+
+@register(inputs=[chess.PAWN], cost='constant')
+def advanced_pawns(board, piece_map=None, ctx: PositionContext = None) -> List[Tuple[chess.Square, chess.Piece]]:
+    """
+    pawn on opponent's side of board
+    """
+    ps = context(board, ctx).pawns
+    return [(square, chess.Piece(chess.PAWN, color)) for color in chess.COLORS
+            for square in ps.squares('advanced', color)]
+
+
+@register(inputs=[chess.PAWN], cost='constant')
+def backward_pawns(board: chess.Board, piece_map: Dict[chess.Square, chess.Piece] = None,
+                   color: chess.Color = None, ctx: PositionContext = None) -> List[Tuple[chess.Square, chess.Piece]]:
+    """
+    pawn behind player's other pawns on adjacent file, can't be advanced without support of another pawn
+    (its stop square is covered by an enemy pawn and no friendly pawn can ever come to support it).
+    both colors if `color` is not given
+    """
+    ps = context(board, ctx).pawns
+    colors = chess.COLORS if color is None else [color]
+    return [(square, chess.Piece(chess.PAWN, c)) for c in colors for square in ps.squares('backward', c)]
+
+
+@register()
+def blockade(board, color) -> bool:
+    """
+    piece in front of enemy pawn, stopping its advancement
+
+    TODO: should we have another function for generating blockade feature vector, like with `open_position`?
+    TODO: should there be "verbose mode" for applying feature vector functions?
+    """
+    pass
+
+
+@register('move')
+def break_move(board, move) -> bool:
+    """
+    a break – typically a pawn move that gains space
+    """
+    pass
+
+
+@register('move')
+def breakthrough(board, move) -> bool:
+    """
+    destroy defensive structure
+    """
+    pass
+
+
+@register('move')
+def can_opener(board, move) -> bool:
+    """
+    attacking kingside by advancing the h-pawn (to open file near defender's king)
+
+    TODO: should we make something similar for queenside + a-pawn?
+    TODO: can-opener refutation? e.g. previous move was can-opener, current move blockades the can-opener pawn?
+    """
+    pass
+
+
+@register(inputs=[chess.PAWN], cost='constant')
+def connected_pawns(board, color, pawns: Collection = None, ctx: PositionContext = None) -> bool:
+    """
+    two or more pawns of same color on adjacent files. if `pawns` (squares) is given, all of them have to be connected
+    """
+    return _all_pawns_in(context(board, ctx).pawns.connected[color], pawns)
+
+
+@register(inputs=[chess.PAWN], cost='constant', requires=['passed_pawns', 'connected_pawns'])
+def connected_passed_pawns(board, color, pawns: Collection = None, ctx: PositionContext = None) -> bool:
+    """
+    pawns are both passed pawns and connected.
+
+    procedure:
+        pawn_1 is passed_pawn
+        pawn_2 is passed_pawn
+        pawns are connected
+    """
+    return _all_pawns_in(context(board, ctx).pawns.connected_passed[color], pawns)
+
+
+@register()
+def control_pawn(board, color, pawn, square=None, file=None, rank=None) -> bool:
+    """
+    does a pawn control a square
+    """
+    assert not all(square=None, file=None, rank=None)
+    # temporary; TODO: actually implement
+    return False
+
+
+@register(inputs=[chess.PAWN], cost='constant')
+def doubled_pawns(board, color, ctx: PositionContext = None) -> bool:
+    """
+    two pawns of same color on same file
+    """
+    return bool(context(board, ctx).pawns.doubled[color])
+
+
+@register('move')
+def en_passant(board, move) -> bool:
+    """
+    en passant capture
+    """
+    pass
+
+
+@register()
+def half_open_file(board, color, file) -> bool:
+    """
+    file on which only one player has no pawns
+    """
+    pass
+
+
+@register(inputs=[chess.PAWN], cost='constant')
+def hanging_pawns(board, pawns, ctx: PositionContext = None) -> bool:
+    """
+    same color pawns on adjacent files, without pawns of same color on files to their sides
+    """
+    ps = context(board, ctx).pawns
+    return _all_pawns_in(ps.hanging[chess.WHITE] | ps.hanging[chess.BLACK], pawns)
+
+
+@register()
+def hole(board, square) -> bool:
+    """
+    square inside player's side of the board that cannot be controlled by pawn (pawns passed
+    on both adjacent files)
+    """
+    pass
+
+
+@register(inputs=[chess.PAWN], cost='constant')
+def isolani(board, pawn, ctx: PositionContext = None) -> bool:
+    """
+    isolated d-pawn
+    """
+    ps = context(board, ctx).pawns
+    return bool((ps.isolani[chess.WHITE] | ps.isolani[chess.BLACK]) & chess.BB_SQUARES[pawn])
+
+
+@register(inputs=[chess.PAWN], cost='constant')
+def isolated_pawn(board, pawn, ctx: PositionContext = None) -> bool:
+    """
+    pawn without same color pawns on adjacent files
+    """
+    ps = context(board, ctx).pawns
+    return bool((ps.isolated[chess.WHITE] | ps.isolated[chess.BLACK]) & chess.BB_SQUARES[pawn])
+
+
+@register()
+def majority(board, color) -> bool:
+    """
+    player has larger number of pawns on one flank than opponent does
+    """
+    pass
+
+
+@register()
+def maroczy_bind(board) -> bool:
+    """
+    bind on light squares in center – typically d5, by placing pawns on c4 and e4
+    """
+    pass
+
+
+@register(inputs=[chess.PAWN], cost='constant')
+def passed_pawns(board, color, ctx: PositionContext = None) -> bool:
+    """
+    pawn with no enemy pawns in front of it on its own or adjacent files
+    """
+    return bool(context(board, ctx).pawns.passed[color])
+
+
+@register('move')
+def promotion(board, move) -> bool:
+    pass
+
+
+@register('move')
+def promoted_to(board, move) -> chess.Piece:
+    pass
+
+
+@register('move')
+def squeeze(board, pawn_move) -> bool:
+    pass
+
+
+@register()
+def support_point(board, square) -> bool:
+    """
+    square that cannot be attacked by a pawn
+    """
+    pass
+
+
+@register(inputs=[chess.PAWN], cost='constant')
+def tripled_pawns(board, color=None, ctx: PositionContext = None) -> bool:
+    """
+    three pawns of same color on same file. checks both colors if `color` is not given
+    """
+    ps = context(board, ctx).pawns
+    if color is None:
+        return bool(ps.tripled[chess.WHITE] | ps.tripled[chess.BLACK])
+    return bool(ps.tripled[color])
+
+
+@register('move')
+def undermining(board, move) -> bool:
+    pass
+
+
+@register('move')
+def valve(board, move) -> bool:
+    pass
+
+
+@register()
+def vanished_center(board) -> bool:
+    pass
+
+
+@register()
+def weak_square(board, square, color) -> bool:
+    pass
@@ -0,0 +1,379 @@
+from typing import Union, List, Iterable, Collection, Dict, Optional
+
+import chess
+
+from move_analysis import window
+from registry import register
+from search import alphabeta
+
+
+"""
+positional and stylistic judgements, including the feature vectors (numpy is only imported once one of
+those is asked for).
+"""
+
+
+def _features():
+    import board_analysis.features
+    return board_analysis.features
+
+
+def _feature_delta(board, move_sequence: Union[chess.Move, Iterable[chess.Move]], group: str) -> List[float]:
+    """
+    features of `group` after playing `move_sequence` on `board`, minus the features before
+    """
+    if isinstance(move_sequence, chess.Move):
+        move_sequence = [move_sequence]
+    after = board.copy(stack=False)
+    for move in move_sequence:
+        after.push(move)
+    before_values, after_values = _features().feature_matrix([board, after], [group]).values
+    return (after_values - before_values).tolist()
+
+
+@register()
+def active(board, piece) -> bool:
+    """
+    piece is active if it threatens multiple squares of has a number of squares available for next move
+    """
+    pass
+
+
+@register()
+def advantage(board, color) -> bool:
+    """
+    take in factors such as space, time, material, threats
+    """
+    pass
+
+
+@register()
+def bad_bishop(board: chess.Board, piece_map: Dict[chess.Square, chess.Piece], square) -> bool:
+    """
+    bishop behind/defending own pawns
+    TODO: should we assign a score to how bad the bishop is? factors include if the pawns have other support,
+          how far the bishop can move without x amount of disadvantage, etc.
+    """
+    bishop = board.piece_at(square)
+    color = bishop.color
+
+
+@register()
+def bind(board, color) -> bool:
+    """
+    tension, player doesn't have many moves to make, tough to break out. situations:
+
+    * advanced pawns
+
+    TODO: enumerate situations / situation-combos, figure out how to represent them
+    """
+    pass
+
+
+@register()
+def bishop_pair(board, color) -> bool:
+    """
+    player has two bishops, opponent does not
+    """
+    pass
+
+
+@register('sequence')
+def centralization(board, move_sequence: Union[chess.Move, Iterable[chess.Move]]) -> bool:
+    """
+    moving piece(s) to center of board
+    """
+    if isinstance(move_sequence, chess.Move):
+        move_sequence = [move_sequence]
+    # temporary return; TODO: actually implement
+    return False
+
+
+@register('sequence', cost='linear')
+def centralization_feature_vector(board, move_sequence: Union[chess.Move, Iterable[chess.Move]]) -> List:
+    """
+    returns vector of features describing along what dimensions a move sequence is centralizing: the change of the
+    `centralization` features of `board_analysis.features.FEATURE_GROUPS` over the sequence
+    """
+    return _feature_delta(board, move_sequence, 'centralization')
+
+
+@register()
+def closed(board) -> bool:
+    """
+    determines whether or not a position is closed. similar to open.
+    """
+    pass
+
+
+@register(inputs=[chess.PAWN], cost='constant')
+def closed_feature_vector(board) -> List:
+    """
+    similar to open feature vector. properties:
+
+    * interlocking pawn chains
+    * few exchange opportunities
+    * extensive maneurvering behind lines
+
+    columns are the `closed` group of `board_analysis.features.FEATURE_GROUPS`. for many positions at once use
+    `board_analysis.features.feature_matrix`
+    """
+    return _features().feature_vector(board, 'closed')
+
+
+@register()
+def connected_rooks(board, color, rooks: Collection) -> bool:
+    """
+    rooks on same rank or file without pieces in between them
+    """
+    pass
+
+
+@register('sequence', cost='linear')
+def consolidation(board, move_sequence) -> bool:
+    """
+    improving position by repositioning piece(s) to better square(s), e.g.
+
+    * connecting/coordinating pieces
+    * improving king safety
+    * activating pieces
+    * moving heavy pieces to more secure squares
+
+    see `move_analysis.window.consolidation`
+    """
+    return window.evaluate('consolidation', board, move_sequence)
+
+
+@register()
+def control_of_center(board, color) -> bool:
+    """
+    does player control center?
+    """
+    pass
+
+
+@register(cost='constant')
+def control_of_center_feature_vector(board, color) -> List:
+    """
+    to what extent and in what ways does player control center? `color`'s half of the `control_of_center` group
+    """
+    names = _features().FEATURE_GROUPS['control_of_center']
+    values = _features().feature_vector(board, 'control_of_center')
+    suffix = '_' + chess.COLOR_NAMES[color]
+    return [value for name, value in zip(names, values) if name.endswith(suffix)]
+
+
+def corralled_knight(board, piece_map) -> bool:
+    """
+    knight on edge of board, opposing bishop set up in expanded center of board such that it blocks off squares for
+    knight to move to
+    """
+    pass
+
+
+@register()
+def cramped(board) -> bool:
+    """
+    position in which pieces have very few squares to go to on average
+    """
+    pass
+
+
+@register(cost='constant')
+def cramped_feature_vector(board) -> List:
+    """
+    feature vector describing in what ways the position is cramped. e.g.:
+
+    * one side's average number of legal moves (outside of a check position) per piece is small
+    * distribution of legal moves per piece fits certain criteria
+    * large number of blockades / locked pawns
+
+    currently the `cramped` group (space and blocked pawns per color)
+    """
+    return _features().feature_vector(board, 'cramped')
+
+
+@register()
+def critical_square(board, square) -> bool:
+    """
+    an important square in a position
+    TODO: how to implement this
+    """
+    pass
+
+
+@register(cost='search')
+def critical_position(board, depth: int, max_nodes: Optional[int] = None) -> bool:
+    """
+    position in which evaluation shows that advantage structure is about to change
+
+    may be done with combo of eval engine and mining move tree to determine if space of moves keeping
+    advantage structure the same is small
+
+    the best move of a `depth` ply search is at least two pawns better than every other one: anything else gives
+    the advantage away
+    """
+    result = alphabeta.search(board, depth, max_nodes or alphabeta.DEFAULT_MAX_NODES, all_moves=True)
+    if result.scores is None or len(result.scores) < 2:
+        return False
+    best, second = sorted(result.scores.values(), reverse=True)[:2]
+    return best - second >= 2 * alphabeta.PAWN_VALUE
+
+
+# TODO: dynamic play?
+
+
+@register()
+def edge(board) -> chess.Color:
+    """
+    small advantage, returns chess.Color representing player who has edge
+    """
+    pass
+
+
+@register()
+def fianchetto(board, bishop) -> bool:
+    """
+    bishop on long diagonal (b2/g2 – white; b7/g7 – black)
+
+    idea: nope until you see B{b2,g2,b7,g7} in move sequence, then update board metadata (MetaBoard class);
+    update MetaBoard upon seeing bishop moving away from that square
+    """
+    pass
+
+
+@register()
+def fianchetto_squares(board) -> Collection:
+    """
+    return squares on which bishops are fianchettoed
+    """
+    return set()
+
+
+@register()
+def good_bishop(board, bishop) -> bool:
+    pass
+
+
+@register()
+def horwitz_bishops(board, bishops) -> bool:
+    """
+    player's bishops controlling adjacent diagonals
+    """
+    pass
+
+
+@register()
+def hypermodern_position(board) -> bool:
+    """
+    controlling center with pieces from flanks, rather than occupying center with pawns
+    """
+    pass
+
+
+@register(inputs=['material'], cost='constant')
+def imbalance_feature_vector(board) -> List:
+    """
+    feature vector consisting of ways in which there exists an imbalance, e.g.
+    central pawns, bishop pair, strong/weak bishop, connected rooks, space, etc.
+
+    currently the `imbalance` group (material balance per piece type and bishop pairs)
+    """
+    return _features().feature_vector(board, 'imbalance')
+
+
+@register()
+def inactive(board, piece) -> bool:
+    return not active(board, piece)
+
+
+@register()
+def initiative(board, color) -> bool:
+    pass
+
+
+@register()
+def italian_bishop(board, bishop) -> bool:
+    """
+    white/black bishop developed to c4/c5
+    """
+    pass
+
+
+@register('sequence', cost='linear')
+def liquidation(board, move_sequence) -> bool:
+    """
+    simplification
+    """
+    return window.evaluate('liquidation', board, move_sequence)
+
+
+@register('sequence', cost='linear')
+def material_style(board, move_sequence) -> bool:
+    return window.evaluate('material_style', board, move_sequence)
+
+
+@register('sequence', cost='linear')
+def material_style_feature_vector(board, move_sequence) -> List:
+    """
+    change of the `material_style` features over `move_sequence`
+    """
+    return _feature_delta(board, move_sequence, 'material_style')
+
+
+@register()
+def open_position(board) -> bool:
+    """
+    features:
+
+    * lack of central pawns
+    * degree of support amongst central pawns
+
+    ========
+
+    maybe something like relu where hitting a threshold of features returns True, else False
+    """
+    pass
+
+
+@register(inputs=[chess.PAWN], cost='constant')
+def open_position_feature_vector(board) -> List:
+    """
+    returns a feature vector numerically describing the dimensions along which a position is open.
+
+    ideas:
+
+    * number of central pawns
+    * degree of support amongst central pawns
+
+    columns are the `open_position` group of `board_analysis.features.FEATURE_GROUPS`
+    """
+    return _features().feature_vector(board, 'open_position')
+
+
+@register('move')
+def quiet_move(board, move) -> bool:
+    pass
+
+
+@register('sequence', cost='linear')
+def romantic_style(board, move_sequence) -> bool:
+    return window.evaluate('romantic_style', board, move_sequence)
+
+
+@register('move')
+def rook_lift(board, move) -> bool:
+    pass
+
+
+@register()
+def spanish_bishop(board, bishop) -> bool:
+    """
+    white bishop on b5
+    """
+    pass
+
+
+@register('move')
+def waiting_move(board, move) -> bool:
+    pass
@@ -0,0 +1,598 @@
+from typing import Set, List, Optional, Tuple
+
+import chess
+
+from board_analysis.attacks import slider_attacks
+from board_analysis.context import PositionContext, context
+from board_analysis.exchange import Exchange, exchange, see
+from move_analysis import motifs, window
+from move_analysis.moves import PIECE_VALUES, MoveAnalysis
+from properties import _relevant_pieces_cases
+from registry import register
+from search import alphabeta
+
+
+"""
+tactical motifs: attacks, pins, forks, batteries, exchanges and sacrifices.
+"""
+
+
+def _batteries(board, color, ctx: PositionContext = None) -> List[Tuple[chess.Square, chess.Square]]:
+    """
+    (rear, front) pairs of `color`'s line pieces where the rear piece backs up the front one along a line both of
+    them move on. every battery shows up once in each direction
+    """
+    table = context(board, ctx).attack_table
+    own = board.occupied_co[color]
+    orthogonal = (board.rooks | board.queens) & own
+    diagonal = (board.bishops | board.queens) & own
+    pairs = []
+    for rear in chess.scan_forward(orthogonal | diagonal):
+        for front in chess.scan_forward(table.attacks_from[rear] & (orthogonal | diagonal)):
+            straight = chess.square_rank(rear) == chess.square_rank(front) or \
+                chess.square_file(rear) == chess.square_file(front)
+            line_pieces = orthogonal if straight else diagonal
+            if line_pieces & chess.BB_SQUARES[rear] and line_pieces & chess.BB_SQUARES[front]:
+                pairs.append((rear, front))
+    return pairs
+
+
+def _behind(board, attacker: chess.Square, target: chess.Square) -> Optional[chess.Square]:
+    """
+    square of the piece of `target`'s color standing right behind `target` on the line from the line piece on
+    `attacker`, if `attacker` attacks an enemy piece on `target`
+    """
+    piece, other = board.piece_at(attacker), board.piece_at(target)
+    if piece is None or other is None or piece.color == other.color or \
+            piece.piece_type not in (chess.BISHOP, chess.ROOK, chess.QUEEN):
+        return None
+    if not slider_attacks(piece.piece_type, attacker, board.occupied) & chess.BB_SQUARES[target]:
+        return None
+    behind = slider_attacks(piece.piece_type, attacker, board.occupied & ~chess.BB_SQUARES[target]) & \
+        motifs.BB_BEYOND[attacker][target] & board.occupied_co[other.color]
+    return chess.lsb(behind) if behind else None
+
+
+def _has_motif(board, move, motif: int) -> bool:
+    return bool(motifs.motifs(board, move) & motif)
+
+
+def _move(move) -> chess.Move:
+    return chess.Move.from_uci(move) if isinstance(move, str) else move
+
+
+def _aggressive(board, move) -> bool:
+    """
+    a check, a capture, or a move that attacks the squares around the enemy king
+    """
+    if board.gives_check(move) or board.is_capture(move):
+        return True
+    king = board.king(not board.turn)
+    if king is None:
+        return False
+    board.push(move)
+    try:
+        return bool(board.attacks_mask(move.to_square) & chess.BB_KING_ATTACKS[king])
+    finally:
+        board.pop()
+
+
+def _threatens(board, move) -> bool:
+    """
+    does `move` give check, or set up a capture sequence that would win two pawns' worth of material (more than the
+    side to move can win right now) if it could move again?
+    """
+    if board.gives_check(move):
+        return True
+    if board.is_check():
+        return False
+    now = alphabeta.quiesce(board) - alphabeta.material(board)
+    board.push(move)
+    board.push(chess.Move.null())
+    try:
+        threat = alphabeta.quiesce(board) - alphabeta.material(board)
+    finally:
+        board.pop()
+        board.pop()
+    return threat >= 2 * alphabeta.PAWN_VALUE and threat > now
+
+
+def _root_scores(board, depth: int, max_nodes: Optional[int], moves=None) -> Optional[dict]:
+    """
+    search score of every root move, None if the budget didn't allow even one ply
+    """
+    return alphabeta.search(board, depth, max_nodes, moves=moves, all_moves=True).scores
+
+
+@register()
+def absolute_pin(board, piece_map, piece, other):
+    """
+    A pin against the king: the line piece on `piece` pins the piece on `other` to its king
+    """
+    behind = _behind(board, piece, other)
+    return behind is not None and board.piece_type_at(behind) == chess.KING
+
+
+@register(inputs=[chess.ROOK, chess.QUEEN], cost='linear')
+def alekhine_gun(board: chess.Board, color: chess.Color, ctx: PositionContext = None) -> bool:
+    """
+    doubled rooks on file with queen behind them
+    procedure:
+        if not two rooks and queen on board -> return False
+        if not all on same file -> return False
+        if not rook in front of (rook in front of queen) -> return False
+        return True
+    """
+    pm = {k: v.symbol() for k, v in context(board, ctx).piece_map.items()}
+
+    relevant_pieces, relevant_case = _relevant_pieces_cases(color)
+    piece_count = {piece: 0 for piece in relevant_pieces}
+
+    for square, piece in pm.items():
+        if piece in relevant_pieces:
+            piece_count[piece] += 1
+    if piece_count[relevant_case('r')] < 2 or piece_count[relevant_case('q')] < 1:
+        return False
+
+    rook_squares = []
+    queen_squares = []
+
+    for key, value in pm.items():
+        if value == relevant_case('q'):
+            queen_squares.append(key)
+        if value == relevant_case('r'):
+            rook_squares.append(key)
+
+    if (rook_squares[0] - rook_squares[1]) % 8 != 0:
+        return False
+
+    if (((queen_squares[0] - rook_squares[0]) % 8) != 0) or (min(queen_squares[0], min(rook_squares[0], rook_squares[1])) != queen_squares[0]):
+        return False
+
+    return True
+
+
+@register(cost='linear')
+def attacking(board: chess.Board, piece: chess.Square, ctx: PositionContext = None) -> set:
+    """
+    Set of squares a piece (given by its square) is attacking
+    """
+    return set(chess.SquareSet(context(board, ctx).attack_table.attacks_from[piece]))
+
+
+@register(cost='linear')
+def attacks(board, piece: chess.Square, other: chess.Square, ctx: PositionContext = None) -> bool:
+    """
+    if piece (given by its square) attacks a square
+    """
+    return context(board, ctx).attack_table.attacks(piece, other)
+
+
+@register(cost='linear')
+def battery(board, color, ctx: PositionContext = None) -> bool:
+    """
+    any(double rooks on (file v rank), double rook and queen on (file v rank), place bishop and queen on diagonal)
+
+    at least two continuously-moving pieces attacking/x-raying same square
+    """
+    return bool(_batteries(board, color, ctx))
+
+
+@register(cost='linear', requires=['battery'])
+def battery_king(board, color, ctx: PositionContext = None) -> bool:
+    """
+    battery AND lined up with king
+    """
+    ctx = context(board, ctx)
+    king = ctx.king(not color)
+    if king is None:
+        return False
+    for rear, front in _batteries(board, color, ctx):
+        # opponent's king on the battery's line, with the front piece between it and the rear piece
+        if chess.BB_RAYS[rear][front] & chess.BB_SQUARES[king] and chess.between(rear, king) & chess.BB_SQUARES[front]:
+            return True
+    return False
+
+
+@register('move', cost='search')
+def cheapo(board, move, depth: int = 2, max_nodes: Optional[int] = alphabeta.DEFAULT_MAX_NODES) -> bool:
+    """
+    determines whether a move is a cheapo – hoping that an opponent will be too weak to see that the move
+    is actually a bad move, a "primitive trap"
+
+    the move sets up a threat (it would win material if the opponent passed) but a `depth` ply search finds it a pawn
+    or more worse than the best move
+    """
+    move = _move(move)
+    if not _threatens(board, move):
+        return False
+    scores = _root_scores(board, depth, max_nodes)
+    return scores is not None and scores[move] <= max(scores.values()) - alphabeta.PAWN_VALUE
+
+
+@register('sequence', cost='search')
+def combination(board, move_sequence) -> bool:
+    """
+    characterized by a constrained space of move-sequences (paths on the move tree) yielding an advantage
+
+    see `move_analysis.window.combination`. unless the sequence ends in mate, the material it wins has to survive a
+    quiescence search of the final position too
+    """
+    move_sequence = [_move(move) for move in move_sequence]
+    if not window.evaluate('combination', board, move_sequence):
+        return False
+    color = board.turn
+    before = alphabeta.material(board)
+    for move in move_sequence:
+        board.push(move)
+    try:
+        if board.is_checkmate():
+            return True
+        after = alphabeta.quiesce(board)
+        if board.turn != color:
+            after = -after
+    finally:
+        for _ in move_sequence:
+            board.pop()
+    return after - before >= 2 * alphabeta.PAWN_VALUE
+
+
+@register('move', cost='search')
+def counterplay(board, move, depth: int = 2, max_nodes: Optional[int] = alphabeta.DEFAULT_MAX_NODES) -> bool:
+    """
+    when opponent has made aggressive moves recently, player responds by making similarly aggressive moves
+
+    one of the opponent's last two moves in `board.move_stack` was a check, a capture or went for the king, `move`
+    is too, and a `depth` ply search finds it no more than a pawn worse than the best move
+    """
+    move = _move(move)
+    if not _aggressive(board, move):
+        return False
+    popped = []
+    recent = False
+    try:
+        while board.move_stack and len(popped) < 3:
+            popped.append(board.pop())
+            if len(popped) % 2 == 1 and _aggressive(board, popped[-1]):
+                recent = True
+                break
+    finally:
+        for previous in reversed(popped):
+            board.push(previous)
+    if not recent:
+        return False
+    scores = _root_scores(board, depth, max_nodes)
+    return scores is not None and scores[move] >= max(scores.values()) - alphabeta.PAWN_VALUE
+
+
+@register('move')
+def cover(board, move) -> bool:
+    """
+    move that protects a piece or controls a square
+    """
+    pass
+
+
+@register('move', cost='linear')
+def cross_check(board, move) -> bool:
+    """
+    respond to check with a check.
+    previous move was a check, current move gets out of check with move that also puts opponent in check
+    """
+    return _has_motif(board, move, motifs.CROSS_CHECK)
+
+
+@register('move')
+def decoy(board, move) -> bool:
+    """
+    tactic used to lure a piece to particular squaree.
+
+    can be characterized by short-sighted gain, e.g. check or winning material, but looking far enough ahead
+    shows that this is a mistake
+    """
+    pass
+
+
+@register('move')
+def defensive_move(board, move) -> bool:
+    """
+    response to an attack that defends piece
+    """
+    pass
+
+
+@register('move')
+def deflect(board, move) -> bool:
+    """
+    luring a piece away from a good square. cf. oveerloading
+    """
+    pass
+
+
+@register('sequence', cost='linear')
+def desperado(board, piece, move_sequence=None, ctx: PositionContext = None) -> bool:
+    """
+    * threatened piece sacrificing itself for maximum compensation
+    * ––
+
+    statically: the piece on `piece` is lost anyway (the opponent wins material capturing it) and can still capture
+    something. with a `move_sequence`, its first move has to be that capture
+    """
+    ctx = context(board, ctx)
+    color = ctx.attack_table.color_at(piece)
+    if color is None or see(board, piece, not color, ctx.zobrist) <= 0:
+        return False
+    if move_sequence:
+        move = move_sequence[0]
+        if isinstance(move, str):
+            move = chess.Move.from_uci(move)
+        return move.from_square == piece and board.is_capture(move)
+    return any(move.from_square == piece and board.is_capture(move) for move in ctx.legal_moves)
+
+
+@register('move', cost='linear')
+def discovered_attack(board, move) -> bool:
+    """
+    moving piece such that other piece it was blocking attacks a piece
+    """
+    return _has_motif(board, move, motifs.DISCOVERED_ATTACK)
+
+
+@register('move', cost='linear')
+def discovered_check(board, move) -> bool:
+    """
+    discovered attack on king
+    """
+    return _has_motif(board, move, motifs.DISCOVERED_CHECK)
+
+
+@register('move', cost='linear')
+def double_attack(board, move) -> bool:
+    """
+    one move creates two new attacks, by the moved piece or by pieces it uncovers
+    """
+    return _has_motif(board, move, motifs.DOUBLE_ATTACK)
+
+
+@register('move', cost='linear')
+def double_check(board, move) -> bool:
+    """
+    double attack such that both new attacks are on king
+    """
+    return _has_motif(board, move, motifs.DOUBLE_CHECK)
+
+
+@register(cost='linear')
+def en_prise(board, color, ctx: PositionContext = None) -> List[chess.Square]:
+    """
+    hanging pieces: squares of `color`'s pieces the opponent wins material by capturing
+    """
+    ctx = context(board, ctx)
+    table = ctx.attack_table
+    return [square for square in chess.scan_forward(ctx.occupied_co[color] & ~board.kings)
+            if table.attackers[not color][square] and see(board, square, not color, ctx.zobrist) > 0]
+
+
+@register(cost='moves')
+def family_fork(board, ctx: PositionContext = None) -> bool:
+    """
+    the side to move has a knight fork simultaneously checking and attacking queen
+    """
+    return any(bits & motifs.FAMILY_FORK for bits in context(board, ctx).motifs.values())
+
+
+@register('move', cost='search')
+def forced_move(board, move, depth: int = 2, max_nodes: Optional[int] = alphabeta.DEFAULT_MAX_NODES) -> bool:
+    """
+    the only move that doesn't lose: every other legal move scores at least two pawns worse in a `depth` ply search
+    """
+    move = _move(move)
+    moves = list(board.legal_moves)
+    if move not in moves:
+        return False
+    if len(moves) == 1:
+        return True
+    scores = _root_scores(board, depth, max_nodes, moves)
+    if scores is None:
+        return False
+    return scores[move] - max(score for other, score in scores.items() if other != move) >= \
+        2 * alphabeta.PAWN_VALUE
+
+
+@register('move', cost='linear')
+def fork(board, move) -> bool:
+    """
+    moved piece attacks two or more enemy pieces that are worth more than it or undefended (a check counts)
+    """
+    return _has_motif(board, move, motifs.FORK)
+
+
+@register('move')
+def gambit_move(board, move) -> bool:
+    pass
+
+
+@register()
+def greek_gift_sacrifice(board) -> bool:
+    """
+    Bxh7+, Bxh2+ (white – similar for black) against castled king
+    """
+    pass
+
+
+@register('move')
+def interference(board, move) -> bool:
+    """
+    interruption of line or diagonal betweeen attacked piecee and its defender using an interposing piece
+    """
+    pass
+
+
+@register('move', cost='search')
+def intermezzo(board, move, depth: int = 2, max_nodes: Optional[int] = alphabeta.DEFAULT_MAX_NODES) -> bool:
+    """
+    cf. intermediate move, zwischenzug
+
+    the last move in `board.move_stack` captured and can be taken back, but `move` is a check, a capture or a
+    threat played first instead, and a `depth` ply search finds it at least as good as the best recapture
+    """
+    move = _move(move)
+    if not board.move_stack:
+        return False
+    last = board.pop()
+    captured = board.is_capture(last)
+    board.push(last)
+    if not captured:
+        return False
+    recaptures = [other for other in board.generate_legal_captures(to_mask=chess.BB_SQUARES[last.to_square])]
+    if not recaptures or move in recaptures or not (board.is_capture(move) or _threatens(board, move)):
+        return False
+    scores = _root_scores(board, depth, max_nodes, recaptures + [move])
+    return scores is not None and scores[move] >= max(scores[other] for other in recaptures)
+
+
+@register('move', cost='linear')
+def kick(board, move, square) -> bool:
+    """
+    attacking piece on square with `move` such that the piece has to move
+    """
+    return MoveAnalysis(board, move).kick(square)
+
+
+@register(cost='linear')
+def loose_piece(board, piece, ctx: PositionContext = None) -> bool:
+    """
+    piece vulnerable to opponent attacks b/c it is undefended and cannot easily be withdrawn or supported
+
+    only the undefended part is checked: a piece other than the king that no piece of its own color protects
+    """
+    table = context(board, ctx).attack_table
+    return table.color_at(piece) is not None and board.piece_type_at(piece) != chess.KING and \
+        not table.defenders(piece)
+
+
+@register()
+def pin(board, piece, other_piece) -> bool:
+    """
+    the line piece on `piece` pins the piece on `other_piece` to a more valuable piece (or the king) behind it
+    """
+    behind = _behind(board, piece, other_piece)
+    return behind is not None and \
+        PIECE_VALUES[board.piece_type_at(behind)] > PIECE_VALUES[board.piece_type_at(other_piece)]
+
+
+@register(cost='linear')
+def poisoned_pawn(board, pawn, ctx: PositionContext = None) -> bool:
+    """
+    the pawn on `pawn` can be won by exchanging on its square, but after the first capture the pawn's owner wins
+    more than a pawn back somewhere on the board (the capturing piece got trapped or left something hanging)
+    """
+    ctx = context(board, ctx)
+    color = ctx.attack_table.color_at(pawn)
+    if color is None or board.piece_type_at(pawn) != chess.PAWN or board.turn == color:
+        return False
+    grab = exchange(board, pawn, not color, ctx.zobrist)
+    if grab.gain <= 0:
+        return False
+    try:
+        move = board.find_move(grab.sequence[0], pawn)
+    except chess.IllegalMoveError:
+        return False
+    board.push(move)
+    try:
+        opponent = board.occupied_co[not color] & ~board.kings
+        return any(see(board, square, color) > PIECE_VALUES[chess.PAWN]
+                   for square in chess.scan_forward(opponent) if board.is_attacked_by(color, square))
+    finally:
+        board.pop()
+
+
+@register('move')
+def positional_sacrifice(board, move) -> bool:
+    pass
+
+
+@register('move')
+def pseudo_sacrifice(board, move) -> bool:
+    pass
+
+
+@register('move')
+def sacrifice(board, move) -> bool:
+    pass
+
+
+@register('move')
+def sham_sacrifice(board, move) -> bool:
+    pass
+
+
+@register('move', cost='linear')
+def skewer(board, move) -> bool:
+    """
+    moved line piece attacks a valuable piece with a cheaper (or undefended) one behind it
+    """
+    return _has_motif(board, move, motifs.SKEWER)
+
+
+@register(cost='linear')
+def tension(board, ctx: PositionContext = None) -> List[Exchange]:
+    """
+    A position in which there are one or more exchanges possible. Represented as
+
+    * how many possible exchanges there are
+    * what the exchange combos are
+    * what squares are involveed
+
+    as one `Exchange` per attacked piece (kings aside), started by the attacking side: its length is the number of
+    exchanges, `sequence` the capturing pieces in order and `square` where it happens
+    """
+    ctx = context(board, ctx)
+    table = ctx.attack_table
+    exchanges = []
+    for color in chess.COLORS:
+        for square in chess.scan_forward(ctx.occupied_co[not color] & ~board.kings):
+            if table.attackers[color][square]:
+                exchanges.append(exchange(board, square, color, ctx.zobrist))
+    return exchanges
+
+
+# TODO: implement `thematic` move?
+
+
+@register(cost='linear')
+def threatening(board, piece: chess.Square, ctx: PositionContext = None) -> Set:
+    """
+    set of pieces (their squares) that `piece` threatens at a given board state
+    """
+    table = context(board, ctx).attack_table
+    color = table.color_at(piece)
+    if color is None:
+        return set()
+    return set(chess.SquareSet(table.attacks_from[piece] & table.occupied_co[not color]))
+
+
+@register('move')
+def unpinning(board, move) -> bool:
+    pass
+
+
+@register('move')
+def vacating_sacrifice(board, move) -> bool:
+    pass
+
+
+@register('sequence', cost='moves')
+def windmill(board, move_sequence) -> bool:
+    """
+    the side to move wins material with two or more captures that each uncover check
+    """
+    return window.evaluate('windmill', board, move_sequence)
+
+
+@register(cost='linear')
+def x_ray(board, attacking_piece: chess.Square, attacked_piece: chess.Square, ctx: PositionContext = None) -> bool:
+    """
+    line piece on `attacking_piece` attacks `attacked_piece` through exactly one piece in between
+    """
+    return context(board, ctx).attack_table.xrays(attacking_piece, attacked_piece)
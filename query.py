@@ -0,0 +1,271 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+import argparse
+import json
+import os
+import re
+import sys
+
+import numpy as np
+
+from board_analysis.features import popcount
+from store import PositionStore
+
+
+"""
+inverted index over a `PositionStore`: for every property bit of the store, the ids (record numbers) of the
+positions where it is set. a bitmap is kept as sorted uint32 ids when fewer than one position in 32 has the bit
+(that is smaller than a bitmap), and as packed uint64 words otherwise. every bitmap is its own .npy file, loaded
+memory-mapped.
+
+queries are boolean expressions over bit names. sparse operands stay sorted ids while they are combined with each
+other (intersect / union) or ANDed with a dense one (a bit test per id); only OR with a dense operand and NOT make
+words, which are combined word-wise:
+
+    alekhine_gun.white and isolani.white and back_rank_weakness.black
+    (isolated_pawn.white or doubled_pawns.white) and not passed_pawns.black
+
+a property that takes a color means either color when its name is used alone. matching ids link back to the
+(game, ply) they came from through the store. only the store's bits are indexed (see `store.default_schema`): move
+properties such as fork or skewer describe a move rather than a position and are not in it, nor are properties
+without a boolean value.
+"""
+
+
+_SPARSE_RATIO = 32
+
+
+def _words(bits: np.ndarray) -> np.ndarray:
+    """
+    boolean array -> little-endian packed uint64 words
+    """
+    packed = np.packbits(bits, bitorder='little')
+    padded = np.zeros(-(-len(packed) // 8) * 8, dtype=np.uint8)
+    padded[:len(packed)] = packed
+    return padded.view(np.uint64)
+
+
+def _ids_to_words(ids: np.ndarray, size: int) -> np.ndarray:
+    bits = np.zeros(size, dtype=bool)
+    bits[ids] = True
+    return _words(bits)
+
+
+def _sparse(bitmap: np.ndarray) -> bool:
+    """
+    a bitmap is either sorted uint32 ids or packed uint64 words
+    """
+    return bitmap.dtype == np.uint32
+
+
+def _dense(bitmap: np.ndarray, size: int) -> np.ndarray:
+    return _ids_to_words(bitmap, size) if _sparse(bitmap) else bitmap
+
+
+def _and(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if _sparse(a) and _sparse(b):
+        return np.intersect1d(a, b, assume_unique=True)
+    if _sparse(b):
+        a, b = b, a
+    if _sparse(a):
+        held = (b[a >> 6] >> (a & 63).astype(np.uint64)) & np.uint64(1)
+        return a[held.astype(bool)]
+    return a & b
+
+
+def _or(a: np.ndarray, b: np.ndarray, size: int) -> np.ndarray:
+    if _sparse(a) and _sparse(b):
+        return np.union1d(a, b)
+    return _dense(a, size) | _dense(b, size)
+
+
+class PropertyIndex(object):
+    def __init__(self, directory: str, store: Optional[PositionStore] = None):
+        self.directory = directory
+        with open(os.path.join(directory, 'index.json')) as f:
+            meta = json.load(f)
+        self.size: int = meta['size']
+        self.columns: Dict[str, Dict] = meta['columns']
+        self.store = store
+        self._loaded: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def build(cls, store: PositionStore, directory: str) -> 'PropertyIndex':
+        """
+        index every property bit of `store` into `directory`, replacing an older index there
+        """
+        os.makedirs(directory, exist_ok=True)
+        size = len(store)
+        columns = {}
+        for i, bit in enumerate(store.schema.bits):
+            column = store.column(bit)
+            count = int(column.sum())
+            filename = '{}.npy'.format(i)
+            if count * _SPARSE_RATIO < size:
+                np.save(os.path.join(directory, filename), np.flatnonzero(column).astype(np.uint32))
+                kind = 'sparse'
+            else:
+                np.save(os.path.join(directory, filename), _words(column))
+                kind = 'dense'
+            columns[bit] = {'kind': kind, 'file': filename, 'count': count}
+        with open(os.path.join(directory, 'index.json'), 'w') as f:
+            json.dump({'size': size, 'columns': columns}, f)
+        return cls(directory, store)
+
+    def bitmap(self, name: str) -> np.ndarray:
+        """
+        the positions where `name` holds, as stored: sorted ids for a sparse column, packed words for a dense one. a
+        colored property without a color is either color
+        """
+        if name not in self.columns:
+            colored = [name + '.white', name + '.black']
+            if not all(bit in self.columns for bit in colored):
+                raise ValueError('{} is not in the index'.format(name))
+            return _or(self.bitmap(colored[0]), self.bitmap(colored[1]), self.size)
+        if name not in self._loaded:
+            column = self.columns[name]
+            self._loaded[name] = np.load(os.path.join(self.directory, column['file']), mmap_mode='r')
+        return self._loaded[name]
+
+    def everything(self) -> np.ndarray:
+        return _words(np.ones(self.size, dtype=bool))
+
+    def query(self, expression: str) -> 'QueryResult':
+        return QueryResult(self, _Parser(self, expression).parse())
+
+
+class QueryResult(object):
+    def __init__(self, index: PropertyIndex, bitmap: np.ndarray):
+        self.index = index
+        self.bitmap = bitmap
+
+    def __len__(self) -> int:
+        if _sparse(self.bitmap):
+            return len(self.bitmap)
+        return int(popcount(self.bitmap).sum())
+
+    @property
+    def words(self) -> np.ndarray:
+        return _dense(self.bitmap, self.index.size)
+
+    def ids(self) -> np.ndarray:
+        if _sparse(self.bitmap):
+            return self.bitmap.astype(np.int64)
+        bits = np.unpackbits(self.bitmap.view(np.uint8), bitorder='little')[:self.index.size]
+        return np.flatnonzero(bits)
+
+    def origins(self) -> Iterator[Tuple[int, int]]:
+        """
+        (game, ply) of every matching position
+        """
+        if self.index.store is None:
+            raise ValueError('index was opened without its store')
+        records = self.index.store.records
+        ids = self.ids()
+        for game, ply in zip(records['game'][ids], records['ply'][ids]):
+            yield int(game), int(ply)
+
+
+_TOKEN = re.compile(r'\s*(\(|\)|[A-Za-z_][A-Za-z0-9_.]*)')
+
+
+class _Parser(object):
+    """
+    expression := term ('or' term)*, term := factor ('and' factor)*, factor := 'not' factor | '(' expression ')' |
+    name
+    """
+    def __init__(self, index: PropertyIndex, text: str):
+        self.index = index
+        self.tokens = self._tokenize(text)
+        self.position = 0
+
+    @staticmethod
+    def _tokenize(text: str) -> List[str]:
+        tokens = []
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            match = _TOKEN.match(text, position)
+            if match is None:
+                raise ValueError('bad query at {!r}'.format(text[position:]))
+            tokens.append(match.group(1))
+            position = match.end()
+        return tokens
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _take(self) -> str:
+        token = self._peek()
+        if token is None:
+            raise ValueError('query ends too early')
+        self.position += 1
+        return token
+
+    def parse(self) -> np.ndarray:
+        bitmap = self._expression()
+        if self._peek() is not None:
+            raise ValueError('unexpected {!r} in query'.format(self._peek()))
+        return bitmap
+
+    def _expression(self) -> np.ndarray:
+        bitmap = self._term()
+        while self._peek() == 'or':
+            self._take()
+            bitmap = _or(bitmap, self._term(), self.index.size)
+        return bitmap
+
+    def _term(self) -> np.ndarray:
+        bitmap = self._factor()
+        while self._peek() == 'and':
+            self._take()
+            bitmap = _and(bitmap, self._factor())
+        return bitmap
+
+    def _factor(self) -> np.ndarray:
+        token = self._take()
+        if token == 'not':
+            return ~_dense(self._factor(), self.index.size) & self.index.everything()
+        if token == '(':
+            bitmap = self._expression()
+            if self._take() != ')':
+                raise ValueError('missing )')
+            return bitmap
+        if token == ')':
+            raise ValueError('unexpected )')
+        return self.index.bitmap(token)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='query the property index of a position store')
+    parser.add_argument('store', help='position store written by main.py --store')
+    parser.add_argument('query', help="e.g. 'alekhine_gun.white and isolani.white and back_rank_weakness.black'")
+    parser.add_argument('--index', help='index directory (default: <store>.index)')
+    parser.add_argument('--rebuild', action='store_true', help='rebuild the index from the store first')
+    parser.add_argument('-n', '--limit', type=int, default=20, help='print at most this many (game, ply) pairs')
+    args = parser.parse_args(argv)
+
+    store = PositionStore(args.store)
+    directory = args.index or args.store + '.index'
+    if args.rebuild or not os.path.exists(os.path.join(directory, 'index.json')):
+        index = PropertyIndex.build(store, directory)
+    else:
+        index = PropertyIndex(directory, store)
+    if index.size != len(store):
+        print('index is out of date, rebuild with --rebuild', file=sys.stderr)
+        return 1
+
+    try:
+        result = index.query(args.query)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print('{} positions'.format(len(result)))
+    for i, (game, ply) in enumerate(result.origins()):
+        if i == args.limit:
+            break
+        print('game {} ply {}'.format(game, ply))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+import collections
+import functools
+import importlib
+import random
+import time
+
+import chess
+
+
+"""
+registry of every property function, filled in by the `register` decorator as `properties` is imported. each entry
+records what the property is about (a position, a move or a move sequence), which pieces it reads, roughly how
+expensive it is and which other properties it is built from, so callers can find properties without parsing source
+and schedulers can decide what to compute and what to rerun.
+
+timing is opt-in: `enable_instrumentation()` starts counting calls and cumulative time per property and keeps a
+sampled trace of individual calls; nothing is measured (or printed) otherwise.
+
+`properties` only imports its category modules on demand, so it `declare`s which module defines each name up front;
+`spec(name)` imports that module the first time the name is asked for, and `names()` loads whatever it needs.
+"""
+
+
+KINDS = ('position', 'move', 'sequence')
+
+# rough cost of one call, cheapest first
+COST_CLASSES = ('constant', 'linear', 'moves', 'search')
+
+
+class PropertySpec(object):
+    """
+    * `kind` – what the property describes: 'position', 'move' or 'sequence'
+    * `inputs` – piece types (and 'material' for captures/promotions) whose placement the property reads, or None
+      when it depends on the whole position
+    * `cost` – one of `COST_CLASSES`, or None if not yet known
+    * `depends` – properties this one is built from (see `scheduler`)
+    * `requires` – the subset of `depends` that must hold for this property to hold at all
+    """
+    __slots__ = ['name', 'fn', 'kind', 'inputs', 'cost', 'depends', 'requires']
+
+    def __init__(self, name: str, fn: Callable, kind: str, inputs: Optional[FrozenSet], cost: Optional[str],
+                 depends: Tuple[str, ...] = (), requires: Tuple[str, ...] = ()):
+        self.name = name
+        self.fn = fn
+        self.kind = kind
+        self.inputs = inputs
+        self.cost = cost
+        self.depends = depends
+        self.requires = requires
+
+    def __repr__(self) -> str:
+        return 'PropertySpec({!r}, kind={!r}, inputs={!r}, cost={!r})'.format(
+            self.name, self.kind, sorted(map(str, self.inputs)) if self.inputs is not None else None, self.cost)
+
+
+REGISTRY: Dict[str, PropertySpec] = collections.OrderedDict()
+
+# property name -> module that registers it, for properties that have not been imported yet
+_LAZY: Dict[str, str] = collections.OrderedDict()
+
+
+class _Instrumentation(object):
+    def __init__(self, sample_rate: float, trace_size: int):
+        self.sample_rate = sample_rate
+        self.calls = collections.Counter()
+        self.seconds = collections.Counter()
+        self.trace = collections.deque(maxlen=trace_size)
+
+
+_instrumentation: Optional[_Instrumentation] = None
+
+
+def register(kind: str = 'position', inputs=None, cost: Optional[str] = None, depends: Sequence[str] = (),
+             requires: Sequence[str] = ()) -> Callable[[Callable], Callable]:
+    assert kind in KINDS
+    assert cost is None or cost in COST_CLASSES
+    inputs = frozenset(inputs) if inputs is not None else None
+    # anything required is also a dependency
+    depends = tuple(depends) + tuple(name for name in requires if name not in depends)
+
+    def decorator(fn: Callable) -> Callable:
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            instrumentation = _instrumentation
+            if instrumentation is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                instrumentation.calls[name] += 1
+                instrumentation.seconds[name] += elapsed
+                if random.random() < instrumentation.sample_rate:
+                    board = args[0] if args else None
+                    fen = board.fen() if isinstance(board, chess.Board) else None
+                    instrumentation.trace.append((name, elapsed, fen))
+
+        REGISTRY[name] = PropertySpec(name, wrapper, kind, inputs, cost, depends, tuple(requires))
+        return wrapper
+
+    return decorator
+
+
+def declare(modules: Dict[str, str]) -> None:
+    """
+    record that each property name is registered by importing the given module
+    """
+    for name, module in modules.items():
+        if name not in REGISTRY:
+            _LAZY[name] = module
+
+
+def spec(name: str) -> PropertySpec:
+    """
+    the spec of `name`, importing the module that registers it if needed. raises KeyError for unknown names
+    """
+    try:
+        return REGISTRY[name]
+    except KeyError:
+        module = _LAZY.pop(name, None)
+        if module is None:
+            raise
+    importlib.import_module(module)
+    return REGISTRY[name]
+
+
+def load_all() -> None:
+    for module in sorted(set(_LAZY.values())):
+        importlib.import_module(module)
+    _LAZY.clear()
+
+
+def names(kind: Optional[str] = None) -> List[str]:
+    load_all()
+    return [name for name, spec in REGISTRY.items() if kind is None or spec.kind == kind]
+
+
+def enable_instrumentation(sample_rate: float = 0.01, trace_size: int = 10000) -> None:
+    """
+    start counting calls and time per property, keeping roughly `sample_rate` of the calls in a trace of at most
+    `trace_size` entries. resets any earlier counts
+    """
+    global _instrumentation
+    _instrumentation = _Instrumentation(sample_rate, trace_size)
+
+
+def disable_instrumentation() -> None:
+    global _instrumentation
+    _instrumentation = None
+
+
+def instrumentation_report() -> Dict[str, Any]:
+    """
+    per-property call counts and cumulative time, most expensive first, plus the sampled trace as
+    (name, seconds, fen) tuples
+    """
+    instrumentation = _instrumentation
+    if instrumentation is None:
+        return {'properties': {}, 'trace': []}
+    report = collections.OrderedDict()
+    for name, seconds in instrumentation.seconds.most_common():
+        calls = instrumentation.calls[name]
+        report[name] = {'calls': calls, 'total_s': seconds, 'mean_us': seconds / calls * 1e6}
+    return {'properties': report, 'trace': list(instrumentation.trace)}
@@ -0,0 +1,111 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import inspect
+
+import chess
+
+from board_analysis.context import PositionContext
+from registry import names as registered_names, spec
+
+
+"""
+evaluation of position-level properties in dependency order. properties declare what they are built from with
+`register(depends=..., requires=...)`; a requested subset is expanded to its dependency closure and ordered
+topologically, every intermediate is computed once per position (results live on the `PositionContext`), and a
+property whose `requires` came back false is not computed at all: it is false too, and so is everything gated on it.
+"""
+
+
+_BINDINGS: Dict[str, Optional[Tuple[Callable, bool, bool, bool]]] = {}
+
+
+def binding(name: str) -> Optional[Tuple[Callable, bool, bool, bool]]:
+    """
+    how a property is called on a bare position: (function, takes color, takes piece_map, takes ctx), or None if it
+    needs arguments a position can't supply (a move, a square, a piece, ...)
+    """
+    if name not in _BINDINGS:
+        fn = spec(name).fn
+        parameters = list(inspect.signature(fn).parameters.values())[1:]
+        names = {p.name for p in parameters}
+        required = {p.name for p in parameters if p.default is inspect.Parameter.empty}
+        if required - {'color', 'piece_map'}:
+            _BINDINGS[name] = None
+        else:
+            _BINDINGS[name] = (fn, 'color' in names, 'piece_map' in names, 'ctx' in names)
+    return _BINDINGS[name]
+
+
+def schedule(names: Iterable[str]) -> List[str]:
+    """
+    `names` plus everything they depend on, each after all of its dependencies
+    """
+    order = []
+    state = {}
+
+    def visit(name, path):
+        if state.get(name) == 'done':
+            return
+        if state.get(name) == 'visiting':
+            raise ValueError('dependency cycle: ' + ' -> '.join(path + [name]))
+        dependencies = spec(name).depends
+        state[name] = 'visiting'
+        for dependency in dependencies:
+            visit(dependency, path + [name])
+        state[name] = 'done'
+        order.append(name)
+
+    for name in names:
+        visit(name, [])
+    return order
+
+
+def _call(name: str, board: chess.Board, ctx: PositionContext, colors: List[chess.Color]) -> Any:
+    fn, takes_color, takes_piece_map, takes_ctx = binding(name)
+    kwargs = {}
+    if takes_piece_map:
+        kwargs['piece_map'] = ctx.piece_map
+    if takes_ctx:
+        kwargs['ctx'] = ctx
+    if takes_color:
+        return {color: fn(board, color=color, **kwargs) if color in colors else False for color in chess.COLORS}
+    return fn(board, **kwargs) if colors else False
+
+
+def _open_colors(name: str, ctx: PositionContext) -> List[chess.Color]:
+    """
+    colors for which every required property of `name` held. a required property without a color gates both
+    colors; a property without a color is computed if any color is left
+    """
+    colors = list(chess.COLORS)
+    for required in spec(name).requires:
+        value = ctx.results[required]
+        if isinstance(value, dict):
+            colors = [color for color in colors if value[color]]
+        elif not value:
+            colors = []
+    return colors
+
+
+def evaluate(board: chess.Board, names: Optional[Iterable[str]] = None, ctx: Optional[PositionContext] = None,
+             skip_unbound: bool = False) -> Dict[str, Any]:
+    """
+    values of the position-level properties `names` (all registered ones if None) for `board`. properties taking a
+    `color` are evaluated for both players and reported as `{chess.WHITE: ..., chess.BLACK: ...}`.
+
+    a property that needs a move, square or piece raises ValueError, or is left out with `skip_unbound`
+    """
+    if names is None:
+        names = registered_names()
+        skip_unbound = True
+    names = [name for name in names if not skip_unbound or binding(name) is not None]
+    ctx = ctx if ctx is not None else PositionContext(board)
+    results = ctx.results
+
+    for name in schedule(names):
+        if name in results:
+            continue
+        if binding(name) is None:
+            raise ValueError('{} needs more than a position to be evaluated'.format(name))
+        results[name] = _call(name, board, ctx, _open_colors(name, ctx))
+
+    return {name: results[name] for name in names}
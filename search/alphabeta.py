@@ -0,0 +1,424 @@
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import time
+
+import chess
+
+from search.transposition import TranspositionTable, pack_move, push_hashed, unpack_move, zobrist_hash
+
+
+"""
+bounded-depth alpha-beta search shared by the properties that need to look ahead. one `Search` runs negamax with
+alpha-beta pruning on a single board with push/pop, deepening one ply at a time up to the depth it was asked for,
+with a quiescence search over captures at the leaves so that scores aren't taken in the middle of an exchange.
+
+* budgets: `max_nodes` and `max_time` (seconds) bound every call. when either runs out, the call returns the
+  result of the deepest iteration it finished (`complete` is then False), so the latency of a property is
+  predictable whatever the position
+* move ordering: the transposition table move, then killer moves, then the `order` hook (higher first; by default
+  captures by most valuable victim / least valuable attacker, and promotions)
+* the transposition table is keyed by zobrist hash and bounded (see `search.transposition`); the same table can be
+  shared between calls that use the same evaluation
+* every result carries the nodes searched, the time taken and nodes per second
+* a `stop` callable is polled along with the clock, so another process can call a search off (see `search.parallel`)
+
+scores are centipawns from the point of view of the side to move; a mate in n plies scores `MATE - n`.
+"""
+
+
+MATE = 100000
+# scores beyond this are mates
+MATE_BOUND = MATE - 1000
+
+PAWN_VALUE = 100
+VALUES = {chess.PAWN: 100, chess.KNIGHT: 300, chess.BISHOP: 300, chess.ROOK: 500, chess.QUEEN: 900, chess.KING: 0}
+
+DEFAULT_MAX_NODES = 20000
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+_CHECK_EVERY = 256
+
+
+def material(board: chess.Board) -> int:
+    """
+    material balance in centipawns for the side to move
+    """
+    score = 0
+    for piece_type in (chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN):
+        score += VALUES[piece_type] * (chess.popcount(board.pieces_mask(piece_type, board.turn)) -
+                                       chess.popcount(board.pieces_mask(piece_type, not board.turn)))
+    return score
+
+
+def mvv_lva(board: chess.Board, move: chess.Move) -> int:
+    """
+    ordering key: captures of the most valuable piece by the least valuable one first, then promotions
+    """
+    key = 0
+    if board.is_capture(move):
+        victim = chess.PAWN if board.is_en_passant(move) else board.piece_type_at(move.to_square)
+        key += 10 * VALUES[victim] - VALUES[board.piece_type_at(move.from_square)] + 10000
+    if move.promotion:
+        key += VALUES[move.promotion] + 5000
+    return key
+
+
+def is_mate_score(score: int) -> bool:
+    return abs(score) >= MATE_BOUND
+
+
+class SearchResult(object):
+    """
+    * `score` – of the searched position for the side to move, `move` – best move, `line` – principal variation
+    * `depth` – deepest iteration finished, `complete` – False if the budget ran out before `depth` was reached
+    * `scores` – with `Search.run(all_moves=True)`, the score of every root move
+    """
+    def __init__(self, score: int, move: Optional[chess.Move], line: List[chess.Move], depth: int, nodes: int,
+                 elapsed: float, complete: bool, scores: Optional[Dict[chess.Move, int]] = None):
+        self.score = score
+        self.move = move
+        self.line = line
+        self.depth = depth
+        self.nodes = nodes
+        self.elapsed = elapsed
+        self.complete = complete
+        self.scores = scores
+
+    @property
+    def nps(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return 'SearchResult(score={}, move={}, depth={}, nodes={}, nps={:.0f}, complete={})'.format(
+            self.score, self.move.uci() if self.move else None, self.depth, self.nodes, self.nps, self.complete)
+
+
+class _OutOfBudget(Exception):
+    pass
+
+
+class Search(object):
+    """
+    `evaluate(board)` scores a quiet position for the side to move, `order(board, move)` ranks moves for ordering.
+    a shared `table` must only ever see one `evaluate`
+    """
+    def __init__(self, evaluate: Callable[[chess.Board], int] = material,
+                 order: Callable[[chess.Board, chess.Move], int] = mvv_lva, table: Optional[TranspositionTable] = None,
+                 max_nodes: Optional[int] = DEFAULT_MAX_NODES, max_time: Optional[float] = None,
+                 quiescence: bool = True, stop: Optional[Callable[[], bool]] = None):
+        self.evaluate = evaluate
+        self.order = order
+        self.table = table if table is not None else TranspositionTable(1 << 16)
+        self.max_nodes = max_nodes
+        self.max_time = max_time
+        self.quiescence = quiescence
+        self.stop = stop
+        self.nodes = 0
+        self.total_nodes = 0
+        self.total_time = 0.0
+        self._deadline: Optional[float] = None
+        self._node_limit: Optional[int] = None
+        self._killers: List[List[Optional[chess.Move]]] = []
+        self._keys: List[int] = []
+        self._board: Optional[chess.Board] = None
+
+    @property
+    def nps(self) -> float:
+        """
+        nodes per second over every call so far
+        """
+        return self.total_nodes / self.total_time if self.total_time > 0 else 0.0
+
+    def run(self, board: chess.Board, depth: int, moves: Optional[Sequence[chess.Move]] = None,
+            all_moves: bool = False) -> SearchResult:
+        """
+        search `board` (left as it was) to `depth` plies, over `moves` at the root if given. with `all_moves`, every
+        root move gets an exact score (in `scores`) instead of just a bound
+        """
+        start = time.perf_counter()
+        self._begin(board, start)
+        root_moves = list(moves) if moves is not None else list(board.generate_legal_moves())
+        restricted = moves is not None and len(set(root_moves)) < board.legal_moves.count()
+        result = SearchResult(self._leaf_score(), None, [], 0, 0, 0.0, True)
+        if not root_moves:
+            result.score = -MATE if board.is_check() else 0
+        try:
+            for d in range(1, depth + 1):
+                if not root_moves:
+                    break
+                scores = self._root(root_moves, d, all_moves, restricted)
+                root_moves.sort(key=lambda move: -scores[move])
+                best = root_moves[0]
+                result = SearchResult(scores[best], best, self._line(best, d), d, 0, 0.0, True,
+                                      scores if all_moves else None)
+                if is_mate_score(scores[best]) and scores[best] > 0 and not all_moves:
+                    break
+        except _OutOfBudget:
+            result.complete = False
+        finally:
+            self._finish(board)
+        result.nodes = self.nodes
+        result.elapsed = time.perf_counter() - start
+        self.total_nodes += self.nodes
+        self.total_time += result.elapsed
+        return result
+
+    def score_moves(self, board: chess.Board, depth: int,
+                    moves: Optional[Sequence[chess.Move]] = None) -> SearchResult:
+        """
+        exact score of every root move at `depth`, in `scores`
+        """
+        return self.run(board, depth, moves, all_moves=True)
+
+    def score(self, board: chess.Board, depth: int, ply: int = 0, alpha: int = -MATE,
+              beta: int = MATE) -> Optional[int]:
+        """
+        score of `board` searched `depth` plies in the window (`alpha`, `beta`), None if the budget ran out. `ply`
+        is how far `board` is from the root the score will be reported to, for mate distances
+        """
+        start = time.perf_counter()
+        self._begin(board, start)
+        try:
+            return self._negamax(depth, alpha, beta, ply)
+        except _OutOfBudget:
+            return None
+        finally:
+            self._finish(board)
+            self.total_nodes += self.nodes
+            self.total_time += time.perf_counter() - start
+
+    def line(self, board: chess.Board, first: chess.Move, depth: int) -> List[chess.Move]:
+        """
+        principal variation of at most `depth` moves starting with `first`, read from the transposition table
+        """
+        self._begin(board, time.perf_counter())
+        try:
+            return self._line(first, depth)
+        finally:
+            self._finish(board)
+
+    def quiesce(self, board: chess.Board) -> int:
+        """
+        score of `board` once the captures are played out
+        """
+        start = time.perf_counter()
+        self._begin(board, start)
+        try:
+            return self._quiesce(-MATE, MATE, 0)
+        except _OutOfBudget:
+            return self.evaluate(board)
+        finally:
+            self._finish(board)
+            self.total_nodes += self.nodes
+            self.total_time += time.perf_counter() - start
+
+    def _begin(self, board: chess.Board, start: float) -> None:
+        self._board = board
+        self._keys = [zobrist_hash(board)]
+        self._stack = len(board.move_stack)
+        self.nodes = 0
+        self._node_limit = self.max_nodes
+        self._deadline = start + self.max_time if self.max_time is not None else None
+        self._killers = [[None, None] for _ in range(64)]
+
+    def _finish(self, board: chess.Board) -> None:
+        while len(board.move_stack) > self._stack:
+            board.pop()
+        self._board = None
+
+    def _push(self, move: chess.Move) -> None:
+        self.nodes += 1
+        if self._node_limit is not None and self.nodes > self._node_limit:
+            raise _OutOfBudget()
+        if self.nodes % _CHECK_EVERY == 0 and (self._deadline is not None and time.perf_counter() > self._deadline or
+                                               self.stop is not None and self.stop()):
+            raise _OutOfBudget()
+        self._keys.append(push_hashed(self._board, move, self._keys[-1]))
+
+    def _pop(self) -> None:
+        self._board.pop()
+        self._keys.pop()
+
+    def _leaf_score(self) -> int:
+        return self.evaluate(self._board)
+
+    def _root(self, moves: List[chess.Move], depth: int, all_moves: bool, restricted: bool) -> Dict[chess.Move, int]:
+        """
+        scores of the root `moves`. when they are only some of the legal moves (`restricted`) the best of them is
+        only a lower bound on the position, and goes into the table as one
+        """
+        scores = {}
+        alpha = -MATE
+        for move in moves:
+            self._push(move)
+            try:
+                if all_moves:
+                    score = -self._negamax(depth - 1, -MATE, MATE, 1)
+                else:
+                    score = -self._negamax(depth - 1, -MATE, -alpha, 1)
+            finally:
+                self._pop()
+            scores[move] = score
+            alpha = max(alpha, score)
+        best = max(moves, key=lambda move: scores[move])
+        self.table.store(self._keys[-1], (depth, scores[best], LOWER if restricted else EXACT, best))
+        return scores
+
+    def _ordered(self, moves: List[chess.Move], first: Optional[chess.Move], ply: int) -> List[chess.Move]:
+        board = self._board
+        killers = self._killers[ply] if ply < len(self._killers) else [None, None]
+        keyed = []
+        for move in moves:
+            if move == first:
+                key = 1 << 30
+            elif move in killers and not board.is_capture(move):
+                key = 1 << 20
+            else:
+                key = self.order(board, move)
+            keyed.append((key, move))
+        keyed.sort(key=lambda pair: -pair[0])
+        return [move for _, move in keyed]
+
+    def _negamax(self, depth: int, alpha: int, beta: int, ply: int) -> int:
+        board = self._board
+        key = self._keys[-1]
+        if key in self._keys[-5:-1:2] or board.halfmove_clock >= 100 or board.is_insufficient_material():
+            return 0
+
+        entry = self.table.get(key)
+        first = None
+        if entry is not None:
+            entry_depth, entry_score, flag, first = entry
+            if entry_depth >= depth:
+                score = _from_table(entry_score, ply)
+                if flag == EXACT or (flag == LOWER and score >= beta) or (flag == UPPER and score <= alpha):
+                    return score
+
+        if depth <= 0:
+            return self._quiesce(alpha, beta, ply) if self.quiescence else self._leaf_score()
+        moves = list(board.generate_legal_moves())
+        if not moves:
+            return -(MATE - ply) if board.is_check() else 0
+
+        original_alpha = alpha
+        best_score, best_move = -MATE, None
+        for move in self._ordered(moves, first, ply):
+            self._push(move)
+            try:
+                score = -self._negamax(depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                self._pop()
+            if score > best_score:
+                best_score, best_move = score, move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if not board.is_capture(move) and ply < len(self._killers):
+                    killers = self._killers[ply]
+                    if move != killers[0]:
+                        killers[1], killers[0] = killers[0], move
+                break
+
+        flag = UPPER if best_score <= original_alpha else LOWER if best_score >= beta else EXACT
+        self.table.store(key, (depth, _to_table(best_score, ply), flag, best_move))
+        return best_score
+
+    def _quiesce(self, alpha: int, beta: int, ply: int) -> int:
+        board = self._board
+        if board.is_check():
+            moves = list(board.generate_legal_moves())
+            if not moves:
+                return -(MATE - ply)
+            stand_pat = -MATE
+        else:
+            stand_pat = self._leaf_score()
+            if stand_pat >= beta:
+                return stand_pat
+            moves = list(board.generate_legal_captures())
+            moves.extend(move for move in board.generate_legal_moves(board.pawns, chess.BB_BACKRANKS & ~board.occupied))
+        alpha = max(alpha, stand_pat)
+        best = stand_pat
+        moves.sort(key=lambda move: -self.order(board, move))
+        for move in moves:
+            self._push(move)
+            try:
+                score = -self._quiesce(-beta, -alpha, ply + 1)
+            finally:
+                self._pop()
+            if score > best:
+                best = score
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+        return best
+
+    def _line(self, first: chess.Move, depth: int) -> List[chess.Move]:
+        """
+        principal variation from the table, starting with `first`
+        """
+        board = self._board
+        line = [first]
+        pushed = 0
+        try:
+            self._keys.append(push_hashed(board, first, self._keys[-1]))
+            pushed += 1
+            while len(line) < depth:
+                entry = self.table.get(self._keys[-1])
+                if entry is None or entry[3] is None or not board.is_legal(entry[3]):
+                    break
+                line.append(entry[3])
+                self._keys.append(push_hashed(board, entry[3], self._keys[-1]))
+                pushed += 1
+        finally:
+            for _ in range(pushed):
+                self._pop()
+        return line
+
+
+def _pack(entry: Tuple[int, int, int, Optional[chess.Move]]) -> int:
+    depth, score, flag, move = entry
+    return pack_move(move) | flag << 16 | min(depth, 255) << 18 | (score + (1 << 31)) << 26
+
+
+def _unpack(data: int) -> Tuple[int, int, int, Optional[chess.Move]]:
+    return data >> 18 & 255, (data >> 26) - (1 << 31), data >> 16 & 3, unpack_move(data & 0xffff)
+
+
+# packs table entries into one word for a `SharedTable`
+CODEC = (_pack, _unpack)
+
+
+def _to_table(score: int, ply: int) -> int:
+    """
+    mate scores are stored as distance from the stored position, not from the root
+    """
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _from_table(score: int, ply: int) -> int:
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+_TABLE = TranspositionTable(1 << 18)
+
+
+def search(board: chess.Board, depth: int, max_nodes: Optional[int] = DEFAULT_MAX_NODES,
+           max_time: Optional[float] = None, moves: Optional[Sequence[chess.Move]] = None,
+           all_moves: bool = False) -> SearchResult:
+    """
+    material search of `board` to `depth` plies with the process-wide transposition table
+    """
+    return Search(table=_TABLE, max_nodes=max_nodes, max_time=max_time).run(board, depth, moves, all_moves)
+
+
+def quiesce(board: chess.Board, max_nodes: Optional[int] = DEFAULT_MAX_NODES) -> int:
+    return Search(table=_TABLE, max_nodes=max_nodes).quiesce(board)
@@ -0,0 +1,234 @@
+from typing import Callable, List, Optional, Tuple
+
+import chess
+
+from search.transposition import TranspositionTable, pack_move, push_hashed, unpack_move, zobrist_hash
+
+
+"""
+forced-mate solver. the move tree is an and/or tree: at the attacker's nodes one mating move is enough, at the
+defender's nodes every reply has to be mated. the search runs on a single board with push/pop, proves the shortest
+mate by iterative deepening, and remembers proven/refuted nodes in a bounded transposition table.
+"""
+
+
+_UNPROVEN = 1 << 30
+
+_CHECK_EVERY = 1024
+
+# xor'ed into every key, so the entries of a table are only ever read back by searches with the same defender
+_DEFENDER_KEYS = {chess.WHITE: 0, chess.BLACK: 0x9d39247e33776d41}
+
+
+class Stopped(Exception):
+    """
+    raised out of a search whose `stop` callable returned True
+    """
+
+
+class MateResult(object):
+    """
+    outcome of a mate search. truthy iff a forced mate was found, so it can stand in for the old boolean result.
+
+    * `moves` – length of the mate in attacker moves (0 if none was found)
+    * `line` – one mating line starting from the searched position
+    * `nodes` – number of positions visited
+    """
+    def __init__(self, found: bool, moves: int, line: List[chess.Move], nodes: int):
+        self.found = found
+        self.moves = moves
+        self.line = line
+        self.nodes = nodes
+
+    def __bool__(self) -> bool:
+        return self.found
+
+    def __repr__(self) -> str:
+        return 'MateResult(found={}, moves={}, line={}, nodes={})'.format(
+            self.found, self.moves, [m.uci() for m in self.line], self.nodes)
+
+
+class MateSolver(object):
+    """
+    transposition table entries are `(mate_within, no_mate_within, move)`: the position is known to be mated within
+    `mate_within` attacker moves, known to survive `no_mate_within` attacker moves, and `move` is the mating move
+    (attacker to move) or the refutation (defender to move) found last time.
+    """
+    def __init__(self, board: chess.Board, color_getting_checkmated: chess.Color,
+                 table: Optional[TranspositionTable] = None, stop: Optional[Callable[[], bool]] = None):
+        self.board = board.copy(stack=False)
+        self.defender = color_getting_checkmated
+        self.attacker = not color_getting_checkmated
+        self.table = table if table is not None else TranspositionTable()
+        self.stop = stop
+        self.nodes = 0
+        self._keys = [zobrist_hash(self.board) ^ _DEFENDER_KEYS[color_getting_checkmated]]
+
+    def solve(self, num_moves: int) -> MateResult:
+        for n in range(1, num_moves + 1):
+            if self._search(n):
+                return MateResult(True, n, self._line(n), self.nodes)
+        return MateResult(False, 0, [], self.nodes)
+
+    def mated_within(self, n: int) -> bool:
+        """
+        is the position mated within `n` attacker moves? raises `Stopped` if `stop` says so first
+        """
+        return self._search(n)
+
+    def _push(self, move: chess.Move) -> None:
+        self.nodes += 1
+        if self.stop is not None and self.nodes % _CHECK_EVERY == 0 and self.stop():
+            raise Stopped()
+        self._keys.append(push_hashed(self.board, move, self._keys[-1]))
+
+    def _pop(self) -> None:
+        self.board.pop()
+        self._keys.pop()
+
+    def _store(self, key: int, n: int, mated: bool, move: Optional[chess.Move]) -> None:
+        mate_within, no_mate_within, previous = self.table.get(key) or (_UNPROVEN, -1, None)
+        if move is None:
+            move = previous
+        if mated:
+            mate_within = min(mate_within, n)
+        else:
+            no_mate_within = max(no_mate_within, n)
+        self.table.store(key, (mate_within, no_mate_within, move))
+
+    def _ordered(self, moves: List[chess.Move], first: Optional[chess.Move]) -> List[chess.Move]:
+        """
+        previous best move first, then checks, then captures, then everything else
+        """
+        board = self.board
+        checks, captures, quiet = [], [], []
+        for move in moves:
+            if move == first:
+                continue
+            if board.gives_check(move):
+                checks.append(move)
+            elif board.is_capture(move):
+                captures.append(move)
+            else:
+                quiet.append(move)
+        ordered = checks + captures + quiet
+        if first is not None and first in moves:
+            ordered.insert(0, first)
+        return ordered
+
+    def _search(self, n: int) -> bool:
+        """
+        is the current position mated within `n` attacker moves?
+        """
+        board = self.board
+        key = self._keys[-1]
+        entry = self.table.get(key)
+        if entry is not None:
+            if entry[0] <= n:
+                return True
+            if entry[1] >= n:
+                return False
+        first = entry[2] if entry is not None else None
+
+        if board.turn == self.defender:
+            replies = list(board.generate_legal_moves())
+            if not replies:
+                mated = board.is_check()
+                self._store(key, 0 if mated else n, mated, None)
+                return mated
+            if n == 0:
+                return False
+            if first is not None and first in replies:
+                replies.remove(first)
+                replies.insert(0, first)
+            for reply in replies:
+                self._push(reply)
+                mated = self._search(n)
+                self._pop()
+                if not mated:
+                    self._store(key, n, False, reply)
+                    return False
+            self._store(key, n, True, None)
+            return True
+
+        if n == 0:
+            return False
+        if n == 1:
+            # the last attacking move has to give mate, so only checks need to be looked at
+            for move in board.generate_legal_moves():
+                if not board.gives_check(move):
+                    continue
+                self._push(move)
+                mated = not any(board.generate_legal_moves())
+                self._pop()
+                if mated:
+                    self._store(key, 1, True, move)
+                    return True
+            self._store(key, 1, False, None)
+            return False
+        for move in self._ordered(list(board.generate_legal_moves()), first):
+            self._push(move)
+            mated = self._search(n - 1)
+            self._pop()
+            if mated:
+                self._store(key, n, True, move)
+                return True
+        self._store(key, n, False, None)
+        return False
+
+    def _shortest(self, n: int) -> int:
+        for m in range(n + 1):
+            if self._search(m):
+                return m
+        return _UNPROVEN
+
+    def _line(self, n: int) -> List[chess.Move]:
+        """
+        walk the proven tree: shortest mate for the attacker, most stubborn reply for the defender
+        """
+        line = []
+        pushed = 0
+        while not self.board.is_checkmate():
+            if self.board.turn == self.attacker:
+                n = self._shortest(n)
+                move = self.table.get(self._keys[-1])[2]
+                n -= 1
+            else:
+                move, longest = None, -1
+                for reply in list(self.board.generate_legal_moves()):
+                    self._push(reply)
+                    m = self._shortest(n)
+                    self._pop()
+                    if m > longest:
+                        move, longest = reply, m
+            line.append(move)
+            self._push(move)
+            pushed += 1
+        for _ in range(pushed):
+            self._pop()
+        return line
+
+
+def _pack(entry: Tuple[int, int, Optional[chess.Move]]) -> int:
+    mate_within, no_mate_within, move = entry
+    return pack_move(move) | min(mate_within, 255) << 16 | (no_mate_within + 1) << 24
+
+
+def _unpack(data: int) -> Tuple[int, int, Optional[chess.Move]]:
+    mate_within = data >> 16 & 255
+    return _UNPROVEN if mate_within == 255 else mate_within, (data >> 24) - 1, unpack_move(data & 0xffff)
+
+
+# packs table entries into one word for a `SharedTable`
+CODEC = (_pack, _unpack)
+
+
+def solve_mate(board: chess.Board, color_getting_checkmated: chess.Color, num_moves: int,
+               table: Optional[TranspositionTable] = None) -> MateResult:
+    """
+    search for a forced mate of `color_getting_checkmated` within `num_moves` moves of the opponent.
+    passing the same `table` across calls lets later searches reuse earlier proofs. an entry only means something
+    for the defender it was proven for: reuse a table for the same defender only (the solver keys entries by defender
+    as well, so mixing defenders loses nothing but the reuse).
+    """
+    return MateSolver(board, color_getting_checkmated, table).solve(num_moves)
@@ -0,0 +1,265 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Sequence, Tuple
+import atexit
+import os
+import time
+
+import chess
+
+from search import alphabeta, mate
+from search.alphabeta import MATE, Search, SearchResult, is_mate_score
+from search.mate import MateResult, MateSolver, Stopped
+from search.transposition import SharedTable
+
+
+"""
+root-split search across processes, for move-tree queries too deep for one core (long forced mates, deep
+alpha-beta scores):
+
+* the root moves are handed out to a process pool, one task per move. alpha-beta searches the best move of the last
+  iteration first and the rest only to see whether they beat it (unless every move needs an exact score)
+* every worker reads and writes one transposition table in shared memory (`SharedTable`), so what one worker proves
+  about a transposition the others get for free
+* as soon as one root move decides the question (a mate is found, or the defender has a reply that escapes) the
+  other tasks are called off: queued ones are cancelled and running ones see the cancel word in shared memory change
+  and return
+
+`ParallelSearch` owns the pool and the shared memory; `search` and `solve_mate` use one per worker count for the
+life of the process. with a single worker everything runs serially in this process.
+"""
+
+
+DEFAULT_CAPACITY = 1 << 20
+
+_CODECS = {'alphabeta': alphabeta.CODEC, 'mate': mate.CODEC}
+
+# set up in every worker by `_attach`
+_TABLES: Dict[str, SharedTable] = {}
+_CONTROL = None
+
+
+def _attach(tables: Dict[str, Tuple[str, int]], control: str) -> None:
+    global _CONTROL
+    for kind, (name, capacity) in tables.items():
+        _TABLES[kind] = SharedTable(_CODECS[kind], capacity, name)
+    shm = shared_memory.SharedMemory(name=control)
+    _CONTROL = (shm, shm.buf.cast('Q'))
+
+
+def _stopper(epoch: int):
+    words = _CONTROL[1]
+    return lambda: words[0] != epoch
+
+
+def _score_move(fen: str, uci: str, depth: int, alpha: int, max_nodes: Optional[int],
+                epoch: int) -> Tuple[Optional[int], int]:
+    """
+    score of root move `uci` from the root's side, searched `depth` more plies. exact when it is above `alpha`, an
+    upper bound otherwise. None if it was called off or ran out of nodes
+    """
+    if _CONTROL[1][0] != epoch:
+        return None, 0
+    board = chess.Board(fen)
+    board.push_uci(uci)
+    search = Search(table=_TABLES['alphabeta'], max_nodes=max_nodes, stop=_stopper(epoch))
+    score = search.score(board, depth, 1, -MATE, -alpha)
+    return (None if score is None else -score), search.nodes
+
+
+def _mate_move(fen: str, uci: str, defender: chess.Color, n: int, epoch: int) -> Tuple[Optional[bool], int]:
+    """
+    is the position after root move `uci` mated within `n` attacker moves? None if it was called off
+    """
+    if _CONTROL[1][0] != epoch:
+        return None, 0
+    board = chess.Board(fen)
+    board.push_uci(uci)
+    solver = MateSolver(board, defender, _TABLES['mate'], stop=_stopper(epoch))
+    try:
+        return solver.mated_within(n), solver.nodes
+    except Stopped:
+        return None, solver.nodes
+
+
+class ParallelSearch(object):
+    """
+    a pool of `workers` processes (default: one per cpu) sharing a transposition table of `capacity` slots per kind
+    of search. use as a context manager, or `close()` it
+    """
+    def __init__(self, workers: Optional[int] = None, capacity: int = DEFAULT_CAPACITY):
+        self.workers = workers or os.cpu_count() or 1
+        self.tables = {kind: SharedTable(codec, capacity) for kind, codec in _CODECS.items()}
+        self._control = shared_memory.SharedMemory(create=True, size=8)
+        self._epoch = self._control.buf.cast('Q')
+        self._epoch[0] = 0
+        initargs = ({kind: (table.name, capacity) for kind, table in self.tables.items()}, self._control.name)
+        self.pool = ProcessPoolExecutor(self.workers, initializer=_attach, initargs=initargs)
+
+    def __enter__(self) -> 'ParallelSearch':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._epoch[0] += 1
+        self.pool.shutdown(wait=True)
+        for table in self.tables.values():
+            table.close()
+        self._epoch.release()
+        self._control.close()
+        self._control.unlink()
+
+    def _begin(self) -> int:
+        """
+        start a new round of tasks; anything still running from the last one stops
+        """
+        self._epoch[0] += 1
+        return self._epoch[0]
+
+    def _call_off(self, futures: Sequence[Future]) -> None:
+        self._epoch[0] += 1
+        for future in futures:
+            future.cancel()
+
+    def search(self, board: chess.Board, depth: int, max_nodes: Optional[int] = alphabeta.DEFAULT_MAX_NODES,
+               max_time: Optional[float] = None, all_moves: bool = False) -> SearchResult:
+        """
+        `alphabeta.search` with the root moves split over the pool. `max_nodes` is per root move and iteration,
+        `max_time` for the whole search
+        """
+        start = time.perf_counter()
+        deadline = start + max_time if max_time is not None else None
+        fen = board.fen()
+        moves = list(board.generate_legal_moves())
+        result = SearchResult(alphabeta.material(board), None, [], 0, 0, 0.0, True)
+        if not moves:
+            result.score = -alphabeta.MATE if board.is_check() else 0
+        nodes = 0
+        for d in range(1, depth + 1):
+            if not moves:
+                break
+            epoch = self._begin()
+            scores: Dict[chess.Move, int] = {}
+            futures: Dict[Future, chess.Move] = {}
+            rest = moves
+            if not all_moves:
+                first = self.pool.submit(_score_move, fen, moves[0].uci(), d - 1, -MATE, max_nodes, epoch)
+                futures[first] = moves[0]
+                rest = moves[1:]
+                timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                wait([first], timeout)
+                alpha = first.result()[0] if first.done() else None
+                rest = rest if alpha is not None else []
+            else:
+                alpha = -MATE
+            for move in rest:
+                futures[self.pool.submit(_score_move, fen, move.uci(), d - 1, alpha, max_nodes, epoch)] = move
+            pending = set(futures)
+            finished = proven = False
+            while pending:
+                timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                done, pending = wait(pending, timeout, FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    score, searched = future.result()
+                    nodes += searched
+                    if score is None:
+                        pending = set()
+                        break
+                    scores[futures[future]] = score
+                    if is_mate_score(score) and score > 0 and not all_moves:
+                        proven = True
+                        pending = set()
+                        break
+            else:
+                finished = len(scores) == len(moves)
+            if not (finished or proven):
+                self._call_off(list(futures))
+                result.complete = False
+                break
+            if proven:
+                self._call_off(list(futures))
+                moves.sort(key=lambda move: -scores.get(move, -alphabeta.MATE))
+            else:
+                moves.sort(key=lambda move: -scores[move])
+            best = moves[0]
+            line = Search(table=self.tables['alphabeta'], max_nodes=None).line(board, best, d)
+            result = SearchResult(scores[best], best, line, d, 0, 0.0, True, scores if all_moves else None)
+            if proven:
+                break
+        result.nodes = nodes
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def solve_mate(self, board: chess.Board, color_getting_checkmated: chess.Color, num_moves: int) -> MateResult:
+        """
+        `mate.solve_mate` with the root moves split over the pool: with the attacker to move the first root move
+        that mates settles it, with the defender to move the first one that escapes does
+        """
+        moves = list(board.generate_legal_moves())
+        if len(moves) < 2:
+            return mate.solve_mate(board, color_getting_checkmated, num_moves)
+        fen = board.fen()
+        attacking = board.turn != color_getting_checkmated
+        nodes = 0
+        for n in range(1, num_moves + 1):
+            epoch = self._begin()
+            depth = n - 1 if attacking else n
+            futures = [self.pool.submit(_mate_move, fen, move.uci(), color_getting_checkmated, depth, epoch)
+                       for move in moves]
+            mated = not attacking
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    proven, searched = future.result()
+                    nodes += searched
+                    if proven is not None and proven == attacking:
+                        mated = attacking
+                        pending = set()
+                        break
+            self._call_off(futures)
+            if mated:
+                solver = MateSolver(board, color_getting_checkmated, self.tables['mate'])
+                result = solver.solve(n)
+                result.nodes += nodes
+                return result
+        return MateResult(False, 0, [], nodes)
+
+
+_POOLS: Dict[int, ParallelSearch] = {}
+
+
+def pool(workers: Optional[int] = None) -> ParallelSearch:
+    """
+    the process-wide `ParallelSearch` with `workers` processes, started on first use
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers not in _POOLS:
+        _POOLS[workers] = ParallelSearch(workers)
+    return _POOLS[workers]
+
+
+@atexit.register
+def _close_pools() -> None:
+    for parallel in _POOLS.values():
+        parallel.close()
+    _POOLS.clear()
+
+
+def search(board: chess.Board, depth: int, workers: Optional[int] = None,
+           max_nodes: Optional[int] = alphabeta.DEFAULT_MAX_NODES, max_time: Optional[float] = None,
+           all_moves: bool = False) -> SearchResult:
+    if workers == 1:
+        return alphabeta.search(board, depth, max_nodes, max_time, all_moves=all_moves)
+    return pool(workers).search(board, depth, max_nodes, max_time, all_moves)
+
+
+def solve_mate(board: chess.Board, color_getting_checkmated: chess.Color, num_moves: int,
+               workers: Optional[int] = None) -> MateResult:
+    if workers == 1:
+        return mate.solve_mate(board, color_getting_checkmated, num_moves)
+    return pool(workers).solve_mate(board, color_getting_checkmated, num_moves)
@@ -0,0 +1,141 @@
+from typing import Any, Callable, Optional, Tuple
+from multiprocessing import shared_memory
+
+import chess
+import chess.polyglot
+
+from cache import LRUCache
+
+
+"""
+shared pieces for anything that walks the move tree: zobrist keys that are updated incrementally with push/pop,
+and a transposition table with a hard cap on the number of entries it keeps. `SharedTable` is the same table laid
+out in shared memory, for searches split across processes.
+"""
+
+
+_HASHER = chess.polyglot.ZobristHasher(chess.polyglot.POLYGLOT_RANDOM_ARRAY)
+_PIECE_KEYS = [[chess.polyglot.POLYGLOT_RANDOM_ARRAY[64 * piece_index + square] for square in chess.SQUARES]
+               for piece_index in range(12)]
+
+
+def zobrist_hash(board: chess.Board) -> int:
+    """
+    polyglot zobrist key of the full position (pieces, castling rights, en passant file, side to move)
+    """
+    return _HASHER(board)
+
+
+def _state_key(board: chess.Board) -> int:
+    return _HASHER.hash_castling(board) ^ _HASHER.hash_ep_square(board) ^ _HASHER.hash_turn(board)
+
+
+def _piece_key(piece: Optional[chess.Piece], square: chess.Square) -> int:
+    if piece is None:
+        return 0
+    return _PIECE_KEYS[(piece.piece_type - 1) * 2 + int(piece.color)][square]
+
+
+def push_hashed(board: chess.Board, move: chess.Move, key: int) -> int:
+    """
+    push `move` onto `board` and return the zobrist key of the new position, given `key` for the current one.
+
+    only the squares the move touches are rehashed, which is much cheaper than `zobrist_hash` on the new board.
+    """
+    touched = chess.BB_SQUARES[move.from_square] | chess.BB_SQUARES[move.to_square]
+    if board.is_castling(move):
+        touched |= chess.BB_RANKS[chess.square_rank(move.from_square)]
+    elif board.is_en_passant(move):
+        touched |= chess.BB_SQUARES[chess.square(chess.square_file(move.to_square),
+                                                 chess.square_rank(move.from_square))]
+
+    key ^= _state_key(board)
+    for square in chess.scan_forward(touched):
+        key ^= _piece_key(board.piece_at(square), square)
+
+    board.push(move)
+
+    for square in chess.scan_forward(touched):
+        key ^= _piece_key(board.piece_at(square), square)
+    return key ^ _state_key(board)
+
+
+class TranspositionTable(LRUCache):
+    """
+    zobrist-keyed table holding at most `capacity` entries. the least recently used entry is evicted once the table
+    is full, so memory stays bounded no matter how large the searched tree gets.
+    """
+    def __init__(self, capacity: int = 1 << 18):
+        super().__init__(capacity)
+
+    def store(self, key: int, entry: Any) -> None:
+        self.put(key, entry)
+
+
+def pack_move(move: Optional[chess.Move]) -> int:
+    """
+    16 bits: from square, to square, promotion. 0 is no move (a1a1 isn't one)
+    """
+    if move is None:
+        return 0
+    return move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+
+def unpack_move(bits: int) -> Optional[chess.Move]:
+    if not bits:
+        return None
+    return chess.Move(bits & 63, bits >> 6 & 63, (bits >> 12 & 7) or None)
+
+
+class SharedTable(object):
+    """
+    zobrist-keyed table of `capacity` slots (a power of two) in `multiprocessing.shared_memory`, which every process
+    attached to it by `name` reads and writes at once. a slot is one entry, newest wins.
+
+    there are no locks: `codec` packs an entry into one 64-bit word, and a slot holds that word and the key xor'ed
+    with it. a slot that two processes wrote at the same time fails the check and reads as a miss.
+    """
+    def __init__(self, codec: Tuple[Callable[[Any], int], Callable[[int], Any]], capacity: int = 1 << 20,
+                 name: Optional[str] = None):
+        assert capacity & (capacity - 1) == 0
+        self.pack, self.unpack = codec
+        self.capacity = capacity
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=16 * capacity)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.slots = self.shm.buf.cast('Q')
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def get(self, key: int, default: Any = None) -> Any:
+        i = (key & (self.capacity - 1)) << 1
+        data = self.slots[i + 1]
+        if data and self.slots[i] ^ data == key:
+            self.hits += 1
+            return self.unpack(data)
+        self.misses += 1
+        return default
+
+    def store(self, key: int, entry: Any) -> None:
+        data = self.pack(entry)
+        i = (key & (self.capacity - 1)) << 1
+        self.slots[i] = key ^ data
+        self.slots[i + 1] = data
+
+    def clear(self) -> None:
+        self.shm.buf[:] = bytes(len(self.shm.buf))
+
+    def close(self) -> None:
+        """
+        detach, and free the memory if this process created it
+        """
+        self.slots.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
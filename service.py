@@ -0,0 +1,451 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import io
+import json
+import os
+import sys
+import time
+
+import chess
+import chess.pgn
+
+from board_analysis.features import feature_matrix
+from corpus import jsonable
+from metaboard import PROPS, MetaBoard
+from registry import load_all
+from scheduler import binding
+
+
+"""
+long-lived analysis service. it speaks a small subset of http/1.1 over tcp or a unix socket:
+
+    POST /analyze   {"fen": ..., "moves": [...], "pgn": ..., "properties": [...], "features": false,
+                     "deadline_ms": ...}
+    GET  /metrics   queue depth, batches in flight, counters
+    GET  /health
+
+a request names one position (`fen`), the positions after each of `moves` (san or uci, from `fen` or the start
+position), or the positions after each move of a `pgn` game. every position becomes one job on a shared queue; the
+batcher takes whatever is queued (waiting at most `max_delay` for more to arrive after the first job), and sends it
+as one batch to a process pool, so concurrent requests share a round trip and the workers' warm `PROPERTY_CACHE`.
+jobs whose deadline passed while queued are dropped before they reach a worker, and a request that runs out of time
+gets a 504 without waiting for its batch.
+
+    python service.py --port 8765
+    python service.py --unix /tmp/analysis.sock
+"""
+
+
+_STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+           500: 'Internal Server Error', 503: 'Service Unavailable', 504: 'Gateway Timeout'}
+
+MAX_BODY = 1 << 22
+
+
+class RequestError(ValueError):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _warm() -> None:
+    """
+    pool initializer: import every property module once per worker instead of on its first batch
+    """
+    load_all()
+
+
+def analyze_batch(jobs: Sequence[Tuple[str, Optional[Sequence[str]], bool]]) -> List[Tuple[bool, Any]]:
+    """
+    worker side of a batch: `(fen, property names or None for all, with features)` -> `(ok, json value or error)`.
+    positions repeated within the batch are analyzed once
+    """
+    boards: Dict[str, MetaBoard] = {}
+    results = []
+    for fen, names, _ in jobs:
+        try:
+            if fen not in boards:
+                boards[fen] = MetaBoard('snapshot', chess.Board(fen))
+            props = boards[fen].props
+            values = dict(props) if names is None else {name: props[name] for name in names}
+            results.append((True, {'properties': jsonable(values)}))
+        except Exception as e:
+            results.append((False, '{}: {}'.format(type(e).__name__, e)))
+
+    wanted = [i for i, (_, _, features) in enumerate(jobs) if features and results[i][0]]
+    if wanted:
+        matrix = feature_matrix([boards[jobs[i][0]].object_board for i in wanted])
+        for row, i in enumerate(wanted):
+            results[i][1]['features'] = dict(zip(matrix.columns, matrix.values[row].tolist()))
+    return results
+
+
+class _Job(object):
+    __slots__ = ('fen', 'properties', 'features', 'deadline', 'future')
+
+    def __init__(self, fen: str, properties: Optional[Tuple[str, ...]], features: bool, deadline: Optional[float],
+                 future: asyncio.Future):
+        self.fen = fen
+        self.properties = properties
+        self.features = features
+        self.deadline = deadline
+        self.future = future
+
+
+class Batcher(object):
+    """
+    coalesces jobs from concurrent requests into batches of at most `max_batch` and runs them on `pool`, with at
+    most `max_inflight` batches out at once
+    """
+    def __init__(self, pool: concurrent.futures.Executor, max_batch: int = 64, max_delay: float = 0.005,
+                 max_inflight: int = 4):
+        self.pool = pool
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(max_inflight)
+        self._runner: Optional[asyncio.Task] = None
+        self.inflight_batches = 0
+        self.inflight_jobs = 0
+        self.counters = collections.Counter()
+        self.max_queue_depth = 0
+
+    def start(self) -> None:
+        self._runner = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+
+    def submit(self, job: _Job) -> None:
+        self.queue.put_nowait(job)
+        self.counters['jobs'] += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+
+    async def _collect(self) -> List[_Job]:
+        batch = [await self.queue.get()]
+        if self.queue.qsize() < self.max_batch - 1 and self.max_delay > 0:
+            await asyncio.sleep(self.max_delay)
+        while len(batch) < self.max_batch and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            now = loop.time()
+            live = []
+            for job in batch:
+                if job.future.done():
+                    continue
+                if job.deadline is not None and job.deadline <= now:
+                    self.counters['expired'] += 1
+                    job.future.set_exception(asyncio.TimeoutError())
+                    continue
+                live.append(job)
+            if not live:
+                self._slots.release()
+                continue
+            asyncio.ensure_future(self._dispatch(live))
+
+    async def _dispatch(self, batch: List[_Job]) -> None:
+        loop = asyncio.get_running_loop()
+        self.inflight_batches += 1
+        self.inflight_jobs += len(batch)
+        self.counters['batches'] += 1
+        self.counters['batched_jobs'] += len(batch)
+        try:
+            payload = [(job.fen, job.properties, job.features) for job in batch]
+            try:
+                results = await loop.run_in_executor(self.pool, analyze_batch, payload)
+            except Exception as e:
+                self.counters['failed_batches'] += 1
+                results = [(False, '{}: {}'.format(type(e).__name__, e))] * len(batch)
+            for job, (ok, value) in zip(batch, results):
+                if job.future.done():
+                    continue
+                if ok:
+                    job.future.set_result(value)
+                else:
+                    self.counters['errors'] += 1
+                    job.future.set_exception(RuntimeError(value))
+        finally:
+            self.inflight_batches -= 1
+            self.inflight_jobs -= len(batch)
+            self._slots.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        batches = self.counters['batches']
+        return {
+            'queue_depth': self.queue.qsize(),
+            'max_queue_depth': self.max_queue_depth,
+            'inflight_batches': self.inflight_batches,
+            'inflight_jobs': self.inflight_jobs,
+            'mean_batch_size': self.counters['batched_jobs'] / batches if batches else 0.0,
+            'jobs': self.counters['jobs'],
+            'batches': batches,
+            'expired': self.counters['expired'],
+            'errors': self.counters['errors'],
+            'failed_batches': self.counters['failed_batches'],
+        }
+
+
+def _positions(request: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    the positions a request asks about, each `{'ply', 'move', 'san', 'fen'}` (no move for a bare fen)
+    """
+    if 'pgn' in request:
+        if not isinstance(request['pgn'], str):
+            raise RequestError('pgn must be a string')
+        game = chess.pgn.read_game(io.StringIO(request['pgn']))
+        if game is None or game.errors:
+            raise RequestError('could not read pgn')
+        board = game.board()
+        moves = list(game.mainline_moves())
+    else:
+        if not isinstance(request.get('fen', ''), str):
+            raise RequestError('fen must be a string')
+        try:
+            board = chess.Board(request.get('fen', chess.STARTING_FEN))
+        except ValueError as e:
+            raise RequestError('bad fen: {}'.format(e))
+        if 'moves' not in request:
+            return [{'ply': 0, 'fen': board.fen()}]
+        if not isinstance(request['moves'], list) or not all(isinstance(text, str) for text in request['moves']):
+            raise RequestError('moves must be a list of san or uci strings')
+        moves = []
+        probe = board.copy(stack=False)
+        for text in request['moves']:
+            try:
+                move = probe.parse_uci(text)
+            except ValueError:
+                try:
+                    move = probe.parse_san(text)
+                except ValueError:
+                    raise RequestError('illegal move {!r} at ply {}'.format(text, len(moves) + 1))
+            probe.push(move)
+            moves.append(move)
+
+    positions = []
+    for ply, move in enumerate(moves, start=1):
+        san = board.san(move)
+        board.push(move)
+        positions.append({'ply': ply, 'move': move.uci(), 'san': san, 'fen': board.fen()})
+    return positions
+
+
+def _property_names(request: Dict[str, Any]) -> Optional[Tuple[str, ...]]:
+    names = request.get('properties')
+    if names is None:
+        return None
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        raise RequestError('properties must be a list of names')
+    for name in names:
+        if name not in PROPS:
+            raise RequestError('unknown property {}'.format(name))
+        if binding(name) is None:
+            raise RequestError('{} needs more than a position to be evaluated'.format(name))
+    return tuple(names)
+
+
+class AnalysisService(object):
+    """
+    the service without its transport: `analyze` takes a decoded request and returns its json response
+    """
+    def __init__(self, workers: Optional[int] = None, max_batch: int = 64, max_delay: float = 0.005,
+                 max_queue: int = 10000, deadline: Optional[float] = 30.0):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_queue = max_queue
+        self.deadline = deadline
+        self.pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self.batcher: Optional[Batcher] = None
+        self.counters = collections.Counter()
+        self.started = time.time()
+
+    async def start(self) -> None:
+        load_all()
+        self.pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers, initializer=_warm)
+        self.batcher = Batcher(self.pool, self.max_batch, self.max_delay, max_inflight=2 * self.workers)
+        self.batcher.start()
+
+    async def stop(self) -> None:
+        if self.batcher is not None:
+            await self.batcher.stop()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+
+    async def analyze(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        raises RequestError for bad requests, a full queue or a missed deadline
+        """
+        loop = asyncio.get_running_loop()
+        self.counters['requests'] += 1
+        if not isinstance(request, dict):
+            raise RequestError('request must be a json object')
+        deadline_ms = request.get('deadline_ms')
+        if deadline_ms is not None and (isinstance(deadline_ms, bool) or not isinstance(deadline_ms, (int, float))):
+            raise RequestError('deadline_ms must be a number')
+        timeout = deadline_ms / 1000 if deadline_ms is not None else self.deadline
+        deadline = loop.time() + timeout if timeout is not None else None
+
+        names = _property_names(request)
+        positions = _positions(request)
+        if self.batcher.queue.qsize() + len(positions) > self.max_queue:
+            self.counters['rejected'] += 1
+            raise RequestError('queue is full', 503)
+
+        futures = []
+        for position in positions:
+            future = loop.create_future()
+            self.batcher.submit(_Job(position['fen'], names, bool(request.get('features')), deadline, future))
+            futures.append(future)
+        try:
+            values = await asyncio.wait_for(asyncio.gather(*futures), timeout)
+        except asyncio.TimeoutError:
+            for future in futures:
+                future.cancel()
+            self.counters['timeouts'] += 1
+            raise RequestError('deadline exceeded', 504)
+        except RuntimeError as e:
+            for future in futures:
+                future.cancel()
+            raise RequestError(str(e), 500)
+        for position, value in zip(positions, values):
+            position.update(value)
+        return {'positions': positions}
+
+    def metrics(self) -> Dict[str, Any]:
+        metrics = self.batcher.metrics() if self.batcher is not None else {}
+        metrics.update({
+            'workers': self.workers,
+            'requests': self.counters['requests'],
+            'rejected': self.counters['rejected'],
+            'timeouts': self.counters['timeouts'],
+            'uptime': time.time() - self.started,
+        })
+        return metrics
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        if path == '/health':
+            return 200, {'ok': True}
+        if path == '/metrics':
+            return 200, self.metrics()
+        if path != '/analyze':
+            return 404, {'error': 'no such endpoint'}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}
+        try:
+            request = json.loads(body or b'{}')
+        except ValueError:
+            return 400, {'error': 'body is not json'}
+        try:
+            return 200, await self.analyze(request)
+        except RequestError as e:
+            return e.status, {'error': str(e)}
+        except Exception as e:
+            return 500, {'error': '{}: {}'.format(type(e).__name__, e)}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        one connection; requests on it are answered in turn until either side closes it
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, path, version = line.decode('latin-1').split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = header.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    status, response = 400, {'error': 'bad content-length'}
+                    keep_alive = False
+                elif length > MAX_BODY:
+                    status, response = 413, {'error': 'body too large'}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    status, response = await self._route(method, path.split('?')[0], body)
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+
+                payload = json.dumps(response).encode()
+                writer.write('{} {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n'
+                             'Connection: {}\r\n\r\n'.format(version, status, _STATUS[status], len(payload),
+                                                              'keep-alive' if keep_alive else 'close')
+                             .encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(service: AnalysisService, host: str = '127.0.0.1', port: int = 8765,
+                unix: Optional[str] = None) -> None:
+    await service.start()
+    if unix:
+        server = await asyncio.start_unix_server(service.handle, path=unix)
+    else:
+        server = await asyncio.start_server(service.handle, host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='serve MetaBoard properties over http')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='listen on this unix socket instead of tcp')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='worker processes (default: cpu count)')
+    parser.add_argument('--max-batch', type=int, default=64, help='most positions sent to a worker at once')
+    parser.add_argument('--max-delay-ms', type=float, default=5.0,
+                        help='how long a batch waits for more positions after its first one')
+    parser.add_argument('--max-queue', type=int, default=10000, help='queued positions before requests get a 503')
+    parser.add_argument('--deadline-ms', type=float, default=30000.0,
+                        help="default deadline of a request without 'deadline_ms'")
+    args = parser.parse_args(argv)
+
+    service = AnalysisService(args.workers, args.max_batch, args.max_delay_ms / 1000, args.max_queue,
+                              args.deadline_ms / 1000)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
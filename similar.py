@@ -0,0 +1,208 @@
+from typing import Dict, List, Optional, Tuple, Union
+import argparse
+import os
+import sys
+
+import chess
+import numpy as np
+
+from board_analysis.features import bitboard_array, popcount
+from metaboard import MetaBoard
+from store import PositionStore, pack, position_values
+
+
+"""
+"find positions like this one" over a `PositionStore`. a position's signature is its row of property bits in the
+store (fixed width, already packed into uint64 words). they are copied once into a contiguous matrix next to the
+store, `<store>.signatures.npy`, so a search is one pass over a memory-mapped array a chunk of rows at a time:
+xor/and/or with the query words, popcount, keep the k best.
+
+* `hamming` – number of property bits that differ
+* `jaccard` – 1 - |shared bits| / |bits set in either| (two positions with no bits set are the same)
+
+the `material` prefilter only keeps positions whose piece counts (pawns to queens, per color) are within that many
+pieces of the query's; 0 means the same material. the counts are cached the same way, in `<store>.material.npy`.
+both files are extended when the store grows.
+"""
+
+
+METRICS = ('hamming', 'jaccard')
+
+DEFAULT_CHUNK = 1 << 20
+
+
+def material_counts(bitboards: np.ndarray) -> np.ndarray:
+    """
+    (N, 8) bitboards -> (N, 16) uint8: white pawns..queens, then black pawns..queens, then zeros. the padding makes
+    a row two uint64 words, so the same material is two word compares
+    """
+    pieces = bitboards[:, 2:7]
+    counts = np.zeros((len(bitboards), 16), dtype=np.uint8)
+    counts[:, :5] = popcount(pieces & bitboards[:, 0:1])
+    counts[:, 5:10] = popcount(pieces & bitboards[:, 1:2])
+    return counts
+
+
+class SimilarityIndex(object):
+    def __init__(self, store: PositionStore, chunk_size: int = DEFAULT_CHUNK):
+        self.store = store
+        self.chunk_size = chunk_size
+        self._maps: Dict[str, np.ndarray] = {}
+
+    @property
+    def signatures(self) -> np.ndarray:
+        """
+        (N, words) property words of every position in the store, contiguous and memory-mapped
+        """
+        words = self.store.schema.words
+        return self._cached('signatures', np.uint64, words, lambda records: records['props'])
+
+    @property
+    def material(self) -> np.ndarray:
+        """
+        (N, 16) material counts of every position in the store, memory-mapped
+        """
+        return self._cached('material', np.uint8, 16, lambda records: material_counts(records['board']))
+
+    def _cached(self, name: str, dtype: type, width: int, compute) -> np.ndarray:
+        """
+        `compute(records)` for the whole store, kept in `<store>.<name>.npy`. rows appended to the store since the
+        file was written are computed and added; the rest is copied over
+        """
+        size = len(self.store)
+        cached = self._maps.get(name)
+        if cached is not None and len(cached) == size:
+            return cached
+        path = '{}.{}.npy'.format(self.store.path, name)
+        old = np.load(path, mmap_mode='r') if os.path.exists(path) else None
+        if old is None or len(old) != size:
+            done = len(old) if old is not None and len(old) < size else 0
+            values = np.lib.format.open_memmap(path + '.tmp', mode='w+', dtype=dtype, shape=(size, width))
+            if done:
+                values[:done] = old[:done]
+            records = self.store.records
+            for start in range(done, size, self.chunk_size):
+                values[start:start + self.chunk_size] = compute(records[start:start + self.chunk_size])
+            values.flush()
+            del values, old
+            os.replace(path + '.tmp', path)
+        self._maps[name] = np.load(path, mmap_mode='r')
+        return self._maps[name]
+
+    def signature(self, board: chess.Board) -> np.ndarray:
+        """
+        property words of `board`, laid out like the store's, from the properties of its `MetaBoard`
+        """
+        schema = self.store.schema
+        meta_board = MetaBoard('game', board.copy(stack=False))
+        values = position_values(meta_board.object_board, schema.properties, meta_board.props, meta_board.props.ctx)
+        return pack(schema, [meta_board.object_board], [values], [meta_board.props.key], [0], [0])['props'][0]
+
+    def nearest(self, query: Union[chess.Board, int, np.ndarray], k: int = 10, metric: str = 'hamming',
+                material: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        (id, distance) of the `k` positions closest to `query` (a board, the id of a stored position, or property
+        words), nearest first. a stored query position is not returned as its own neighbour
+        """
+        if metric not in METRICS:
+            raise ValueError('unknown metric {}, use one of {}'.format(metric, ', '.join(METRICS)))
+        exclude = None
+        if isinstance(query, chess.Board):
+            words = self.signature(query)
+            counts = material_counts(bitboard_array([query]))[0]
+        elif isinstance(query, (int, np.integer)):
+            exclude = int(query)
+            words = np.array(self.signatures[exclude])
+            counts = np.array(self.material[exclude]) if material is not None else None
+        else:
+            words = np.asarray(query, dtype=np.uint64)
+            counts = None
+            if material is not None:
+                raise ValueError('the material prefilter needs a board or a stored position')
+
+        signatures = self.signatures
+        pieces = self.material if material is not None else None
+        best_ids = np.zeros(0, dtype=np.int64)
+        best = np.zeros(0, dtype=np.float32)
+        for start in range(0, len(signatures), self.chunk_size):
+            distances = _distances(signatures[start:start + self.chunk_size], words, metric)
+            if material is not None:
+                distances[_far(pieces[start:start + self.chunk_size], counts, material)] = np.inf
+            if exclude is not None and start <= exclude < start + len(distances):
+                distances[exclude - start] = np.inf
+            ids = np.arange(start, start + len(distances))
+            if len(distances) > k:
+                top = np.argpartition(distances, k)[:k]
+                ids, distances = top + start, distances[top]
+            best_ids = np.concatenate([best_ids, ids])
+            best = np.concatenate([best, distances])
+            if len(best) > k:
+                top = np.argpartition(best, k)[:k]
+                best_ids, best = best_ids[top], best[top]
+        order = np.lexsort((best_ids, best))
+        return [(int(best_ids[i]), float(best[i])) for i in order if best[i] != np.inf]
+
+
+def _far(pieces: np.ndarray, counts: np.ndarray, within: int) -> np.ndarray:
+    """
+    which rows of `pieces` are more than `within` pieces away from `counts`
+    """
+    if within == 0:
+        words = pieces.view(np.uint64)
+        target = counts.view(np.uint64)
+        return (words[:, 0] != target[0]) | (words[:, 1] != target[1])
+    distance = np.zeros(len(pieces), dtype=np.uint8)
+    for i in range(10):
+        column = pieces[:, i]
+        distance += np.maximum(column, counts[i]) - np.minimum(column, counts[i])
+    return distance > within
+
+
+def _distances(signatures: np.ndarray, words: np.ndarray, metric: str) -> np.ndarray:
+    """
+    float32 distance of every row of `signatures` to `words`, summed a word (column) at a time
+    """
+    if metric == 'hamming':
+        differ = np.zeros(len(signatures), dtype=np.uint16)
+        for i, word in enumerate(words):
+            differ += popcount(signatures[:, i] ^ word)
+        return differ.astype(np.float32)
+    shared = np.zeros(len(signatures), dtype=np.uint16)
+    either = np.zeros(len(signatures), dtype=np.uint16)
+    for i, word in enumerate(words):
+        column = signatures[:, i]
+        shared += popcount(column & word)
+        either += popcount(column | word)
+    return 1 - shared / np.maximum(either, 1, dtype=np.float32)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='find the stored positions most like a given one')
+    parser.add_argument('store', help='position store written by main.py --store')
+    query = parser.add_mutually_exclusive_group(required=True)
+    query.add_argument('--fen', help='position to compare against')
+    query.add_argument('--id', type=int, help='id (record number) of a stored position to compare against')
+    parser.add_argument('-k', type=int, default=10, help='number of positions to return')
+    parser.add_argument('--metric', choices=METRICS, default='hamming')
+    parser.add_argument('--material', type=int, default=None,
+                        help='only positions within this many pieces of the same material (0: same material)')
+    args = parser.parse_args(argv)
+
+    store = PositionStore(args.store)
+    index = SimilarityIndex(store)
+    if args.id is not None and not 0 <= args.id < len(store):
+        print('no position {} in the store'.format(args.id), file=sys.stderr)
+        return 1
+    try:
+        target = chess.Board(args.fen) if args.fen else args.id
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    for position, distance in index.nearest(target, args.k, args.metric, args.material):
+        game, ply = store.origin(position)
+        print('{}\t{:.3f}\tgame {} ply {}\t{}'.format(position, distance, game, ply, store.board(position).fen()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,261 @@
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+import functools
+import inspect
+import json
+import os
+
+import chess
+import numpy as np
+
+from board_analysis.context import PositionContext, context
+from board_analysis.features import FEATURE_COLUMNS, bitboard_array, feature_matrix
+from registry import names as property_names, spec
+from scheduler import binding, evaluate
+
+
+"""
+compact on-disk store of analyzed positions. every position is one fixed-width record:
+
+* `key` – zobrist key, `game`/`ply` – where it came from
+* `board` – the eight python-chess bitboards (white, black, pawns, knights, bishops, rooks, queens, kings) and
+  `state` – side to move, castling rights and en passant file packed into 16 bits
+* `props` – one bit per boolean property (two for properties that take a color: 'name.white', 'name.black'), set
+  when the value is truthy. properties of a single pawn (`isolani(board, pawn)`, ...) get a bit per color too, set
+  when any pawn of that color has the property
+* `features` – the numeric feature columns of `board_analysis.features`, as float16 (they are all small counts, so
+  nothing is lost)
+
+records are only ever appended to the data file; the schema (which bit and slot is which) sits next to it as json.
+reading maps the file with `np.memmap`, so `records`, `column` and `feature` are views onto the page cache rather than
+copies, and scanning a column runs at memory speed.
+"""
+
+
+COLORS = {'white': chess.WHITE, 'black': chess.BLACK}
+
+
+class StoreSchema(object):
+    def __init__(self, bits: Sequence[str], features: Sequence[str]):
+        self.bits = list(bits)
+        self.features = list(features)
+        self.words = max(1, (len(self.bits) + 63) // 64)
+        self._bit_index = {bit: i for i, bit in enumerate(self.bits)}
+        self._feature_index = {feature: i for i, feature in enumerate(self.features)}
+        self.dtype = np.dtype([
+            ('key', '<u8'),
+            ('game', '<u4'),
+            ('ply', '<u2'),
+            ('state', '<u2'),
+            ('board', '<u8', (8,)),
+            ('props', '<u8', (self.words,)),
+            ('features', '<f2', (len(self.features),)),
+        ])
+
+    @property
+    def properties(self) -> List[str]:
+        """
+        property names behind the bits, each once
+        """
+        return list(dict.fromkeys(bit.split('.')[0] for bit in self.bits))
+
+    def bit(self, name: str) -> int:
+        return self._bit_index[name]
+
+    def feature(self, name: str) -> int:
+        return self._feature_index[name]
+
+    def to_json(self) -> Dict[str, Any]:
+        return {'bits': self.bits, 'features': self.features}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'StoreSchema':
+        return cls(data['bits'], data['features'])
+
+
+@functools.lru_cache(maxsize=None)
+def _pawn_property(name: str) -> bool:
+    """
+    is `name` a property of one pawn, called as `fn(board, pawn)`?
+    """
+    parameters = list(inspect.signature(spec(name).fn).parameters)
+    return binding(name) is None and len(parameters) > 1 and parameters[1] == 'pawn'
+
+
+@functools.lru_cache(maxsize=None)
+def _boolean_property(name: str) -> bool:
+    """
+    does `name` return a bool (or None when it can't tell)? properties still without a cost class are unwritten stubs
+    that always return None, so they don't count
+    """
+    property_spec = spec(name)
+    returns = inspect.signature(property_spec.fn).return_annotation
+    return property_spec.cost is not None and returns in (bool, Optional[bool])
+
+
+def default_schema(properties: Optional[Sequence[str]] = None) -> StoreSchema:
+    """
+    a bit for every boolean position property that can be evaluated on a bare position (or on each pawn), and every
+    feature column. lists, feature vectors and other values are left out: a bit would only say whether they are
+    empty, and the feature vectors are in the feature columns already
+    """
+    bits = []
+    for name in properties or property_names('position'):
+        bound = binding(name)
+        if bound is None and not _pawn_property(name) or not _boolean_property(name):
+            continue
+        if bound is None or bound[1]:
+            bits.extend([name + '.white', name + '.black'])
+        else:
+            bits.append(name)
+    return StoreSchema(bits, FEATURE_COLUMNS)
+
+
+def position_values(board: chess.Board, names: Sequence[str], props: Optional[Mapping[str, Any]] = None,
+                    ctx: Optional[PositionContext] = None) -> Dict[str, Any]:
+    """
+    values of the properties behind a schema's bits. position properties come from `props` (e.g. a `MetaBoard`'s)
+    when given; pawn properties are `{color: does any pawn of color have it}`
+    """
+    ctx = context(board, ctx)
+    pawn_names = [name for name in names if _pawn_property(name)]
+    position_names = [name for name in names if name not in pawn_names]
+    if props is not None:
+        values = {name: props[name] for name in position_names}
+    else:
+        values = evaluate(board, position_names, ctx)
+    for name in pawn_names:
+        fn = spec(name).fn
+        kwargs = {'ctx': ctx} if 'ctx' in inspect.signature(fn).parameters else {}
+        values[name] = {color: any(fn(board, pawn, **kwargs)
+                                   for pawn in chess.scan_forward(board.pawns & board.occupied_co[color]))
+                        for color in chess.COLORS}
+    return values
+
+
+def _state(board: chess.Board) -> int:
+    state = int(board.turn)
+    for i, mask in enumerate((chess.BB_H1, chess.BB_A1, chess.BB_H8, chess.BB_A8)):
+        if board.castling_rights & mask:
+            state |= 2 << i
+    if board.ep_square is not None:
+        state |= (chess.square_file(board.ep_square) + 1) << 5
+    return state
+
+
+def pack(schema: StoreSchema, boards: Sequence[chess.Board], values: Sequence[Dict[str, Any]], keys: Sequence[int],
+         games: Sequence[int], plies: Sequence[int]) -> np.ndarray:
+    """
+    records for `boards`, whose property values are `values`
+    """
+    records = np.zeros(len(boards), dtype=schema.dtype)
+    if not len(boards):
+        return records
+    records['key'] = np.array(keys, dtype=np.uint64)
+    records['game'] = games
+    records['ply'] = plies
+    records['state'] = [_state(board) for board in boards]
+    records['board'] = bitboard_array(boards)
+    matrix = feature_matrix(boards)
+    records['features'] = matrix.values[:, [matrix.columns.index(feature) for feature in schema.features]]
+
+    props = np.zeros((len(boards), schema.words), dtype=np.uint64)
+    bits = [(i, bit.split('.')) for i, bit in enumerate(schema.bits)]
+    for row, row_values in enumerate(values):
+        words = [0] * schema.words
+        for i, parts in bits:
+            value = row_values.get(parts[0])
+            if len(parts) > 1 and isinstance(value, dict):
+                value = value.get(COLORS[parts[1]])
+            if value:
+                words[i >> 6] |= 1 << (i & 63)
+        props[row] = words
+    records['props'] = props
+    return records
+
+
+def unpack_board(record: np.void) -> chess.Board:
+    bbs = [int(bb) for bb in record['board']]
+    board = chess.Board(None)
+    white, black, pawns, knights, bishops, rooks, queens, kings = bbs
+    for piece_type, bb in zip(chess.PIECE_TYPES, (pawns, knights, bishops, rooks, queens, kings)):
+        for square in chess.scan_forward(bb):
+            board.set_piece_at(square, chess.Piece(piece_type, bool(white & chess.BB_SQUARES[square])))
+    state = int(record['state'])
+    board.turn = bool(state & 1)
+    board.castling_rights = 0
+    for i, mask in enumerate((chess.BB_H1, chess.BB_A1, chess.BB_H8, chess.BB_A8)):
+        if state & (2 << i):
+            board.castling_rights |= mask
+    ep_file = state >> 5
+    if ep_file:
+        board.ep_square = chess.square(ep_file - 1, 5 if board.turn == chess.WHITE else 2)
+    return board
+
+
+class PositionStore(object):
+    """
+    append-only file of position records at `path`, with its schema in `path + '.json'`. an existing store keeps its
+    own schema; a new one gets `schema`, or `default_schema()`
+    """
+    def __init__(self, path: str, schema: Optional[StoreSchema] = None):
+        self.path = path
+        self.schema_path = path + '.json'
+        if os.path.exists(self.schema_path):
+            with open(self.schema_path) as f:
+                self.schema = StoreSchema.from_json(json.load(f))
+        else:
+            self.schema = schema or default_schema()
+            with open(self.schema_path, 'w') as f:
+                json.dump(self.schema.to_json(), f)
+            open(path, 'ab').close()
+        self._map: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return os.path.getsize(self.path) // self.schema.dtype.itemsize
+
+    def append(self, records: np.ndarray) -> int:
+        """
+        write `records` (of `schema.dtype`) at the end of the file. returns the index of the first one
+        """
+        assert records.dtype == self.schema.dtype
+        start = len(self)
+        with open(self.path, 'ab') as f:
+            f.write(records.tobytes())
+        self._map = None
+        return start
+
+    def add(self, boards: Sequence[chess.Board], values: Sequence[Dict[str, Any]], keys: Sequence[int],
+            games: Sequence[int], plies: Sequence[int]) -> int:
+        return self.append(pack(self.schema, boards, values, keys, games, plies))
+
+    @property
+    def records(self) -> np.ndarray:
+        """
+        every record, memory-mapped read-only
+        """
+        if self._map is None or len(self._map) != len(self):
+            if len(self):
+                self._map = np.memmap(self.path, dtype=self.schema.dtype, mode='r', shape=(len(self),))
+            else:
+                self._map = np.zeros(0, dtype=self.schema.dtype)
+        return self._map
+
+    def column(self, bit: str) -> np.ndarray:
+        """
+        boolean column of one property bit over the whole store
+        """
+        i = self.schema.bit(bit)
+        return (self.records['props'][:, i >> 6] >> np.uint64(i & 63)) & np.uint64(1) == 1
+
+    def feature(self, name: str) -> np.ndarray:
+        return self.records['features'][:, self.schema.feature(name)]
+
+    def board(self, index: int) -> chess.Board:
+        return unpack_board(self.records[index])
+
+    def origin(self, index: int) -> Tuple[int, int]:
+        """
+        (game, ply) the position at `index` came from
+        """
+        record = self.records[index]
+        return int(record['game']), int(record['ply'])
@@ -0,0 +1,166 @@
+from typing import Dict, Optional, Tuple
+import mmap
+import os
+import struct
+
+import chess
+
+
+"""
+win/draw bitbases for a few small endgames, one bit per position: is it a win for the side with the pawn? files are
+written by `tablebase.generate` and opened with `mmap`, so probing is a byte lookup and every worker process
+reading the same file shares the pages the os already has in memory instead of loading its own copy.
+
+* `kpk` – king and pawn against king
+* `kbpk` – king, bishop and rook pawn against king, with the bishop that doesn't control the queening square (the
+  other bishop wins anyway)
+
+positions are normalized before indexing: colors are swapped so the stronger side is white, and the board is
+mirrored so the pawn is on files a-d (on the a-file for `kbpk`). `probe` returns None for positions no bitbase
+covers, or when the file hasn't been generated yet.
+"""
+
+
+DEFAULT_DIRECTORY = os.environ.get('BITBASE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+
+MAGIC = b'BITBASE1'
+# magic, name, number of positions
+HEADER = struct.Struct('<8s8sQ')
+
+# dark squares of the board, the ones the wrong bishop of an a-pawn stands on
+DARK_SQUARES = list(chess.SquareSet(chess.BB_DARK_SQUARES))
+DARK_INDEX = {square: i for i, square in enumerate(DARK_SQUARES)}
+
+SIZES = {
+    'kpk': 2 * 24 * 64 * 64,
+    'kbpk': 2 * 6 * 32 * 64 * 64,
+}
+
+
+def kpk_index(strong_to_move: bool, pawn: chess.Square, strong_king: chess.Square, weak_king: chess.Square) -> int:
+    """
+    pawn on files a-d, ranks 2-7
+    """
+    pawn_index = (chess.square_rank(pawn) - 1) * 4 + chess.square_file(pawn)
+    return (((0 if strong_to_move else 1) * 24 + pawn_index) * 64 + strong_king) * 64 + weak_king
+
+
+def kbpk_index(strong_to_move: bool, pawn: chess.Square, bishop: chess.Square, strong_king: chess.Square,
+               weak_king: chess.Square) -> int:
+    """
+    pawn on the a-file, bishop on a dark square
+    """
+    pawn_index = chess.square_rank(pawn) - 1
+    return ((((0 if strong_to_move else 1) * 6 + pawn_index) * 32 + DARK_INDEX[bishop]) * 64 + strong_king) * 64 + \
+        weak_king
+
+
+class Bitbase(object):
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, name, size = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError('{} is not a bitbase'.format(path))
+        self.name = name.rstrip(b'\0').decode()
+        self.size = size
+
+    def __getitem__(self, index: int) -> bool:
+        return bool(self._map[HEADER.size + (index >> 3)] >> (index & 7) & 1)
+
+    def bits(self) -> memoryview:
+        """
+        the packed bits, without copying them
+        """
+        return memoryview(self._map)[HEADER.size:]
+
+    def close(self) -> None:
+        self._map.close()
+
+
+def path_of(name: str, directory: Optional[str] = None) -> str:
+    return os.path.join(directory or DEFAULT_DIRECTORY, name + '.bb')
+
+
+def write(path: str, name: str, packed: bytes, size: int) -> None:
+    """
+    `packed`: one bit per position, least significant bit first
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, name.encode(), size))
+        f.write(packed)
+    os.replace(tmp, path)
+
+
+_OPEN: Dict[str, Optional[Bitbase]] = {}
+
+
+def bitbase(name: str, directory: Optional[str] = None) -> Optional[Bitbase]:
+    """
+    the bitbase called `name`, opened once per process; None if it hasn't been generated
+    """
+    path = path_of(name, directory)
+    if path not in _OPEN:
+        _OPEN[path] = Bitbase(path) if os.path.exists(path) else None
+    return _OPEN[path]
+
+
+def _normalize(board: chess.BaseBoard, strong: chess.Color, pawn_files: int) -> Dict[str, chess.Square]:
+    """
+    piece squares seen from the strong side as white, mirrored so the pawn is on the first `pawn_files` files
+    """
+    def flip(square):
+        return square if strong == chess.WHITE else chess.square_mirror(square)
+
+    squares = {
+        'strong_king': flip(board.king(strong)),
+        'weak_king': flip(board.king(not strong)),
+        'pawn': flip(chess.lsb(board.pawns)),
+    }
+    if board.bishops:
+        squares['bishop'] = flip(chess.lsb(board.bishops))
+    if chess.square_file(squares['pawn']) >= pawn_files:
+        squares = {piece: chess.square(7 - chess.square_file(square), chess.square_rank(square))
+                   for piece, square in squares.items()}
+    return squares
+
+
+def material(board: chess.BaseBoard) -> Optional[Tuple[str, chess.Color]]:
+    """
+    (bitbase name, stronger color) if `board` has the material of one of the bitbases
+    """
+    if board.knights or board.rooks or board.queens or chess.popcount(board.pawns) != 1 or \
+            board.pawns & chess.BB_BACKRANKS:
+        return None
+    strong = bool(board.pawns & board.occupied_co[chess.WHITE])
+    if not board.bishops:
+        return 'kpk', strong
+    if chess.popcount(board.bishops) == 1 and board.bishops & board.occupied_co[strong] and \
+            board.pawns & (chess.BB_FILE_A | chess.BB_FILE_H):
+        return 'kbpk', strong
+    return None
+
+
+def probe(board: chess.Board, directory: Optional[str] = None) -> Optional[bool]:
+    """
+    True if the side with the pawn wins, False if it's a draw, None if no generated bitbase covers `board`
+    """
+    found = material(board)
+    if found is None:
+        return None
+    name, strong = found
+    table = bitbase(name, directory)
+    if table is None:
+        return None
+    strong_to_move = board.turn == strong
+    if name == 'kpk':
+        squares = _normalize(board, strong, 4)
+        return table[kpk_index(strong_to_move, squares['pawn'], squares['strong_king'], squares['weak_king'])]
+    squares = _normalize(board, strong, 1)
+    if squares['bishop'] not in DARK_INDEX:
+        # the right bishop: not what this bitbase is for
+        return None
+    return table[kbpk_index(strong_to_move, squares['pawn'], squares['bishop'], squares['strong_king'],
+                            squares['weak_king'])]
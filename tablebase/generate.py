@@ -0,0 +1,252 @@
+from typing import List, Optional, Tuple
+import argparse
+import sys
+import time
+
+import chess
+import numpy as np
+
+from tablebase import bitbase
+from tablebase.bitbase import DARK_SQUARES, SIZES
+
+
+"""
+retrograde generation of the bitbases in `tablebase.bitbase`. every position of a bitbase is laid out as one array
+element (the index is the same one `bitbase` probes with), the moves out of each position are worked out once as
+arrays of successor indices, and wins are then propagated backwards until nothing changes: white (the side with
+the pawn) to move wins if some move reaches a won position, black to move is lost if every move does, or if it is
+checkmated. a pawn that promotes without the new queen being taken at once counts as a win; black capturing the
+pawn draws; black capturing the bishop in `kbpk` continues in `kpk`, which is therefore generated first.
+
+    python -m tablebase.generate            # every bitbase, into tablebase/data
+    python -m tablebase.generate kpk -d /tmp/bitbases
+"""
+
+
+WHITE_TO_MOVE, BLACK_TO_MOVE = 0, 1
+
+_STEPS = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+_DIAGONALS = _STEPS[4:]
+
+
+def _step_table(directions, length: int) -> np.ndarray:
+    """
+    `table[square, direction, step]`: square reached, or -1 off the board
+    """
+    table = np.full((64, len(directions), length), -1, dtype=np.int64)
+    for square in chess.SQUARES:
+        for d, (df, dr) in enumerate(directions):
+            f, r = chess.square_file(square), chess.square_rank(square)
+            for step in range(length):
+                f, r = f + df, r + dr
+                if not (0 <= f < 8 and 0 <= r < 8):
+                    break
+                table[square, d, step] = chess.square(f, r)
+    return table
+
+
+KING_STEPS = _step_table(_STEPS, 1)[:, :, 0]
+DIAGONAL_STEPS = _step_table(_DIAGONALS, 7)
+DISTANCE = np.array([[chess.square_distance(a, b) for b in chess.SQUARES] for a in chess.SQUARES])
+BETWEEN = np.array([[chess.between(a, b) for b in chess.SQUARES] for a in chess.SQUARES], dtype=np.uint64)
+ON_DIAGONAL = np.array([[bool(chess.BB_DIAG_ATTACKS[a][0] & chess.BB_SQUARES[b]) for b in chess.SQUARES]
+                        for a in chess.SQUARES])
+WHITE_PAWN_ATTACKS = np.array([[bool(chess.BB_PAWN_ATTACKS[chess.WHITE][a] & chess.BB_SQUARES[b])
+                                for b in chess.SQUARES] for a in chess.SQUARES])
+BB = np.array([chess.BB_SQUARES[square] for square in chess.SQUARES], dtype=np.uint64)
+
+
+class _Layout(object):
+    """
+    the pieces of every position of one bitbase, as arrays over its index (bishop is -1 when there is none)
+    """
+    def __init__(self, name: str, pawn_squares: List[chess.Square], bishop_squares: Optional[List[chess.Square]]):
+        self.name = name
+        self.pawn_squares = np.array(pawn_squares)
+        self.bishop_squares = np.array(bishop_squares) if bishop_squares else None
+        bishops = len(bishop_squares) if bishop_squares else 1
+        self.shape = (2, len(pawn_squares), bishops, 64, 64)
+        self.size = int(np.prod(self.shape))
+        assert self.size == SIZES[name]
+        side, pawn, bishop, white_king, black_king = np.indices(self.shape).reshape(5, -1)
+        self.side = side
+        self.pawn = self.pawn_squares[pawn]
+        self.bishop = self.bishop_squares[bishop] if bishop_squares else np.full(self.size, -1)
+        self.white_king = white_king
+        self.black_king = black_king
+        self.pawn_index = {square: i for i, square in enumerate(pawn_squares)}
+        self.bishop_index = {square: i for i, square in enumerate(bishop_squares or [])}
+
+    def index(self, side, pawn, bishop, white_king, black_king) -> np.ndarray:
+        pawn_index = np.searchsorted(self.pawn_squares, pawn)
+        bishop_index = np.searchsorted(self.bishop_squares, bishop) if self.bishop_squares is not None else 0
+        return np.ravel_multi_index((side, pawn_index, bishop_index, white_king, black_king), self.shape)
+
+
+def _occupied(*squares) -> np.ndarray:
+    occupied = np.zeros(len(squares[0]), dtype=np.uint64)
+    for square in squares:
+        occupied |= np.where(square >= 0, BB[np.maximum(square, 0)], np.uint64(0))
+    return occupied
+
+
+def _white_attacks(target, white_king, pawn, bishop, occupied) -> np.ndarray:
+    """
+    is `target` attacked by white? pieces on -1 are absent
+    """
+    attacked = DISTANCE[white_king, target] == 1
+    attacked |= (pawn >= 0) & WHITE_PAWN_ATTACKS[np.maximum(pawn, 0), target]
+    has_bishop = bishop >= 0
+    b = np.maximum(bishop, 0)
+    attacked |= has_bishop & ON_DIAGONAL[b, target] & ((BETWEEN[b, target] & occupied) == 0)
+    return attacked
+
+
+def _solve(layout: _Layout, kpk: Optional[np.ndarray] = None) -> np.ndarray:
+    side, pawn, bishop = layout.side, layout.pawn, layout.bishop
+    white_king, black_king = layout.white_king, layout.black_king
+    occupied = _occupied(pawn, bishop, white_king, black_king)
+
+    overlap = (white_king == black_king) | (white_king == pawn) | (black_king == pawn) | \
+        (bishop == white_king) | (bishop == black_king) | (bishop == pawn)
+    black_in_check = _white_attacks(black_king, white_king, pawn, bishop, occupied)
+    # the side that just moved can't be left in check
+    legal = ~overlap & (DISTANCE[white_king, black_king] > 1) & ~((side == WHITE_TO_MOVE) & black_in_check)
+
+    white = np.flatnonzero(legal & (side == WHITE_TO_MOVE))
+    black = np.flatnonzero(legal & (side == BLACK_TO_MOVE))
+    edges_white: List[Tuple[np.ndarray, np.ndarray]] = []
+    edges_black: List[Tuple[np.ndarray, np.ndarray]] = []
+
+    def add(edges, source, to_side, new_pawn, new_bishop, new_white_king, new_black_king):
+        target = layout.index(np.full(len(source), to_side), new_pawn, new_bishop, new_white_king, new_black_king)
+        keep = legal[target]
+        edges.append((source[keep], target[keep]))
+
+    # white king moves
+    for d in range(8):
+        s = white
+        to = KING_STEPS[white_king[s], d]
+        ok = (to >= 0) & (to != pawn[s]) & (to != bishop[s])
+        s, to = s[ok], to[ok]
+        add(edges_white, s, BLACK_TO_MOVE, pawn[s], bishop[s], to, black_king[s])
+
+    # pawn pushes, promotions counted as wins straight away
+    promotes = np.zeros(layout.size, dtype=bool)
+    one = pawn[white] + 8
+    free = (one != white_king[white]) & (one != black_king[white]) & (one != bishop[white])
+    s, to = white[free], one[free]
+    queening = to >= chess.A8
+    safe = (DISTANCE[black_king[s], to] > 1) | (DISTANCE[white_king[s], to] == 1)
+    promotes[s[queening & safe]] = True
+    add(edges_white, s[~queening], BLACK_TO_MOVE, to[~queening], bishop[s[~queening]], white_king[s[~queening]],
+        black_king[s[~queening]])
+    s = white[free & (pawn[white] < chess.A3)]
+    two = pawn[s] + 16
+    ok = (two != white_king[s]) & (two != black_king[s]) & (two != bishop[s])
+    s, two = s[ok], two[ok]
+    add(edges_white, s, BLACK_TO_MOVE, two, bishop[s], white_king[s], black_king[s])
+
+    # bishop moves
+    if layout.bishop_squares is not None:
+        for d in range(4):
+            sliding = white
+            for step in range(7):
+                to = DIAGONAL_STEPS[bishop[sliding], d, step]
+                on_board = to >= 0
+                sliding, to = sliding[on_board], to[on_board]
+                empty = (occupied[sliding] & BB[to]) == 0
+                sliding, to = sliding[empty], to[empty]
+                add(edges_white, sliding, BLACK_TO_MOVE, pawn[sliding], to, white_king[sliding], black_king[sliding])
+
+    # black king moves: into empty squares, or capturing the pawn (draw) or the bishop (on into kpk)
+    draws = np.zeros(layout.size, dtype=bool)
+    kpk_wins = []
+    has_move = np.zeros(layout.size, dtype=bool)
+    for d in range(8):
+        s = black
+        to = KING_STEPS[black_king[s], d]
+        ok = (to >= 0) & (DISTANCE[white_king[s], np.maximum(to, 0)] > 1)
+        s, to = s[ok], to[ok]
+
+        takes_pawn = to == pawn[s]
+        t, sq = s[takes_pawn], to[takes_pawn]
+        safe = ~_white_attacks(sq, white_king[t], np.full(len(t), -1), bishop[t],
+                               _occupied(bishop[t], white_king[t], sq))
+        draws[t[safe]] = True
+        has_move[t[safe]] = True
+
+        takes_bishop = to == bishop[s]
+        t, sq = s[takes_bishop], to[takes_bishop]
+        if len(t):
+            safe = ~_white_attacks(sq, white_king[t], pawn[t], np.full(len(t), -1),
+                                   _occupied(pawn[t], white_king[t], sq))
+            t, sq = t[safe], sq[safe]
+            pawn_index = (pawn[t] // 8 - 1) * 4 + pawn[t] % 8
+            target = np.ravel_multi_index((np.zeros(len(t), dtype=np.int64), pawn_index, white_king[t], sq),
+                                          (2, 24, 64, 64))
+            kpk_wins.append((t, kpk[target]))
+            has_move[t] = True
+
+        quiet = ~takes_pawn & ~takes_bishop
+        s, to = s[quiet], to[quiet]
+        add(edges_black, s, WHITE_TO_MOVE, pawn[s], bishop[s], white_king[s], to)
+        has_move[edges_black[-1][0]] = True
+
+    for t, won in kpk_wins:
+        draws[t[~won]] = True
+
+    win = promotes.copy()
+    checkmated = np.zeros(layout.size, dtype=bool)
+    checkmated[black] = ~has_move[black] & black_in_check[black]
+    win |= checkmated
+    candidates = black[has_move[black] & ~draws[black]]
+
+    changed = True
+    while changed:
+        before = int(win.sum())
+        for source, target in edges_white:
+            win[source] |= win[target]
+        escapes = np.zeros(layout.size, dtype=bool)
+        for source, target in edges_black:
+            escapes[source] |= ~win[target]
+        win[candidates] = ~escapes[candidates]
+        changed = int(win.sum()) != before
+    return win & legal
+
+
+LAYOUTS = {
+    'kpk': lambda: _Layout('kpk', [chess.square(f, r) for r in range(1, 7) for f in range(4)], None),
+    'kbpk': lambda: _Layout('kbpk', [chess.square(0, r) for r in range(1, 7)], DARK_SQUARES),
+}
+
+
+def generate(name: str, directory: Optional[str] = None) -> str:
+    """
+    build the bitbase `name` (and `kpk` first if it needs it) and write it out. returns its path
+    """
+    kpk = None
+    if name == 'kbpk':
+        table = bitbase.bitbase('kpk', directory) or bitbase.Bitbase(generate('kpk', directory))
+        kpk = np.unpackbits(np.frombuffer(table.bits(), dtype=np.uint8), bitorder='little')[:table.size].astype(bool)
+    layout = LAYOUTS[name]()
+    win = _solve(layout, kpk)
+    path = bitbase.path_of(name, directory)
+    bitbase.write(path, name, np.packbits(win, bitorder='little').tobytes(), layout.size)
+    return path
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='generate endgame bitbases by retrograde analysis')
+    parser.add_argument('names', nargs='*', default=list(LAYOUTS), help='bitbases to build (default: all)')
+    parser.add_argument('-d', '--directory', help='where to write them (default: tablebase/data)')
+    args = parser.parse_args(argv)
+    for name in args.names:
+        start = time.perf_counter()
+        path = generate(name, args.directory)
+        print('{}: {} ({:.1f}s)'.format(name, path, time.perf_counter() - start))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())